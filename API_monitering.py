@@ -1,8 +1,173 @@
-from flask import Flask, render_template_string, jsonify
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+from flask import Flask, Response, render_template_string, jsonify
 import requests
 
 app = Flask(__name__)
 
+# REST API của controller; http://localhost:8081 khi controller chạy ANALYTICS_WORKER.
+# Đổi bằng biến môi trường SDNLB_CONTROLLER_URL hoặc --controller
+CONTROLLER_URL = os.environ.get('SDNLB_CONTROLLER_URL', 'http://localhost:8080').rstrip('/')
+UPSTREAM_INTERVAL = 1.0  # Chu kỳ hỏi controller (giây), không phụ thuộc số trình duyệt đang mở
+UPSTREAM_TIMEOUT = 2  # Số giây chờ controller trả lời
+SUBSCRIBER_QUEUE = 100  # Số sự kiện chờ gửi tối đa cho mỗi trình duyệt; đầy → ngắt để trình duyệt kết nối lại
+KEEPALIVE_INTERVAL = 15  # Gửi comment SSE sau số giây này nếu không có sự kiện, giữ kết nối qua proxy
+DASHBOARD_PERF_KEYS = ('total_clients', 'faulty_aps')  # Số liệu hiệu năng hiển thị trên trang
+ROAMING_HISTORY = 50  # Số sự kiện roaming giữ lại cho trình duyệt mới kết nối
+
+
+# Một kết nối duy nhất tới controller cho mọi trình duyệt: hỏi các snapshot REST
+# bằng If-None-Match và ?since=<phiên bản> qua một requests.Session (giữ kết nối),
+# giữ bản sao trạng thái dùng chung và đẩy phần thay đổi tới các trình duyệt qua SSE.
+class StatusFeed(object):
+    def __init__(self, base_url, interval):
+        self.base_url = base_url
+        self.interval = interval
+        self.session = requests.Session()
+        self.lock = threading.Lock()
+        self.load = {}  # dpid → trạng thái AP
+        self.hosts = {}  # MAC → trạng thái client
+        self.perf = {}
+        self.roaming = deque(maxlen=ROAMING_HISTORY)
+        self.error = None
+        self.seq = 0
+        self.upstream_requests = 0
+        self._views = {}  # view → (ETag, phiên bản, epoch của controller)
+        self._subscribers = set()
+        self._thread = None
+
+    # Chạy luồng hỏi controller khi có trình duyệt đầu tiên (tránh chạy hai lần
+    # trong tiến trình reloader của Flask ở chế độ debug)
+    def start(self):
+        with self.lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.poll()
+            except (requests.RequestException, ValueError, KeyError) as e:
+                self._set_error(str(e))
+            time.sleep(self.interval)
+
+    # Hỏi một view; trả về (toàn bộ?, phần tử đổi, khóa đã xóa) hoặc None nếu không đổi
+    def _fetch(self, name):
+        etag, version, epoch = self._views.get(name, (None, 0, None))
+        headers = {'If-None-Match': etag} if etag else {}
+        self.upstream_requests += 1
+        response = self.session.get(f"{self.base_url}/{name}", params={'since': version},
+                                    headers=headers, timeout=UPSTREAM_TIMEOUT)
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        new_etag = response.headers.get('ETag')
+        new_epoch = new_etag.strip('"').split('-')[0] if new_etag else None
+        if epoch is not None and new_epoch != epoch:
+            # Controller đã khởi động lại, phiên bản cũ không còn ý nghĩa → lấy lại toàn bộ
+            del self._views[name]
+            return self._fetch(name)
+        data = response.json()
+        self._views[name] = (new_etag, data['version'], new_epoch)
+        return data['full'] or epoch is None, data['changed'], data['removed']
+
+    # Cập nhật bản sao; trả về (phần tử đổi, khóa đã xóa) so với bản sao cũ
+    @staticmethod
+    def _apply(cache, full, changed, removed):
+        if full:
+            removed = [key for key in cache if key not in changed]
+            cache.clear()
+        for key in removed:
+            cache.pop(key, None)
+        cache.update(changed)
+        return changed, list(removed)
+
+    def poll(self):
+        load = self._fetch('load_status')
+        hosts = self._fetch('host_status')
+        perf = self._fetch('performance_metrics')
+        delta = {}
+        with self.lock:
+            if load is not None:
+                delta['aps'], delta['aps_removed'] = self._apply(self.load, *load)
+            if hosts is not None:
+                full, changed, removed = hosts
+                changed = {host['mac']: host for host in changed}
+                delta['hosts'], delta['hosts_removed'] = self._apply(self.hosts, full, changed, removed)
+            if perf is not None:
+                full, changed, removed = perf
+                self._apply(self.perf, full, changed, removed)
+                shown = {key: changed[key] for key in DASHBOARD_PERF_KEYS if key in changed}
+                if shown:
+                    delta['perf'] = shown
+                known = {json.dumps(event, sort_keys=True) for event in self.roaming}
+                new_events = [event for event in changed.get('roaming_events', ())
+                              if json.dumps(event, sort_keys=True) not in known]
+                if new_events:
+                    self.roaming.extend(new_events)
+                    delta['roaming'] = new_events
+            if self.error is not None:
+                self.error = None
+                delta['error'] = None
+            if any(delta.values()) or 'error' in delta:
+                self._broadcast('delta', delta)
+
+    def _set_error(self, error):
+        with self.lock:
+            if error != self.error:
+                self.error = error
+                self._broadcast('delta', {'error': error})
+
+    # Trạng thái đầy đủ cho trình duyệt mới kết nối
+    def _snapshot(self):
+        return {
+            'aps': self.load,
+            'hosts': self.hosts,
+            'perf': {key: self.perf[key] for key in DASHBOARD_PERF_KEYS if key in self.perf},
+            'roaming': list(self.roaming),
+            'error': self.error,
+        }
+
+    # Đóng gói sự kiện SSE một lần rồi gửi cho mọi trình duyệt; trình duyệt không
+    # đọc kịp bị ngắt (None), EventSource sẽ tự kết nối lại và nhận snapshot mới
+    def _broadcast(self, event, data):
+        self.seq += 1
+        data['time'] = time.time()
+        message = f"id: {self.seq}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                self._subscribers.discard(subscriber)
+                while not subscriber.empty():
+                    subscriber.get_nowait()
+                subscriber.put_nowait(None)
+
+    def subscribe(self):
+        subscriber = queue.Queue(SUBSCRIBER_QUEUE)
+        with self.lock:
+            data = dict(self._snapshot(), time=time.time())
+            subscriber.put_nowait(f"id: {self.seq}\nevent: snapshot\ndata: {json.dumps(data)}\n\n")
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self._subscribers.discard(subscriber)
+
+    def subscribers(self):
+        return len(self._subscribers)
+
+
+feed = StatusFeed(CONTROLLER_URL, UPSTREAM_INTERVAL)
+
 HTML_TEMPLATE = '''
 <!DOCTYPE html>
 <html lang="vi">
@@ -13,7 +178,7 @@ HTML_TEMPLATE = '''
   <style>
     body { font-family: Arial, sans-serif; margin: 20px; }
     table { width: 100%; border-collapse: collapse; margin-top: 20px; }
-    th, td { border: 1px solid #ccc; padding: 8px; text-align: left; }
+    th, td { border: 1px solid #ccc; padding: 8px; text-align: left; white-space: pre-line; }
     th { background-color: #f0f0f0; }
     tr.faulty { background-color: #ffe0e0; color: red; font-weight: bold; }
     .section { margin-bottom: 40px; }
@@ -27,7 +192,7 @@ HTML_TEMPLATE = '''
     <table id="apTable">
       <thead><tr>
         <th>AP ID</th><th>Địa chỉ IP</th><th>Thời gian kết nối</th>
-        <th>Số Client</th><th>MAC Clients</th><th>Rx Bytes</th><th>Tx Bytes</th><th>Faulty</th>
+        <th>Số Client</th><th>MAC Clients</th><th>Rx (EWMA)</th><th>Tx (EWMA)</th><th>Faulty</th>
       </tr></thead>
       <tbody></tbody>
     </table>
@@ -51,7 +216,11 @@ HTML_TEMPLATE = '''
 
   <div class="section">
     <h3>📈 Đánh giá hiệu suất hệ thống</h3>
-    <ul id="perfMetrics"></ul>
+    <ul id="perfMetrics">
+      <li>Tổng số client: <b id="totalClients">--</b></li>
+      <li>AP lỗi: <b id="faultyAps">--</b></li>
+      <li>Sự kiện roaming gần nhất:<ul id="roamingEvents"></ul></li>
+    </ul>
   </div>
 
   <script>
@@ -61,76 +230,132 @@ HTML_TEMPLATE = '''
         labels: [],
         datasets: [{ label: 'Số Client kết nối', data: [], backgroundColor: 'rgba(75,192,192,0.6)' }]
       },
-      options: { scales: { y: { beginAtZero: true } } }
+      options: { animation: false, scales: { y: { beginAtZero: true } } }
     });
 
-    function fetchData() {
-      fetch('/api/full_status')
-        .then(res => res.json())
-        .then(data => {
-          if (data.error) throw new Error(data.error);
-
-          const load = data.load;
-          const host = data.host;
-          const perf = data.perf;
-
-          document.getElementById('lastUpdated').textContent = new Date().toLocaleString();
-
-          // AP Table
-          const labels = [], values = [];
-          const apTbody = document.querySelector('#apTable tbody');
-          apTbody.innerHTML = '';
-          for (const [dpid, info] of Object.entries(load)) {
-            labels.push('AP ' + dpid);
-            values.push(info.clients);
-            const row = document.createElement('tr');
-            const rx = Object.values(info.port_stats).reduce((s, p) => s + (p.rx_bytes || 0), 0);
-            const tx = Object.values(info.port_stats).reduce((s, p) => s + (p.tx_bytes || 0), 0);
-            row.innerHTML = `
-              <td>AP ${dpid}</td><td>${info.ip}</td><td>${info.last_seen}</td>
-              <td>${info.clients}</td><td>${info.mac_table.join('<br>')}</td>
-              <td>${rx.toLocaleString()} bytes</td><td>${tx.toLocaleString()} bytes</td>
-              <td>${info.is_faulty ? '⚠️' : ''}</td>
-            `;
-            if (info.is_faulty) row.classList.add('faulty');
-            apTbody.appendChild(row);
-          }
-
-          chart.data.labels = labels;
-          chart.data.datasets[0].data = values;
-          chart.update();
-
-          // Host Table
-          const hostTbody = document.querySelector('#hostTable tbody');
-          hostTbody.innerHTML = '';
-          host.forEach(h => {
-            const row = document.createElement('tr');
-            row.innerHTML = `
-              <td>${h.mac}</td><td>${h.ip}</td><td>${h.ap}</td>
-              <td>${h.port}</td><td>${h.rx_bytes.toLocaleString()} bytes</td>
-              <td>${h.tx_bytes.toLocaleString()} bytes</td><td>${h.rssi}</td>
-            `;
-            hostTbody.appendChild(row);
-          });
-
-          // Performance Metrics
-          const perfList = document.querySelector('#perfMetrics');
-          perfList.innerHTML = `
-            <li>Tổng số client: <b>${perf.total_clients}</b></li>
-            <li>AP lỗi: <b>${perf.faulty_aps.join(', ') || 'Không có'}</b></li>
-            <li>Sự kiện roaming gần nhất:</li>
-            ${perf.roaming_events.map(ev =>
-              `<li>${ev.mac} chuyển từ AP ${ev.from_ap} sang AP ${ev.to_ap} lúc ${new Date(ev.time * 1000).toLocaleTimeString()}</li>`
-            ).join('')}
-          `;
-        })
-        .catch(err => {
-          alert("⚠️ Không thể tải dữ liệu từ controller: " + err.message);
-        });
+    const ROAMING_SHOWN = 10;
+    const aps = {};
+    // Mỗi bảng: dòng theo khóa và mảng khóa đã sắp xếp (tìm vị trí chèn bằng tìm kiếm nhị phân)
+    function rowTable(selector, before) {
+      return { tbody: document.querySelector(selector), before, rows: new Map(), keys: [] };
     }
+    const apTable = rowTable('#apTable tbody', (a, b) => Number(a) < Number(b));
+    const hostTable = rowTable('#hostTable tbody', (a, b) => a < b);
 
-    fetchData();
-    setInterval(fetchData, 2000);
+    function fmtRate(bps) {
+      const units = ['bps', 'Kbps', 'Mbps', 'Gbps'];
+      let i = 0;
+      while (bps >= 1000 && i < units.length - 1) { bps /= 1000; i++; }
+      return bps.toFixed(1) + ' ' + units[i];
+    }
+
+    // Vị trí đầu tiên trong table.keys có khóa lớn hơn key
+    function upperBound(table, key) {
+      let lo = 0, hi = table.keys.length;
+      while (lo < hi) {
+        const mid = (lo + hi) >> 1;
+        if (table.before(key, table.keys[mid])) hi = mid; else lo = mid + 1;
+      }
+      return lo;
+    }
+
+    // Cập nhật (hoặc thêm, giữ thứ tự theo khóa) một dòng; chỉ ghi các ô có giá trị đổi
+    function patchRow(table, key, cells) {
+      let row = table.rows.get(key);
+      if (!row) {
+        row = document.createElement('tr');
+        cells.forEach(() => row.appendChild(document.createElement('td')));
+        const at = upperBound(table, key);
+        const next = at < table.keys.length ? table.rows.get(table.keys[at]) : null;
+        table.tbody.insertBefore(row, next);
+        table.keys.splice(at, 0, key);
+        table.rows.set(key, row);
+      }
+      cells.forEach((value, i) => {
+        if (row.cells[i].textContent !== value) row.cells[i].textContent = value;
+      });
+      return row;
+    }
+
+    function removeRow(table, key) {
+      const row = table.rows.get(key);
+      if (!row) return;
+      row.remove();
+      table.rows.delete(key);
+      table.keys.splice(upperBound(table, key) - 1, 1);
+    }
+
+    function clearRows(table) {
+      table.rows.forEach(row => row.remove());
+      table.rows.clear();
+      table.keys = [];
+    }
+
+    function apCells(dpid, info) {
+      const [rx, tx] = info.rate_bps;
+      const [ewmaRx, ewmaTx] = info.ewma_bps;
+      return [`AP ${dpid}`, info.ip, info.last_seen, String(info.clients), info.mac_table.join('\\n'),
+              `${fmtRate(rx)} (${fmtRate(ewmaRx)})`, `${fmtRate(tx)} (${fmtRate(ewmaTx)})`,
+              info.is_faulty ? '⚠️' : ''];
+    }
+
+    function hostCells(h) {
+      return [h.mac, h.ip, String(h.ap), String(h.port), `${h.rx_bytes.toLocaleString()} bytes`,
+              `${h.tx_bytes.toLocaleString()} bytes`, String(h.rssi)];
+    }
+
+    function addRoaming(events) {
+      const list = document.getElementById('roamingEvents');
+      events.forEach(ev => {
+        const item = document.createElement('li');
+        item.textContent = `${ev.mac} chuyển từ AP ${ev.from_ap} sang AP ${ev.to_ap} lúc ${new Date(ev.time * 1000).toLocaleTimeString()}`;
+        list.appendChild(item);
+      });
+      while (list.children.length > ROAMING_SHOWN) list.firstChild.remove();
+    }
+
+    function apply(data) {
+      document.getElementById('lastUpdated').textContent = data.error
+        ? '⚠️ Không thể tải dữ liệu từ controller: ' + data.error
+        : new Date(data.time * 1000).toLocaleString();
+
+      (data.aps_removed || []).forEach(dpid => { delete aps[dpid]; removeRow(apTable, dpid); });
+      for (const [dpid, info] of Object.entries(data.aps || {})) {
+        aps[dpid] = info;
+        const row = patchRow(apTable, dpid, apCells(dpid, info));
+        row.classList.toggle('faulty', info.is_faulty);
+      }
+      if (data.aps || data.aps_removed) {
+        const dpids = Object.keys(aps).sort((a, b) => a - b);
+        chart.data.labels = dpids.map(dpid => 'AP ' + dpid);
+        chart.data.datasets[0].data = dpids.map(dpid => aps[dpid].clients);
+        chart.update();
+      }
+
+      (data.hosts_removed || []).forEach(mac => removeRow(hostTable, mac));
+      for (const [mac, h] of Object.entries(data.hosts || {})) {
+        patchRow(hostTable, mac, hostCells(h));
+      }
+
+      const perf = data.perf || {};
+      if ('total_clients' in perf) document.getElementById('totalClients').textContent = perf.total_clients;
+      if ('faulty_aps' in perf) document.getElementById('faultyAps').textContent = perf.faulty_aps.join(', ') || 'Không có';
+      if (data.roaming) addRoaming(data.roaming);
+    }
+
+    // Trạng thái được đẩy từ server: "snapshot" khi (kết nối lại), sau đó chỉ "delta"
+    const source = new EventSource('/api/stream');
+    source.addEventListener('snapshot', e => {
+      Object.keys(aps).forEach(dpid => delete aps[dpid]);
+      clearRows(apTable);
+      clearRows(hostTable);
+      document.getElementById('roamingEvents').innerHTML = '';
+      apply(JSON.parse(e.data));
+    });
+    source.addEventListener('delta', e => apply(JSON.parse(e.data)));
+    source.onerror = () => {
+      document.getElementById('lastUpdated').textContent = '⚠️ Mất kết nối tới dashboard, đang kết nối lại...';
+    };
   </script>
 </body>
 </html>
@@ -140,15 +365,50 @@ HTML_TEMPLATE = '''
 def index():
     return render_template_string(HTML_TEMPLATE)
 
+# Trạng thái đầy đủ từ bản sao dùng chung (không hỏi controller theo từng request)
 @app.route('/api/full_status')
 def api_full_status():
-    try:
-        load = requests.get('http://localhost:8080/load_status').json()
-        host = requests.get('http://localhost:8080/host_status').json()
-        perf = requests.get('http://localhost:8080/performance_metrics').json()
-        return jsonify({"load": load, "host": host, "perf": perf})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    feed.start()
+    with feed.lock:
+        if feed.error is not None and not feed.load:
+            return jsonify({"error": feed.error}), 500
+        return jsonify({"load": feed.load, "host": sorted(feed.hosts.values(), key=lambda h: h['mac']),
+                        "perf": feed.perf})
+
+# Luồng Server-Sent Events: snapshot khi kết nối, sau đó chỉ phần thay đổi
+@app.route('/api/stream')
+def api_stream():
+    feed.start()
+    subscriber = feed.subscribe()
+
+    def stream():
+        try:
+            while True:
+                try:
+                    message = subscriber.get(timeout=KEEPALIVE_INTERVAL)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            feed.unsubscribe(subscriber)
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# Số liệu của chính dashboard: số trình duyệt đang nhận và số request đã gửi tới controller
+@app.route('/api/feed_stats')
+def api_feed_stats():
+    return jsonify({"subscribers": feed.subscribers(), "upstream_requests": feed.upstream_requests,
+                    "events": feed.seq, "error": feed.error})
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--controller', default=CONTROLLER_URL,
+                        help='địa chỉ REST API của controller (http://localhost:8081 với ANALYTICS_WORKER)')
+    parser.add_argument('--port', type=int, default=5000)
+    args = parser.parse_args()
+    feed.base_url = args.controller.rstrip('/')
+    app.run(debug=True, port=args.port, threaded=True)
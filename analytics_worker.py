@@ -0,0 +1,462 @@
+import logging
+import multiprocessing
+import os
+import pickle
+import time
+from collections import defaultdict
+
+import numpy as np
+from eventlet import tpool
+from ryu.app.wsgi import WSGIApplication
+from ryu.lib import hub
+
+from api_snapshot import SnapshotStore
+from client_table import int_to_ip, int_to_mac
+from load_policy import make_policy
+from port_history import PortStatsHistory
+from profiler import StackSampler
+from roaming_log import RoamingLog, RoamingRing
+from rssi_matrix import RSSIMatrix
+
+# Một client trong trạng thái controller gửi sang worker (AP/cổng/IP = -1 nếu chưa biết,
+# RSSI = -32768)
+HOST_DTYPE = np.dtype([('mac', '<u8'), ('dpid', '<i8'), ('port', '<i4'), ('ip', '<i8'), ('rssi', '<i2'),
+                       ('tx_bytes', '<i8'), ('rx_bytes', '<i8'), ('tx_packets', '<i8'), ('rx_packets', '<i8'),
+                       ('tx_bps', '<f4'), ('rx_bps', '<f4')])
+_NO_RSSI = -32768
+
+
+# Chụp các cột của ClientTable (kể cả lưu lượng) thành mảng bản ghi sắp theo MAC; chỉ
+# các slot trong `slots` nếu có. Chỉ sao chép mảng, không tạo đối tượng Python cho từng client
+def host_records(table, slots=None):
+    slots, columns = table.export_columns(slots)
+    columns += table.export_traffic()
+    slots = np.frombuffer(slots, dtype=slots.typecode) if len(slots) else np.zeros(0, np.int64)
+    records = np.empty(len(slots), HOST_DTYPE)
+    for name, column in zip(HOST_DTYPE.names, columns):
+        records[name] = np.frombuffer(column, dtype=column.typecode)[slots] if len(slots) else 0
+    return records[np.argsort(records['mac'], kind='stable')]
+
+
+# Kênh hai chiều qua multiprocessing Pipe: mỗi thông điệp (loại, dữ liệu) được pickle.
+# Gửi và nhận chạy trong thread pool của eventlet (tpool) nên hub không bị chặn khi
+# pipe đầy hoặc đang chờ; một green thread gửi lần lượt theo hàng đợi (Connection không
+# an toàn khi nhiều luồng cùng gửi), một green thread nhận và gọi handler(loại, dữ liệu).
+# on_close() được gọi khi đầu bên kia đóng hoặc kênh bị lỗi mà phía này chưa close().
+class PipeChannel(object):
+    def __init__(self, conn, handler, logger, on_close=None):
+        self.conn = conn
+        self.handler = handler
+        self.logger = logger
+        self.on_close = on_close
+        self.closed = False
+        self.sent = 0
+        self.received = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.sent_by_kind = defaultdict(lambda: [0, 0, 0.0])  # loại → [số thông điệp, byte, giây pickle]
+        self._outbox = hub.Queue()
+        self._sender = hub.spawn(self._send_loop)
+        self._receiver = hub.spawn(self._recv_loop)
+
+    def send(self, kind, data=None):
+        if not self.closed:
+            self._outbox.put((kind, data))
+
+    def pending(self):
+        return self._outbox.qsize()
+
+    # Gửi nốt các thông điệp đang chờ rồi đóng đầu kênh phía này
+    def close(self):
+        if not self.closed:
+            self._outbox.put(None)
+
+    def _send_loop(self):
+        while True:
+            message = self._outbox.get()
+            if message is None:
+                self.closed = True
+                return
+            start = time.perf_counter()
+            payload = pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+            pickle_seconds = time.perf_counter() - start
+            try:
+                tpool.execute(self.conn.send_bytes, payload)
+            except (OSError, EOFError) as e:
+                self._lost(e)
+                return
+            self.sent += 1
+            self.bytes_sent += len(payload)
+            stats = self.sent_by_kind[message[0]]
+            stats[0] += 1
+            stats[1] += len(payload)
+            stats[2] += pickle_seconds
+
+    # Đầu bên kia đóng → đóng kết nối ở đây (không đóng khi luồng nhận còn đang đọc)
+    def _recv_loop(self):
+        while True:
+            try:
+                payload = tpool.execute(self.conn.recv_bytes)
+            except (OSError, EOFError) as e:
+                self._lost(e)
+                self.conn.close()
+                return
+            self.received += 1
+            self.bytes_received += len(payload)
+            kind, data = pickle.loads(payload)
+            try:
+                self.handler(kind, data)
+            except Exception:
+                self.logger.exception(f"Handling {kind} message failed")
+
+    def _lost(self, error):
+        if self.closed:
+            return
+        self.closed = True
+        self.logger.warning(f"Channel closed: {error!r}")
+        if self.on_close is not None:
+            self.on_close()
+
+    def summary(self):
+        return {
+            "messages_sent": self.sent,
+            "messages_received": self.received,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "sent_by_kind": {kind: {"messages": count, "avg_bytes": size // count,
+                                    "avg_pickle_ms": round(seconds / count * 1000, 3)}
+                             for kind, (count, size, seconds) in self.sent_by_kind.items()},
+            "queued": self.pending(),
+            "closed": self.closed
+        }
+
+
+# Phía controller của tiến trình worker phân tích. Tiến trình được tạo bằng spawn
+# (không fork) nên không kế thừa hub, socket OpenFlow hay luồng của ryu-manager.
+# handler(loại, dữ liệu) nhận các thông điệp worker gửi về: 'roams', 'rssi', 'load_policy'
+class AnalyticsWorker(object):
+    def __init__(self, config, handler, logger):
+        self.logger = logger
+        context = multiprocessing.get_context('spawn')
+        conn, child_conn = context.Pipe()
+        # Pipe tạo socketpair; sau hub.patch socket là green (non-blocking), nhưng mọi thao
+        # tác đọc/ghi đều chạy trong tpool nên cần fd chặn như bình thường
+        for end in (conn, child_conn):
+            os.set_blocking(end.fileno(), True)
+        self.process = context.Process(target=worker_main, args=(child_conn, config),
+                                       name='sdnlb-analytics', daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.channel = PipeChannel(conn, handler, logger, self._exited)
+        self.logger.info(f"Analytics worker started (pid {self.process.pid}, REST API on port {config['port']})")
+
+    def _exited(self):
+        self.logger.error(f"Analytics worker (pid {self.process.pid}) is gone; "
+                          f"REST API and RSSI roaming are unavailable")
+
+    @property
+    def alive(self):
+        return not self.channel.closed
+
+    def send(self, kind, data=None):
+        self.channel.send(kind, data)
+
+    def close(self, timeout=5):
+        self.channel.send('stop')
+        self.channel.close()
+        tpool.execute(self.process.join, timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+
+    def summary(self):
+        return dict(self.channel.summary(), pid=self.process.pid, alive=self.alive)
+
+
+# Điểm vào của tiến trình worker: patch như ryu-manager, phục vụ REST API trên cổng
+# riêng và chạy roaming định kỳ cho tới khi controller gửi 'stop' hoặc đóng kênh
+def worker_main(conn, config):
+    hub.patch(thread=False)
+    logging.basicConfig(level=config['log_level'], format='%(asctime)s analytics %(levelname)s %(message)s')
+    # ryu_controler nhập module này nên REST API chỉ được nhập bên trong tiến trình worker
+    from ryu_controler import SDN_LB_INSTANCE_NAME, SDNLBRestAPI
+    service = AnalyticsService(conn, config, logging.getLogger('analytics_worker'))
+    wsgi = WSGIApplication()
+    wsgi.register(SDNLBRestAPI, {SDN_LB_INSTANCE_NAME: service})
+    server = hub.WSGIServer((config['host'], config['port']), wsgi)
+    hub.spawn(server.serve_forever)
+    service.logger.info(f"Serving REST API on {config['host']}:{config['port']}")
+    service.run()
+    # Luồng tpool đang chờ đọc pipe sẽ làm atexit của eventlet (tpool.killall) chờ mãi
+    logging.shutdown()
+    os._exit(0)
+
+
+# Phần phân tích chạy trong tiến trình worker. Nhận trạng thái controller công bố mỗi
+# chu kỳ (mảng client, tóm tắt AP, số liệu, mẫu thống kê cổng, sự kiện roaming mới),
+# dựng các view JSON cho REST API, giữ ma trận RSSI từ các request /update_rssi* và
+# tính roaming định kỳ; các lượt chuyển được gửi về để controller kiểm tra lại và cài
+# flow. Có cùng các thuộc tính SDNLBRestAPI đọc từ controller (snapshots, port_history,
+# load_policy, ingest_rssi, ...), nên REST API được dùng lại nguyên vẹn.
+class AnalyticsService(object):
+    def __init__(self, conn, config, logger):
+        self.logger = logger
+        self.config = config
+        self.snapshots = SnapshotStore(config['epoch'], config['snapshot_history'])
+        self.port_history = PortStatsHistory(*config['port_history'])
+        self.roaming_events = RoamingRing(config['roaming_ring_size'])
+        self.roaming_log = None  # Chỉ để truy vấn; controller ghi nhật ký
+        if config['roaming_log_path']:
+            self.roaming_log = RoamingLog(config['roaming_log_path'], logger=logger, offload=tpool.execute)
+        self.load_policy = make_policy(config['load_policy']['name'], **config['load_policy']['params'])
+        self.rssi_matrix = RSSIMatrix(*config['rssi'])
+        self.sampler = StackSampler()
+        self.rows = {}  # MAC → hàng của ma trận RSSI
+        self._row_macs = []  # hàng → MAC (-1 = trống)
+        self._free_rows = []
+        self.host_records = {}  # MAC → bản ghi HOST_DTYPE của client theo trạng thái controller
+        self.host_dpid = {}  # MAC → AP hiện tại theo trạng thái controller gửi gần nhất
+        self.published = {}  # MAC → bản ghi client đã đưa vào /host_status lần trước
+        self.mac_tables = {}  # dpid → MAC các client trên AP (cho /load_status)
+        self.publish_dpids = None  # Các AP của lần công bố trước; đổi → dựng lại toàn bộ
+        self.publish_time = 0.0
+        self.roam_inputs = None  # (chỗ trống theo AP, AP lỗi, MAC đang chờ chuyển)
+        self.active = set()
+        self.rssi_samples = 0
+        self.rssi_updates = {}  # MAC → RSSI mới nhất chưa gửi về controller
+        self.rssi_unsent = 0  # Số mẫu đã ghi nhận từ lần gửi trước
+        self.rssi_seq = 0  # Số thứ tự lô RSSI gửi về controller gần nhất
+        self.rssi_sent = {}  # MAC controller chưa biết → số thứ tự lô RSSI đã gửi (giữ hàng RSSI)
+        self.states = 0
+        self.roam_plans = 0
+        self.last_publish_seconds = 0.0
+        self.last_plan_seconds = 0.0
+        self._stopped = hub.Event()
+        self.channel = PipeChannel(conn, self._on_message, logger, self._stopped.set)
+
+    def run(self):
+        while not self._stopped.wait(timeout=self.config['roam_interval']):
+            if self.roam_inputs is not None:
+                self._send_roams(self._plan_roams())
+        self.channel.close()
+        if self.roaming_log is not None:
+            self.roaming_log.close()
+
+    def _on_message(self, kind, data):
+        if kind == 'state':
+            self._on_state(data)
+        elif kind == 'evacuate':
+            dpid, reason, self.roam_inputs = data
+            self._send_roams(self._plan_roams(only_dpid=dpid), reason)
+        elif kind == 'stop':
+            self._stopped.set()
+
+    def _row(self, mac):
+        row = self.rows.get(mac)
+        if row is None:
+            if self._free_rows:
+                row = self._free_rows.pop()
+                self._row_macs[row] = mac
+            else:
+                row = len(self._row_macs)
+                self._row_macs.append(mac)
+            self.rows[mac] = row
+        return row
+
+    def _release_row(self, mac):
+        row = self.rows.pop(mac)
+        self.rssi_matrix.clear(row)
+        self._row_macs[row] = -1
+        self._free_rows.append(row)
+
+    # Ghi nhận các mẫu RSSI như controller (SDNWiFiLoadBalancer.ingest_rssi); RSSI mới nhất
+    # của từng client được gửi về controller sau mỗi lần nhận trạng thái
+    def ingest_rssi(self, samples, now):
+        max_age = self.rssi_matrix.max_age
+        applied = 0
+        for mac, ap, rssi, ts in samples:
+            if ts is not None and now - ts > max_age:
+                continue
+            self.rssi_updates[mac] = rssi
+            if ap is None:
+                ap = self.host_dpid.get(mac)
+            if ap is not None and rssi is not None:
+                self.rssi_matrix.update(self._row(mac), ap, rssi, min(ts or now, now))
+            applied += 1
+        self.rssi_samples += applied
+        self.rssi_unsent += applied
+        return applied
+
+    # Đổi chính sách ở worker (để /load_policy trả về ngay) và ở controller
+    def set_load_policy(self, name, params):
+        self.load_policy = make_policy(name, **params)
+        self.channel.send('load_policy', (name, params))
+
+    def _on_state(self, state):
+        start = time.perf_counter()
+        now = state["time"]
+        self.states += 1
+        for dpid, port, t, rx_bytes, tx_bytes in state["port_samples"]:
+            self.port_history.record(dpid, port, t, rx_bytes, tx_bytes)
+        active = {dpid for dpid, _ in state["aps"]}
+        for dpid in self.active - active:
+            self.port_history.drop(dpid)
+            self.rssi_matrix.drop_ap(dpid)
+        self.active = active
+        for event in state["events"]:
+            self.roaming_events.append(event)
+        self.roam_inputs = (state["free"], state["faulty"], state["pending"])
+
+        # Trạng thái chỉ gồm client đã đổi và MAC đã bị xóa từ lần gửi trước; định kỳ
+        # controller gửi lại toàn bộ bảng ("full") để sửa mọi sai lệch
+        records = state["hosts"].tolist()
+        if state["full"]:
+            previous = self.host_records
+            self.host_records = {record[0]: record for record in records}
+            removed = [mac for mac in previous if mac not in self.host_records]
+        else:
+            removed = state["removed"]
+            for mac in removed:
+                self.host_records.pop(mac, None)
+            for record in records:
+                self.host_records[record[0]] = record
+
+        # Đồng bộ hàng RSSI với bảng client: client mới có hàng, client đã bị xóa trả hàng,
+        # client đổi AP bắt đầu tính lại thời gian lưu lại. MAC controller chưa biết nhưng
+        # có RSSI đang chờ gửi hoặc đã gửi mà controller chưa áp dụng (rssi_seq của trạng
+        # thái) vẫn giữ hàng, nếu không mẫu RSSI đầu tiên của client mới sẽ bị mất
+        known = self.host_records
+        self.rssi_sent = {mac: seq for mac, seq in self.rssi_sent.items()
+                          if seq > state["rssi_seq"] and mac not in known}
+        for mac in removed:
+            self.host_dpid.pop(mac, None)
+        for mac in [mac for mac in self.rows
+                    if mac not in known and mac not in self.rssi_updates and mac not in self.rssi_sent]:
+            self._release_row(mac)
+        for record in records:
+            mac, dpid = record[0], record[1]
+            row = self._row(mac)
+            if dpid < 0:
+                self.host_dpid.pop(mac, None)
+                continue
+            if self.host_dpid.get(mac) != dpid:
+                self.rssi_matrix.mark_attached(row, now)
+            self.host_dpid[mac] = dpid
+
+        self._publish(state, records, removed, now)
+        if self.rssi_updates:
+            self.rssi_seq += 1
+            self.channel.send('rssi', (self.rssi_seq, list(self.rssi_updates.items()), self.rssi_unsent))
+            for mac in self.rssi_updates:
+                if mac not in known:
+                    self.rssi_sent[mac] = self.rssi_seq
+            self.rssi_updates = {}
+            self.rssi_unsent = 0
+        self.last_publish_seconds = time.perf_counter() - start
+
+    # Dựng các view của REST API giống SDNWiFiLoadBalancer._publish_snapshot: chỉ client
+    # có bản ghi hoặc hàng RSSI đổi từ lần trước được dựng lại và serialize
+    def _publish(self, state, records, removed, now):
+        dpids = [dpid for dpid, _ in state["aps"]]
+        full = dpids != self.publish_dpids
+        rssi_rows = self.rssi_matrix.changed_rows(self.publish_time, now)
+        if full:
+            self.published = {}
+            records = sorted(self.host_records.values())
+        entries, gone, rebuilt = [], [], set()
+        changed_aps = set(dpids) if full else set()
+        for record in records:
+            mac, dpid = record[0], record[1]
+            old = self.published.get(mac)
+            if old is not None and old[1] != dpid:
+                changed_aps.add(old[1])
+            if dpid < 0:
+                if old is not None:
+                    del self.published[mac]
+                    gone.append(mac)
+                continue
+            self.published[mac] = record
+            if old != record:
+                entries.append(self._host_entry(record, now))
+                rebuilt.add(mac)
+            if old is None or old[1] != dpid:
+                changed_aps.add(dpid)
+        for mac in removed:
+            old = self.published.pop(mac, None)
+            if old is not None:
+                gone.append(mac)
+                changed_aps.add(old[1])
+        for row in rssi_rows:
+            mac = self._row_macs[row] if row < len(self._row_macs) else -1
+            if mac in self.published and mac not in rebuilt:
+                entries.append(self._host_entry(self.published[mac], now))
+        self.publish_dpids = dpids
+        self.publish_time = now
+
+        if full:
+            self.mac_tables = {}
+        if changed_aps:
+            mac_tables = defaultdict(list)
+            for mac, record in self.published.items():
+                if record[1] in changed_aps:
+                    mac_tables[record[1]].append(mac)
+            for dpid in changed_aps:
+                self.mac_tables[dpid] = [int_to_mac(mac) for mac in sorted(mac_tables.get(dpid, []))]
+        aps = []
+        for dpid, summary in state["aps"]:
+            summary["mac_table"] = self.mac_tables.get(dpid, [])
+            aps.append((str(dpid), dpid, summary))
+        metrics = state["metrics"]
+        metrics["snapshot"] = dict(metrics["snapshot"], version=self.snapshots.version)
+        metrics["analytics_worker"] = dict(
+            metrics.get("analytics_worker", {}), states=self.states, roam_plans=self.roam_plans,
+            last_publish_seconds=self.last_publish_seconds, last_plan_seconds=self.last_plan_seconds,
+            rssi_rows=len(self.rows), rest_port=self.config['port'])
+        self.snapshots.publish({
+            'load_status': ('dict', aps),
+            'host_status': ('list', entries) if full else ('list', entries, [int_to_mac(mac) for mac in gone]),
+            'performance_metrics': ('dict', [(key, None, value) for key, value in metrics.items()]),
+        }, now)
+
+    # Một client cho /host_status từ bản ghi HOST_DTYPE: (khóa, nhãn AP, đối tượng JSON)
+    def _host_entry(self, record, now):
+        mac_int, dpid, port, ip, rssi, tx_bytes, rx_bytes, tx_packets, rx_packets, tx_bps, rx_bps = record
+        mac = int_to_mac(mac_int)
+        return (mac, dpid, {
+            "mac": mac,
+            "ip": int_to_ip(ip) if ip >= 0 else "N/A",
+            "ap": dpid,
+            "port": port,
+            "rx_bytes": rx_bytes,
+            "tx_bytes": tx_bytes,
+            "rx_packets": rx_packets,
+            "tx_packets": tx_packets,
+            "rx_bps": rx_bps,
+            "tx_bps": tx_bps,
+            "rssi": rssi if rssi != _NO_RSSI else -100,
+            "rssi_by_ap": self.rssi_matrix.row(self.rows[mac_int], now)
+        })
+
+    # Như SDNWiFiLoadBalancer._plan_roams nhưng trên hàng RSSI của worker; trả về các lượt
+    # chuyển (MAC, AP cũ, AP mới, RSSI tại AP cũ, RSSI tại AP mới)
+    def _plan_roams(self, only_dpid=None):
+        start = time.perf_counter()
+        free, faulty, pending = self.roam_inputs
+        slot_dpid = np.full(len(self._row_macs), -1, dtype=np.int64)
+        for mac, dpid in self.host_dpid.items():
+            slot_dpid[self.rows[mac]] = dpid
+        for mac in pending:
+            row = self.rows.get(mac)
+            if row is not None:
+                slot_dpid[row] = -1  # Đang chờ lô FlowMod của lần chuyển trước
+        roam = self.config['roam']
+        moves = self.rssi_matrix.plan_roams(
+            slot_dpid, free, faulty, time.time(), roam['threshold'], roam['hysteresis'],
+            roam['min_dwell'], roam['load_cost'], only_dpid=only_dpid)
+        self.roam_plans += 1
+        self.last_plan_seconds = time.perf_counter() - start
+        return [(self._row_macs[row], from_ap, to_ap, rssi, target_rssi)
+                for row, from_ap, to_ap, rssi, target_rssi in moves]
+
+    def _send_roams(self, moves, fault_reason=None):
+        if moves or fault_reason is not None:
+            self.channel.send('roams', (moves, fault_reason))
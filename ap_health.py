@@ -0,0 +1,148 @@
+import struct
+
+_ECHO_MAGIC = b'SDLB'
+_ECHO = struct.Struct('!4sd')  # magic, thời điểm gửi echo request
+
+PORT_DOWN_PENALTY = 1.0  # Cổng WiFi bị down → AP lỗi ngay lập tức
+ECHO_MISS_PENALTY = 0.35  # Mỗi echo reply bị mất liên tiếp
+ECHO_MISS_MAX_PENALTY = 0.7
+ECHO_SLOW_PENALTY = 0.15  # RTT echo vượt ngưỡng
+STALL_PENALTY = 0.3  # Bộ đếm rx/tx đứng yên dù AP có client
+
+
+# Dữ liệu của echo request: magic + thời điểm gửi, để tính RTT khi nhận reply
+def echo_payload(now):
+    return _ECHO.pack(_ECHO_MAGIC, now)
+
+
+# Thời điểm gửi đọc từ dữ liệu echo reply; None nếu không phải echo của bộ giám sát
+def echo_sent_time(data):
+    if not data or len(data) != _ECHO.size:
+        return None
+    magic, sent = _ECHO.unpack(data)
+    return sent if magic == _ECHO_MAGIC else None
+
+
+# Các tín hiệu sức khỏe của một AP
+class APHealth(object):
+    __slots__ = ('down_ports', 'echo_outstanding', 'echo_rtt', 'echo_missed', 'stalled')
+
+    def __init__(self):
+        self.down_ports = set()  # Cổng WiFi đang down (theo EventOFPPortStatus)
+        self.echo_outstanding = None  # Thời điểm gửi echo request chưa có reply
+        self.echo_rtt = None  # RTT echo gần nhất (giây)
+        self.echo_missed = 0  # Số echo reply bị mất liên tiếp
+        self.stalled = False  # Bộ đếm rx/tx không đổi ở lần thống kê gần nhất
+
+
+# Đánh giá sức khỏe AP từ ba tín hiệu: cổng WiFi down (sự kiện PortStatus),
+# RTT/mất echo OpenFlow và bộ đếm lưu lượng đứng yên. Điểm nằm trong [0, 1];
+# AP có điểm dưới `threshold` bị coi là lỗi. Riêng bộ đếm đứng yên không đủ
+# để đánh dấu lỗi, nên AP chỉ đơn giản là rảnh sẽ không bị loại.
+class HealthMonitor(object):
+    def __init__(self, echo_timeout=1.0, slow_rtt=0.2, threshold=0.5):
+        self.echo_timeout = echo_timeout
+        self.slow_rtt = slow_rtt
+        self.threshold = threshold
+        self._aps = {}  # dpid → APHealth
+        self.echo_sent_count = 0
+        self.echo_reply_count = 0
+        self.echo_timeout_count = 0
+
+    def __contains__(self, dpid):
+        return dpid in self._aps
+
+    def add(self, dpid):
+        self._aps[dpid] = APHealth()
+
+    def remove(self, dpid):
+        self._aps.pop(dpid, None)
+
+    def get(self, dpid):
+        return self._aps.get(dpid)
+
+    # Cập nhật trạng thái cổng; trả về True nếu trạng thái thay đổi
+    def port_status(self, dpid, port_no, down):
+        health = self._aps.get(dpid)
+        if health is None:
+            return False
+        if down == (port_no in health.down_ports):
+            return False
+        if down:
+            health.down_ports.add(port_no)
+        else:
+            health.down_ports.discard(port_no)
+        return True
+
+    # Có nên gửi echo mới không (mỗi AP chỉ có một echo chưa có reply)
+    def echo_due(self, dpid):
+        health = self._aps.get(dpid)
+        return health is not None and health.echo_outstanding is None
+
+    def echo_sent(self, dpid, now):
+        health = self._aps.get(dpid)
+        if health is not None:
+            health.echo_outstanding = now
+            self.echo_sent_count += 1
+
+    # Nhận echo reply; trả về RTT (None nếu reply không khớp echo đang chờ)
+    def echo_reply(self, dpid, sent, now):
+        health = self._aps.get(dpid)
+        if health is None or health.echo_outstanding != sent:
+            return None
+        health.echo_outstanding = None
+        health.echo_missed = 0
+        health.echo_rtt = now - sent
+        self.echo_reply_count += 1
+        return health.echo_rtt
+
+    # Các AP có echo quá timeout mà chưa có reply
+    def echo_timeouts(self, now):
+        expired = []
+        for dpid, health in self._aps.items():
+            if health.echo_outstanding is not None and now - health.echo_outstanding > self.echo_timeout:
+                health.echo_outstanding = None
+                health.echo_missed += 1
+                self.echo_timeout_count += 1
+                expired.append(dpid)
+        return expired
+
+    def counter_stall(self, dpid, stalled):
+        health = self._aps.get(dpid)
+        if health is not None:
+            health.stalled = stalled
+
+    def score(self, dpid):
+        health = self._aps.get(dpid)
+        if health is None:
+            return 0.0
+        penalty = PORT_DOWN_PENALTY if health.down_ports else 0.0
+        penalty += min(health.echo_missed * ECHO_MISS_PENALTY, ECHO_MISS_MAX_PENALTY)
+        if health.echo_rtt is not None and health.echo_rtt > self.slow_rtt:
+            penalty += ECHO_SLOW_PENALTY
+        if health.stalled:
+            penalty += STALL_PENALTY
+        return max(1.0 - penalty, 0.0)
+
+    def is_faulty(self, dpid):
+        return self.score(dpid) < self.threshold
+
+    # Thông tin sức khỏe của một AP để trả về qua REST
+    def status(self, dpid):
+        health = self._aps.get(dpid)
+        if health is None:
+            return None
+        return {
+            "score": round(self.score(dpid), 3),
+            "down_ports": sorted(health.down_ports),
+            "echo_rtt_ms": round(health.echo_rtt * 1000, 3) if health.echo_rtt is not None else None,
+            "echo_missed": health.echo_missed,
+            "stalled": health.stalled,
+        }
+
+    def summary(self):
+        return {
+            "echo_requests": self.echo_sent_count,
+            "echo_replies": self.echo_reply_count,
+            "echo_timeouts": self.echo_timeout_count,
+        }
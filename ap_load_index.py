@@ -0,0 +1,60 @@
+import heapq
+
+
+# Chỉ mục tải của các AP: heap (load, dpid) với cơ chế xóa lười (lazy deletion).
+# Mỗi lần tải của AP thay đổi chỉ cần push một phần tử mới, các phần tử cũ
+# bị bỏ qua khi lấy ra → cập nhật và truy vấn đều O(log N).
+class APLoadIndex(object):
+    def __init__(self, capacity):
+        self.capacity = capacity  # AP có tải từ mức này trở lên bị coi là đầy
+        self._heap = []  # Các phần tử (load, dpid), có thể chứa phần tử cũ
+        self._load = {}  # dpid → tải hiện tại (chỉ AP đủ điều kiện)
+
+    def __len__(self):
+        return len(self._load)
+
+    def __contains__(self, dpid):
+        return dpid in self._load
+
+    # Cập nhật tải của một AP; AP đầy sẽ bị loại khỏi chỉ mục
+    def update(self, dpid, load):
+        if load >= self.capacity:
+            self._load.pop(dpid, None)
+            return
+        if self._load.get(dpid) == load:
+            return
+        self._load[dpid] = load
+        heapq.heappush(self._heap, (load, dpid))
+        # Dọn heap khi số phần tử cũ vượt quá số AP thực tế
+        if len(self._heap) > 2 * len(self._load) + 64:
+            self._rebuild()
+
+    # Loại AP khỏi chỉ mục (AP lỗi hoặc đã ngắt kết nối)
+    def remove(self, dpid):
+        self._load.pop(dpid, None)
+
+    def load_of(self, dpid):
+        return self._load.get(dpid)
+
+    # Trả về AP có tải thấp nhất (khác exclude_dpid), None nếu không còn AP trống
+    def least_loaded(self, exclude_dpid=None):
+        heap = self._heap
+        skipped = None
+        best = None
+        while heap:
+            load, dpid = heap[0]
+            if self._load.get(dpid) != load:
+                heapq.heappop(heap)  # Phần tử cũ
+                continue
+            if dpid == exclude_dpid:
+                skipped = heapq.heappop(heap)
+                continue
+            best = dpid
+            break
+        if skipped is not None:
+            heapq.heappush(heap, skipped)
+        return best
+
+    def _rebuild(self):
+        self._heap = [(load, dpid) for dpid, load in self._load.items()]
+        heapq.heapify(self._heap)
@@ -0,0 +1,150 @@
+import json
+from bisect import bisect_left, bisect_right, insort
+from collections import namedtuple
+
+# Một view của snapshot (load_status, host_status, ...), không đổi sau khi công bố.
+#   kind: 'dict' (JSON object theo khóa) hoặc 'list' (JSON array theo thứ tự khóa)
+#   keys/tags/items: khóa, nhãn dùng để lọc (ví dụ AP của client) và phần tử đã serialize
+#   body: toàn bộ view đã serialize; etag: đổi khi nội dung view đổi
+#   change_versions/changes: phiên bản thay đổi và chỉ số phần tử, sắp theo phiên bản
+#   removed_versions/removed: phiên bản xóa và khóa đã xóa, sắp theo phiên bản
+#   horizon: `since` nhỏ hơn mốc này không còn đủ lịch sử để trả về phần thay đổi
+SnapshotView = namedtuple('SnapshotView', 'name kind version etag keys tags items body '
+                                          'change_versions changes removed_versions removed horizon')
+Snapshot = namedtuple('Snapshot', 'version published views')
+
+
+def _join(kind, keys, items):
+    if kind == 'dict':
+        return '{' + ', '.join(f'{json.dumps(key)}: {item}' for key, item in zip(keys, items)) + '}'
+    return '[' + ', '.join(items) + ']'
+
+
+# Phần của view cần trả về cho client đã có phiên bản `since`: phần tử đổi và khóa đã xóa.
+# since quá cũ (ngoài lịch sử) hoặc lớn hơn phiên bản hiện tại (controller khởi động lại)
+# → trả về toàn bộ với "full": true để client thay thế hết.
+def view_delta(view, since):
+    if since < view.horizon or since > view.version:
+        changed, removed, full = view.body, [], True
+    else:
+        start = bisect_right(view.change_versions, since)
+        indexes = sorted(view.changes[start:])
+        changed = _join(view.kind, [view.keys[i] for i in indexes], [view.items[i] for i in indexes])
+        removed = list(view.removed[bisect_right(view.removed_versions, since):])
+        full = False
+    return (f'{{"version": {view.version}, "since": {since}, "full": {json.dumps(full)}, '
+            f'"changed": {changed}, "removed": {json.dumps(removed)}}}')
+
+
+# Chỉ số các phần tử của view có nhãn thỏa `keep`, dùng cho lọc/phân trang
+def view_select(view, keep):
+    return [i for i, (key, tag) in enumerate(zip(view.keys, view.tags)) if keep(key, tag)]
+
+
+def view_body(view, indexes):
+    return _join(view.kind, [view.keys[i] for i in indexes], [view.items[i] for i in indexes])
+
+
+# Kho snapshot cho REST API: luồng giám sát công bố trạng thái mỗi chu kỳ, mỗi
+# phần tử được serialize một lần và chỉ nhận phiên bản mới khi nội dung đổi.
+# Request REST chỉ đọc snapshot hiện tại (bất biến) nên không chạm vào các dict
+# đang được xử lý packet-in cập nhật. Giữ khóa đã xóa của `history` phiên bản gần nhất
+# để trả về phần thay đổi theo `since`.
+class SnapshotStore(object):
+    def __init__(self, epoch, history=120):
+        self.epoch = epoch  # Phân biệt ETag giữa các lần khởi động controller
+        self.history = history
+        self.version = 0
+        self._items = {}  # view → {khóa: phần tử đã serialize}
+        self._tags = {}  # view → {khóa: nhãn}
+        self._keys = {}  # view → [khóa theo thứ tự của view]
+        self._versions = {}  # view → {khóa: phiên bản thay đổi gần nhất}
+        self._removed = {}  # view → {khóa: phiên bản bị xóa}
+        self._view_version = {}  # view → phiên bản thay đổi gần nhất của view
+        self.current = Snapshot(0, None, {})
+
+    # views: {tên: (kind, [(khóa, nhãn, đối tượng JSON), ...])} là toàn bộ view, hoặc
+    # {tên: (kind, [(khóa, nhãn, đối tượng JSON), ...], [khóa đã xóa])} chỉ gồm phần tử đổi
+    # từ lần công bố trước (view giữ khóa theo thứ tự sắp xếp; lần đầu phải công bố toàn bộ).
+    # Trả về snapshot mới, hoặc snapshot cũ nếu không có gì thay đổi
+    def publish(self, views, now):
+        version = self.version + 1
+        staged = {}
+        for name, view in views.items():
+            kind, entries = view[0], view[1]
+            old_items = self._items.get(name, {})
+            old_versions = self._versions.get(name, {})
+            removed = self._removed.setdefault(name, {})
+            changed = False
+            if len(view) == 3 and name in self._items:
+                # Chỉ serialize các phần tử được gửi, phần còn lại giữ nguyên
+                items, versions = dict(old_items), dict(old_versions)
+                tags, keys = dict(self._tags[name]), list(self._keys[name])
+                for key in view[2]:
+                    if items.pop(key, None) is not None:
+                        del versions[key], tags[key]
+                        del keys[bisect_left(keys, key)]
+                        removed[key] = version
+                        changed = True
+                for key, tag, obj in entries:
+                    text = json.dumps(obj)
+                    if key not in items:
+                        insort(keys, key)
+                    elif items[key] == text:
+                        continue
+                    items[key] = text
+                    tags[key] = tag
+                    versions[key] = version
+                    removed.pop(key, None)
+                    changed = True
+            else:
+                items, versions, tags, keys = {}, {}, {}, []
+                for key, tag, obj in entries:
+                    text = json.dumps(obj)
+                    items[key] = text
+                    tags[key] = tag
+                    keys.append(key)
+                    if old_items.get(key) == text:
+                        versions[key] = old_versions[key]
+                    else:
+                        versions[key] = version
+                        removed.pop(key, None)
+                        changed = True
+                for key in old_items:
+                    if key not in items:
+                        removed[key] = version
+                        changed = True
+            staged[name] = (kind, keys, tags, items, versions, changed or name not in self._view_version)
+        if not any(entry[5] for entry in staged.values()):
+            self.current = self.current._replace(published=now)
+            return self.current
+
+        self.version = version
+        horizon = max(version - self.history, 0)
+        snapshot_views = {}
+        for name, (kind, keys, tags, items, versions, changed) in staged.items():
+            removed = self._removed[name]
+            for key in [key for key, at in removed.items() if at <= horizon]:
+                del removed[key]
+            self._items[name] = items
+            self._tags[name] = tags
+            self._keys[name] = keys
+            self._versions[name] = versions
+            previous = self.current.views.get(name)
+            if not changed and previous is not None:
+                # Khóa vừa bị bỏ khỏi lịch sử đều ≤ horizon nên không bao giờ được trả về
+                snapshot_views[name] = previous._replace(horizon=horizon)
+                continue
+            self._view_version[name] = version
+            view_version = self._view_version[name]
+            keys = tuple(keys)
+            view_items = tuple(items[key] for key in keys)
+            order = sorted(range(len(keys)), key=lambda i: versions[keys[i]])
+            gone = sorted(removed.items(), key=lambda entry: entry[1])
+            snapshot_views[name] = SnapshotView(
+                name, kind, view_version, f"{self.epoch}-{name}-{view_version}", keys,
+                tuple(tags[key] for key in keys), view_items, _join(kind, keys, view_items),
+                tuple(versions[keys[i]] for i in order), tuple(order),
+                tuple(at for _, at in gone), tuple(key for key, _ in gone), horizon)
+        self.current = Snapshot(version, now, snapshot_views)
+        return self.current
@@ -0,0 +1,84 @@
+# Benchmark: bộ nhớ cho N client với cấu trúc dict-of-dicts cũ và ClientTable
+# Chạy: python3 benchmarks/bench_client_table.py --clients 100000 --aps 1000
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from client_table import ClientTable, mac_to_int, ip_to_int  # noqa: E402
+
+
+def make_clients(num_clients, num_aps, seed):
+    rnd = random.Random(seed)
+    clients = []
+    for i in range(num_clients):
+        mac = ':'.join('%02x' % b for b in (i + 0x020000000000).to_bytes(6, 'big'))
+        ip = f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}"
+        clients.append((mac, ip, rnd.randint(1, num_aps), rnd.randint(-90, -30)))
+    return clients
+
+
+# Cấu trúc cũ: mac_to_port, last_seen, mac_to_ip, mac_rssi, client_count.
+# Mỗi dict nhận một bản sao chuỗi MAC riêng như khi đến từ gói tin/JSON khác nhau.
+def build_dicts(clients):
+    mac_to_port = defaultdict(dict)
+    last_seen = defaultdict(dict)
+    mac_to_ip = {}
+    mac_rssi = {}
+    client_count = defaultdict(int)
+    now = time.time()
+    for mac, ip, dpid, rssi in clients:
+        mac_to_port[dpid][mac] = 1
+        last_seen[dpid][mac] = now + 0.0
+        mac_to_ip[(mac + ' ')[:-1]] = (ip + ' ')[:-1]
+        mac_rssi[(mac + ' ')[:-1]] = rssi
+        client_count[dpid] = len(mac_to_port[dpid])
+    return mac_to_port, last_seen, mac_to_ip, mac_rssi, client_count
+
+
+def build_table(clients):
+    table = ClientTable()
+    now = time.time()
+    for mac, ip, dpid, rssi in clients:
+        key = mac_to_int(mac)
+        table.attach(key, dpid, 1)
+        client = table.get(key)
+        client.last_seen = now + 0.0
+        client.ip = ip_to_int(ip)
+        client.rssi = rssi
+    return table
+
+
+def measure(build, clients):
+    gc.collect()
+    tracemalloc.start()
+    state = build(clients)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del state
+    return current
+
+
+def run(num_clients, num_aps, seed):
+    clients = make_clients(num_clients, num_aps, seed)
+    old = measure(build_dicts, clients)
+    new = measure(build_table, clients)
+    print(f"clients={num_clients} aps={num_aps}")
+    print(f"  dict-of-dicts : {old / 2**20:8.1f} MiB ({old / num_clients:6.0f} B/client)")
+    print(f"  ClientTable   : {new / 2**20:8.1f} MiB ({new / num_clients:6.0f} B/client)")
+    print(f"  ratio         : {new / old:8.2f}")
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--clients', type=int, default=100000)
+    ap.add_argument('--aps', type=int, default=1000)
+    ap.add_argument('--seed', type=int, default=1)
+    args = ap.parse_args()
+    run(args.clients, args.aps, args.seed)
@@ -0,0 +1,279 @@
+# Benchmark toàn bộ controller không cần Mininet/root: dựng SDNWiFiLoadBalancer với
+# datapath giả rồi đưa vào các sự kiện tổng hợp theo quy mô tùy chọn:
+#   - kết nối AP (EventOFPSwitchFeatures)
+#   - client mới xuất hiện (packet-in ARP) và lưu lượng của client đã biết (packet-in IPv4)
+#   - thống kê cổng (EventOFPPortStatsReply) và cập nhật RSSI theo lô (ingest_rssi)
+#   - các vòng giám sát (_poll_stats + công việc định kỳ), tính thời gian từng công việc
+# Báo cáo thông lượng packet-in, phân vị độ trễ từng handler, bộ nhớ (RSS) mỗi client
+# và chi phí mỗi vòng _monitor. Cần cài ryu và NumPy.
+# Chạy: python3 benchmarks/bench_controller.py --aps 100 --macs 10000
+#       python3 benchmarks/bench_controller.py --aps 1000 --macs 100000 --ticks 3
+#       (ma trận RSSI dày client × AP: 1000 AP × 100k MAC cần khoảng 1.2 GB)
+import argparse
+import logging
+import os
+import struct
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ryu.controller import ofp_event  # noqa: E402
+from ryu.ofproto import ofproto_v1_3, ofproto_v1_3_parser  # noqa: E402
+
+import ryu_controler  # noqa: E402
+from fast_parse import ETH_TYPE_ARP, ETH_TYPE_IP  # noqa: E402
+
+MAC_BASE = 0x020000000000
+IP_BASE = 0x0a000000  # 10.0.0.0
+_ETH = struct.Struct('!6s6sH')
+_ARP = struct.Struct('!HHBBH6sI6sI')
+_IPV4 = struct.Struct('!BBHHHBBHII')
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+
+class StubWSGI(object):
+    def register(self, *args, **kwargs):
+        pass
+
+
+# Datapath giả: đếm message gửi đi, giữ echo/barrier request để trả lời như switch thật
+# và một bảng flow tối giản (eth_src, eth_dst) để biết gói nào không còn lên controller
+# (không mô phỏng idle timeout). serialize=True mã hóa message như ryu trước khi gửi
+class StubDatapath(object):
+    def __init__(self, dpid, serialize=False):
+        self.id = dpid
+        self.ofproto = ofproto_v1_3
+        self.ofproto_parser = ofproto_v1_3_parser
+        self.xid = 0
+        self.serialize = serialize
+        self.sent = 0
+        self.echoes = []  # Payload của các echo request chưa trả lời
+        self.barriers = []  # xid của các barrier request chưa trả lời
+        self.stats_requested = False  # Controller đang chờ port stats reply
+        self.flows = defaultdict(set)  # eth_src → {eth_dst hoặc None (mọi đích)}
+
+    def set_xid(self, msg):
+        self.xid += 1
+        msg.set_xid(self.xid)
+        return self.xid
+
+    def send_msg(self, msg):
+        if self.serialize:
+            if msg.xid is None:
+                self.set_xid(msg)
+            msg.serialize()
+        if isinstance(msg, ofproto_v1_3_parser.OFPEchoRequest):
+            self.echoes.append(msg.data)
+        elif isinstance(msg, ofproto_v1_3_parser.OFPBarrierRequest):
+            self.barriers.append(msg.xid)
+        elif isinstance(msg, ofproto_v1_3_parser.OFPPortStatsRequest):
+            self.stats_requested = True
+        elif isinstance(msg, ofproto_v1_3_parser.OFPFlowMod):
+            self._flow_mod(msg)
+        self.sent += 1
+        return True
+
+    def _flow_mod(self, mod):
+        src, dst = mod.match.get('eth_src'), mod.match.get('eth_dst')
+        if mod.command == ofproto_v1_3.OFPFC_ADD:
+            if src is not None:
+                self.flows[src].add(dst)
+        elif mod.command in (ofproto_v1_3.OFPFC_DELETE, ofproto_v1_3.OFPFC_DELETE_STRICT):
+            if src is not None:
+                self.flows.pop(src, None)
+            elif dst is not None:
+                for dsts in self.flows.values():
+                    dsts.discard(dst)
+
+    # Gói src → dst được switch chuyển tiếp luôn (đã có flow) thay vì gửi packet-in
+    def forwards(self, src, dst):
+        dsts = self.flows.get(src)
+        return dsts is not None and (dst in dsts or None in dsts)
+
+
+def mac_bytes(mac):
+    return mac.to_bytes(6, 'big')
+
+
+# Gói ARP request client gửi khi vào mạng (hỏi gateway)
+def arp_frame(mac, ip):
+    return (_ETH.pack(b'\xff' * 6, mac_bytes(mac), ETH_TYPE_ARP)
+            + _ARP.pack(1, ETH_TYPE_IP, 6, 4, 1, mac_bytes(mac), ip, b'\x00' * 6, IP_BASE + 1))
+
+
+def ipv4_frame(src, dst, src_ip, dst_ip):
+    return (_ETH.pack(mac_bytes(dst), mac_bytes(src), ETH_TYPE_IP)
+            + _IPV4.pack(0x45, 0, 84, 0, 0, 64, 17, 0, src_ip, dst_ip) + b'\x00' * 64)
+
+
+def packet_in(datapath, data, in_port=1):
+    msg = ofproto_v1_3_parser.OFPPacketIn(datapath, buffer_id=ofproto_v1_3.OFP_NO_BUFFER,
+                                          match=ofproto_v1_3_parser.OFPMatch(in_port=in_port), data=data)
+    return ofp_event.EventOFPPacketIn(msg)
+
+
+def port_stats_reply(datapath, step, num_ports):
+    stats = [ofproto_v1_3_parser.OFPPortStats(
+        port_no=port, rx_packets=step * 100, tx_packets=step * 100, rx_bytes=step * 150000 * port,
+        tx_bytes=step * 120000 * port, rx_dropped=0, tx_dropped=0, rx_errors=0, tx_errors=0,
+        rx_frame_err=0, rx_over_err=0, rx_crc_err=0, collisions=0, duration_sec=step * 5, duration_nsec=0)
+        for port in range(1, num_ports + 1)]
+    msg = ofproto_v1_3_parser.OFPPortStatsReply(datapath, body=stats)
+    msg.flags = 0
+    return ofp_event.EventOFPPortStatsReply(msg)
+
+
+# Echo reply cho mọi echo request đang chờ, để AP không bị coi là lỗi vì vòng giám sát chậm
+def echo_replies(datapaths):
+    events = []
+    for dp in datapaths:
+        for data in dp.echoes:
+            msg = ofproto_v1_3_parser.OFPEchoReply(dp, data=data)
+            events.append(ofp_event.EventOFPEchoReply(msg))
+        dp.echoes = []
+    return events
+
+
+def barrier_replies(datapaths):
+    events = []
+    for dp in datapaths:
+        for xid in dp.barriers:
+            msg = ofproto_v1_3_parser.OFPBarrierReply(dp)
+            msg.xid = xid
+            events.append(ofp_event.EventOFPBarrierReply(msg))
+        dp.barriers = []
+    return events
+
+
+def rss_bytes():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * PAGE_SIZE
+
+
+# Gọi handler cho từng sự kiện, trả về mảng thời gian xử lý (giây)
+def run_events(handler, events):
+    clock = time.perf_counter
+    durations = np.empty(len(events))
+    for i, ev in enumerate(events):
+        start = clock()
+        handler(ev)
+        durations[i] = clock() - start
+    return durations
+
+
+def report(name, durations, unit='events'):
+    total = durations.sum()
+    p50, p90, p99 = np.percentile(durations, [50, 90, 99]) * 1e6
+    print(f"  {name:<22} {len(durations):8d} {unit:<7} {len(durations) / total:10.0f}/s  "
+          f"p50 {p50:8.1f} µs  p90 {p90:8.1f} µs  p99 {p99:8.1f} µs  max {durations.max() * 1e6:9.1f} µs")
+
+
+def run(num_aps, num_macs, packets_per_mac, num_ports, rssi_batch, rssi_neighbours, ticks, serialize):
+    # Không ghi file (nhật ký roaming, snapshot trạng thái), AP đủ chỗ cho mọi client
+    ryu_controler.ROAMING_LOG_PATH = None
+    ryu_controler.STATE_PATH = None
+    ryu_controler.MAX_CLIENTS_PER_AP = 2 * -(-num_macs // num_aps)
+    ryu_controler.AP_CAPACITY_BPS = 1e12
+    app = ryu_controler.SDNWiFiLoadBalancer(wsgi=StubWSGI())
+    app.logger.setLevel(logging.ERROR)
+    datapaths = [StubDatapath(dpid, serialize) for dpid in range(1, num_aps + 1)]
+    print(f"aps={num_aps} macs={num_macs} packets/mac={packets_per_mac} ports={num_ports} "
+          f"rssi_batch={rssi_batch} serialize={serialize}")
+
+    print("handlers:")
+    events = []
+    for dp in datapaths:
+        msg = ofproto_v1_3_parser.OFPSwitchFeatures(dp)
+        msg.datapath = dp
+        events.append(ofp_event.EventOFPSwitchFeatures(msg))
+    report('switch_features', run_events(app.switch_features_handler, events))
+
+    # Client i ở AP i % num_aps; lưu lượng đi tới client kế tiếp trên cùng AP
+    macs = [MAC_BASE + i for i in range(num_macs)]
+    join = [packet_in(datapaths[i % num_aps], arp_frame(mac, IP_BASE + 256 + i)) for i, mac in enumerate(macs)]
+    traffic = []
+    for round_ in range(packets_per_mac):
+        for i, mac in enumerate(macs):
+            peer = (i + num_aps * (round_ + 1)) % num_macs
+            traffic.append(packet_in(datapaths[i % num_aps],
+                                     ipv4_frame(mac, macs[peer], IP_BASE + 256 + i, IP_BASE + 256 + peer)))
+    rss_before = rss_bytes()
+    report('packet_in (new MAC)', run_events(app.packet_in_handler, join))
+    rss_after = rss_bytes()
+    report('packet_in (known MAC)', run_events(app.packet_in_handler, traffic))
+
+    step = 1
+    for dp in datapaths:
+        app.stats_poller.sent(dp.id, time.time())
+    replies = [port_stats_reply(dp, step, num_ports) for dp in datapaths]
+    report('port_stats_reply', run_events(app.port_stats_reply_handler, replies))
+
+    # Mỗi client báo RSSI của AP hiện tại và `rssi_neighbours` AP lân cận
+    now = time.time()
+    samples = []
+    for i, mac in enumerate(macs):
+        ap = i % num_aps + 1
+        samples.append((mac, ap, -45 - i % 10, now))
+        for k in range(1, rssi_neighbours + 1):
+            samples.append((mac, (ap + k - 1) % num_aps + 1, -55 - 5 * k - i % 10, now))
+    batches = [samples[i:i + rssi_batch] for i in range(0, len(samples), rssi_batch)]
+    durations = run_events(lambda batch: app.ingest_rssi(batch, time.time()), batches)
+    report('ingest_rssi (batch)', durations, 'batches')
+    print(f"  {'RSSI samples':<22} {len(samples):8d} samples {len(samples) / durations.sum():10.0f}/s")
+
+    # Vòng giám sát: đẩy thời gian lên đủ để mọi công việc và mọi AP đều đến hạn
+    job_times = defaultdict(list)
+    app.jobs.observer = lambda name, duration: job_times[name].append(duration)
+    interval = max(ryu_controler.STATS_POLL_INTERVAL, ryu_controler.ROAM_INTERVAL,
+                   ryu_controler.STATS_REPLY_TIMEOUT) + 1
+    tick_times, poll_times, echo_times = [], [], []
+    for tick in range(1, ticks + 1):
+        now = time.time() + tick * interval
+        start = time.perf_counter()
+        app._poll_stats(now)
+        polled = time.perf_counter()
+        app.jobs.run_pending(now)
+        poll_times.append(polled - start)
+        tick_times.append(time.perf_counter() - start)
+        echo_times.extend(run_events(app.echo_reply_handler, echo_replies(datapaths)))
+        step += 1
+        for dp in datapaths:
+            app.port_stats_reply_handler(port_stats_reply(dp, step, num_ports))
+    print(f"monitor tick (all jobs due, {ticks} ticks):")
+    print(f"  {'total':<22} mean {np.mean(tick_times) * 1000:9.2f} ms  max {np.max(tick_times) * 1000:9.2f} ms")
+    print(f"  {'poll_stats':<22} mean {np.mean(poll_times) * 1000:9.2f} ms")
+    for name, times in sorted(job_times.items(), key=lambda item: -np.mean(item[1])):
+        print(f"  {name:<22} mean {np.mean(times) * 1000:9.2f} ms  max {np.max(times) * 1000:9.2f} ms")
+    if echo_times:
+        report('echo_reply', np.array(echo_times))
+
+    clients = len(app.clients)
+    print("state:")
+    print(f"  clients={clients} faulty_aps={len(app.faulty_aps)} flows_cached={len(app.flow_cache)} "
+          f"roams={app.roaming_events.total} "
+          f"messages_sent={sum(dp.sent for dp in datapaths)}")
+    print(f"  memory per client (RSS while joining): {(rss_after - rss_before) / max(num_macs, 1):8.0f} B")
+    print(f"  RSS total: {rss_bytes() / 2 ** 20:8.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--aps', type=int, default=100)
+    parser.add_argument('--macs', type=int, default=10000)
+    parser.add_argument('--packets-per-mac', type=int, default=2, help='packet-in IPv4 của mỗi client đã biết')
+    parser.add_argument('--ports', type=int, default=2, help='số cổng trong mỗi port stats reply')
+    parser.add_argument('--rssi-batch', type=int, default=500)
+    parser.add_argument('--rssi-neighbours', type=int, default=2, help='số AP lân cận mỗi client báo RSSI')
+    parser.add_argument('--ticks', type=int, default=5)
+    parser.add_argument('--serialize', action='store_true', help='mã hóa message OpenFlow như khi gửi thật')
+    args = parser.parse_args()
+    run(args.aps, args.macs, args.packets_per_mac, args.ports, args.rssi_batch, args.rssi_neighbours,
+        args.ticks, args.serialize)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+# Benchmark: thời gian chuyển đổi dự phòng (time-to-failover) khi một AP mất sóng.
+# Dựng mạng resort của topology_mininetwifi.py, tắt cổng WiFi của AP bằng
+# pause_ap_cli rồi đo qua REST của controller:
+#   - detect: từ lúc tắt cổng tới khi AP bị đánh dấu lỗi
+#   - evacuate: từ lúc tắt cổng tới khi AP không còn client nào
+# Cần chạy controller trước (ryu-manager ryu_controler.py), sau đó:
+#   sudo python3 benchmarks/bench_failover.py --trials 5 --down-time 10
+import argparse
+import os
+import statistics
+import sys
+import time
+from threading import Thread
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mininet.log import setLogLevel  # noqa: E402
+from scenario import build_scenario  # noqa: E402
+from topology_mininetwifi import build_network, drive_scenario, pause_ap_cli, stop_event  # noqa: E402
+
+
+def load_status(controller):
+    return requests.get(f"http://{controller}/load_status", timeout=1).json()
+
+
+# Chờ tới khi cond(trạng thái AP) đúng; trả về thời điểm đúng hoặc None nếu quá hạn
+def wait_for(controller, dpid, cond, timeout, poll):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            ap = load_status(controller).get(str(dpid))
+        except requests.RequestException:
+            ap = None
+        if ap is not None and cond(ap):
+            return time.time()
+        time.sleep(poll)
+    return None
+
+
+def run_trial(net, controller, ap_name, dpid, down_time, timeout, poll):
+    # AP phải có client trước khi tắt, nếu không sẽ không có gì để chuyển
+    if wait_for(controller, dpid, lambda ap: ap["clients"] > 0 and not ap["is_faulty"], timeout, poll) is None:
+        return None
+    start = time.time()
+    pause_ap_cli(net, ap_name, down_time)
+    detected = wait_for(controller, dpid, lambda ap: ap["is_faulty"], timeout, poll)
+    evacuated = wait_for(controller, dpid, lambda ap: ap["clients"] == 0, timeout, poll)
+    # Chờ AP bật lại và hồi phục trước lần thử kế tiếp
+    time.sleep(max(start + down_time - time.time(), 0))
+    wait_for(controller, dpid, lambda ap: not ap["is_faulty"], timeout, poll)
+    return (detected - start if detected else None,
+            evacuated - start if evacuated else None)
+
+
+def report(name, values):
+    values = [v for v in values if v is not None]
+    if not values:
+        print(f"{name:>9}: no result")
+        return
+    print(f"{name:>9}: avg {statistics.mean(values) * 1000:8.1f} ms  "
+          f"p50 {statistics.median(values) * 1000:8.1f} ms  max {max(values) * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--controller', default='127.0.0.1:8080')
+    parser.add_argument('--ap', default='ap_pool')
+    parser.add_argument('--dpid', type=int, default=2)
+    parser.add_argument('--trials', type=int, default=5)
+    parser.add_argument('--down-time', type=float, default=10)
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--poll', type=float, default=0.05)
+    args = parser.parse_args()
+
+    setLogLevel('warning')
+    # Sơ đồ resort gốc, khoảng 28 luồng ping mỗi giây (tương đương ping mọi cặp station)
+    scenario = build_scenario(traffic_rate=28)
+    net, stations = build_network(scenario)
+    Thread(target=drive_scenario, args=(net, stations, scenario, args.controller),
+           kwargs={'interval': 1}, daemon=True).start()
+    results = []
+    try:
+        for trial in range(args.trials):
+            result = run_trial(net, args.controller, args.ap, args.dpid,
+                               args.down_time, args.timeout, args.poll)
+            if result is None:
+                print(f"trial {trial + 1}: AP {args.dpid} has no clients, skipped")
+                continue
+            results.append(result)
+            print(f"trial {trial + 1}: detect {result[0]}, evacuate {result[1]}")
+    finally:
+        stop_event.set()
+        net.stop()
+
+    print(f"failover of {args.ap} over {len(results)} trials (REST poll {args.poll * 1000:.0f} ms)")
+    report("detect", [r[0] for r in results])
+    report("evacuate", [r[1] for r in results])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# Benchmark: chi phí xử lý flow stats theo client khi AP có nhiều flow.
+# Đo thời gian cộng dồn lưu lượng từ một lượt reply (FlowAccounting + ClientTable)
+# và kích thước reply OpenFlow cho mỗi request khi chia flow thành nhiều phần.
+# Cần cài ryu (không cần Mininet/root).
+# Chạy: python3 benchmarks/bench_flow_stats.py --flows 10000 --shards 1 4 16
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ryu.ofproto import ofproto_v1_3_parser  # noqa: E402
+
+from client_table import ClientTable, int_to_mac  # noqa: E402
+from flow_stats import FlowAccounting, client_cookie  # noqa: E402
+
+OFP_FLOW_STATS_SIZE = 56  # Phần cố định của ofp_flow_stats (byte)
+MATCH_SIZE = 48  # in_port + eth_dst + eth_src, đã đệm
+INSTRUCTION_SIZE = 24  # apply-actions với một output
+
+
+def build_stats(num_flows, num_clients, step):
+    stats = []
+    for i in range(num_flows):
+        src = 0x020000000000 + i % num_clients
+        dst = 0x020000000000 + (i // num_clients + i + 1) % num_clients
+        match = ofproto_v1_3_parser.OFPMatch(in_port=1, eth_dst=int_to_mac(dst), eth_src=int_to_mac(src))
+        stats.append(ofproto_v1_3_parser.OFPFlowStats(
+            table_id=0, duration_sec=step, duration_nsec=0, priority=1, idle_timeout=30,
+            hard_timeout=0, flags=0, cookie=client_cookie(src), packet_count=step * 10,
+            byte_count=step * 10000 + i, match=match, instructions=[]))
+    return stats
+
+
+def run(num_flows, num_clients, shards_list, rounds):
+    table = ClientTable()
+    for i in range(num_clients):
+        table.attach(0x020000000000 + i, 1, 1)
+    batches = [build_stats(num_flows, num_clients, step) for step in range(1, rounds + 1)]
+    flow_size = OFP_FLOW_STATS_SIZE + MATCH_SIZE + INSTRUCTION_SIZE
+    print(f"{num_flows} client flows on one AP, {num_clients} clients")
+    for shards in shards_list:
+        accounting = FlowAccounting(shards)
+        # Switch chỉ trả về flow khớp cookie/cookie_mask của từng phần
+        parts = []
+        for stats in batches:
+            for _ in range(shards):
+                cookie, mask = accounting.next_filter(1)
+                parts.append((cookie, [stat for stat in stats if stat.cookie & mask == cookie]))
+        start = time.perf_counter()
+        for xid, (cookie, part) in enumerate(parts):
+            accounting.sent(1, xid, 0.0)
+            for src, dst, byte_delta, packet_delta in accounting.flow_stats(1, part):
+                table.add_traffic(src, tx_bytes=byte_delta, tx_packets=packet_delta)
+                table.add_traffic(dst, rx_bytes=byte_delta, rx_packets=packet_delta)
+            accounting.reply_done(1, xid, 1.0)
+        elapsed = (time.perf_counter() - start) / rounds
+        per_request = num_flows / shards * flow_size
+        print(f"shards={shards:<3} {elapsed * 1000:8.1f} ms per sweep  "
+              f"{num_flows / elapsed:10.0f} flows/s  ~{per_request / 1024:7.1f} KiB per reply")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--flows', type=int, default=10000)
+    parser.add_argument('--clients', type=int, default=2000)
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+    run(args.flows, args.clients, args.shards, args.rounds)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+# Benchmark: so sánh tìm AP ít tải nhất bằng quét tuyến tính và bằng APLoadIndex
+# Chạy: python3 benchmarks/bench_load_index.py --aps 1000 --queries 20000
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ap_load_index import APLoadIndex  # noqa: E402
+
+MAX_CLIENTS_PER_AP = 3
+
+
+# Cách cũ: duyệt toàn bộ active_switches mỗi lần gọi
+def linear_least_loaded(active_switches, faulty_aps, client_count, exclude_dpid=None):
+    best_ap = None
+    min_clients = float('inf')
+    for dpid in active_switches:
+        if dpid == exclude_dpid or dpid in faulty_aps:
+            continue
+        count = client_count.get(dpid, 0)
+        if count < min_clients and count < MAX_CLIENTS_PER_AP:
+            min_clients = count
+            best_ap = dpid
+    return best_ap
+
+
+def run(num_aps, num_queries, seed):
+    rnd = random.Random(seed)
+    active = set(range(1, num_aps + 1))
+    faulty = set(rnd.sample(sorted(active), num_aps // 20))
+    counts = {dpid: rnd.randint(0, MAX_CLIENTS_PER_AP) for dpid in active}
+    # Mỗi truy vấn đi kèm một lần thay đổi tải (mô phỏng roaming liên tục)
+    ops = [(rnd.randint(1, num_aps), rnd.randint(0, MAX_CLIENTS_PER_AP), rnd.randint(1, num_aps))
+           for _ in range(num_queries)]
+
+    linear_counts = dict(counts)
+    start = time.perf_counter()
+    for dpid, load, exclude in ops:
+        linear_counts[dpid] = load
+        linear_least_loaded(active, faulty, linear_counts, exclude)
+    linear_time = time.perf_counter() - start
+
+    index = APLoadIndex(MAX_CLIENTS_PER_AP)
+    for dpid in active - faulty:
+        index.update(dpid, counts[dpid])
+    start = time.perf_counter()
+    for dpid, load, exclude in ops:
+        if dpid not in faulty:
+            index.update(dpid, load)
+        index.least_loaded(exclude)
+    index_time = time.perf_counter() - start
+
+    # Kiểm tra hai cách cho cùng mức tải nhỏ nhất
+    for _ in range(100):
+        exclude = rnd.randint(1, num_aps)
+        a = linear_least_loaded(active, faulty, linear_counts, exclude)
+        b = index.least_loaded(exclude)
+        assert (a is None) == (b is None)
+        if a is not None:
+            assert linear_counts[a] == linear_counts[b]
+
+    print(f"APs={num_aps} queries={num_queries}")
+    print(f"  linear scan : {linear_time * 1e6 / num_queries:8.2f} us/query")
+    print(f"  load index  : {index_time * 1e6 / num_queries:8.2f} us/query")
+    print(f"  speedup     : {linear_time / index_time:8.1f}x")
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--aps', type=int, default=1000)
+    ap.add_argument('--queries', type=int, default=20000)
+    ap.add_argument('--seed', type=int, default=1)
+    args = ap.parse_args()
+    run(args.aps, args.queries, args.seed)
@@ -0,0 +1,129 @@
+# Microbenchmark: số packet-in/giây khi phân tích gói bằng ryu Packet (cách cũ)
+# và bằng fast_parse (đọc header theo offset), cùng thông lượng của cả handler.
+# Cần cài ryu (không cần Mininet/root).
+# Chạy: python3 benchmarks/bench_packet_in.py --packets 50000
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ryu.controller import ofp_event  # noqa: E402
+from ryu.lib.packet import packet, ethernet, arp, ipv4  # noqa: E402
+from ryu.ofproto import ofproto_v1_3, ofproto_v1_3_parser  # noqa: E402
+
+import ryu_controler  # noqa: E402
+from fast_parse import parse_eth_header, arp_sender, ipv4_src, ETH_TYPE_ARP, ETH_TYPE_IP  # noqa: E402
+
+
+class StubWSGI(object):
+    def register(self, *args, **kwargs):
+        pass
+
+
+class StubDatapath(object):
+    def __init__(self, dpid):
+        self.id = dpid
+        self.ofproto = ofproto_v1_3
+        self.ofproto_parser = ofproto_v1_3_parser
+        self.xid = 0
+
+    def set_xid(self, msg):
+        self.xid += 1
+        msg.set_xid(self.xid)
+        return self.xid
+
+    def send_msg(self, msg):
+        return True
+
+
+def build_frames(num_hosts):
+    frames = []
+    for i in range(num_hosts):
+        src = (0x020000000000 + i).to_bytes(6, 'big').hex(':')
+        dst = (0x020000000000 + (i + 1) % num_hosts).to_bytes(6, 'big').hex(':')
+        pkt = packet.Packet()
+        if i % 4 == 0:
+            pkt.add_protocol(ethernet.ethernet(dst='ff:ff:ff:ff:ff:ff', src=src, ethertype=0x0806))
+            pkt.add_protocol(arp.arp(src_mac=src, src_ip=f'10.0.{i >> 8 & 255}.{i & 255}',
+                                     dst_ip='10.0.0.254'))
+        else:
+            pkt.add_protocol(ethernet.ethernet(dst=dst, src=src, ethertype=0x0800))
+            pkt.add_protocol(ipv4.ipv4(src=f'10.0.{i >> 8 & 255}.{i & 255}', dst='10.0.0.254', proto=17))
+            pkt.add_protocol(b'\x00' * 64)
+        pkt.serialize()
+        frames.append(bytes(pkt.data))
+    return frames
+
+
+# Cách cũ: dựng Packet đầy đủ và gọi get_protocol ba lần
+def legacy_parse(data):
+    pkt = packet.Packet(data)
+    eth = pkt.get_protocol(ethernet.ethernet)
+    pkt_arp = pkt.get_protocol(arp.arp)
+    pkt_ip = pkt.get_protocol(ipv4.ipv4)
+    if pkt_arp and pkt_arp.src_ip:
+        ip = pkt_arp.src_ip
+    elif pkt_ip:
+        ip = pkt_ip.src
+    else:
+        ip = None
+    return eth.dst, eth.src, eth.ethertype, ip
+
+
+def fast_parse(data):
+    dst, src, ethertype, l3 = parse_eth_header(data)
+    if ethertype == ETH_TYPE_ARP:
+        ip = arp_sender(data, l3)
+    elif ethertype == ETH_TYPE_IP:
+        ip = ipv4_src(data, l3)
+    else:
+        ip = None
+    return dst, src, ethertype, ip
+
+
+def rate(func, frames, count):
+    start = time.perf_counter()
+    n = len(frames)
+    for i in range(count):
+        func(frames[i % n])
+    return count / (time.perf_counter() - start)
+
+
+def handler_rate(frames, count, num_aps):
+    app = ryu_controler.SDNWiFiLoadBalancer(wsgi=StubWSGI())
+    datapaths = [StubDatapath(dpid) for dpid in range(1, num_aps + 1)]
+    for dp in datapaths:
+        msg = ofproto_v1_3_parser.OFPSwitchFeatures(dp)
+        msg.datapath = dp
+        app.switch_features_handler(ofp_event.EventOFPSwitchFeatures(msg))
+    ryu_controler.MAX_CLIENTS_PER_AP = len(frames)  # Không giới hạn, đo riêng đường xử lý gói tin
+    app.load_index.capacity = len(frames)
+    events = []
+    for i, data in enumerate(frames):
+        dp = datapaths[i % num_aps]
+        msg = ofproto_v1_3_parser.OFPPacketIn(dp, buffer_id=ofproto_v1_3.OFP_NO_BUFFER,
+                                              match=ofproto_v1_3_parser.OFPMatch(in_port=1), data=data)
+        events.append(ofp_event.EventOFPPacketIn(msg))
+    return rate(app.packet_in_handler, events, count)
+
+
+def run(num_packets, num_hosts, num_aps):
+    frames = build_frames(num_hosts)
+    old = rate(legacy_parse, frames, num_packets)
+    new = rate(fast_parse, frames, num_packets)
+    full = handler_rate(frames, num_packets, num_aps)
+    print(f"packets={num_packets} hosts={num_hosts} aps={num_aps}")
+    print(f"  parse, ryu Packet   : {old:12,.0f} pkt/s")
+    print(f"  parse, fast_parse   : {new:12,.0f} pkt/s ({new / old:.1f}x)")
+    print(f"  packet_in_handler   : {full:12,.0f} pkt/s")
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--packets', type=int, default=50000)
+    ap.add_argument('--hosts', type=int, default=1000)
+    ap.add_argument('--aps', type=int, default=10)
+    args = ap.parse_args()
+    run(args.packets, args.hosts, args.aps)
@@ -0,0 +1,89 @@
+# Benchmark: thời gian một chu kỳ roaming (RSSIMatrix.plan_roams) theo số client và AP,
+# so sánh gán chính xác không giới hạn (Hungarian trên toàn bộ chỗ trống) với cách hiện
+# tại (bỏ AP/chỗ không dùng được, gán tham lam khi vượt ROAM_EXACT_MAX_CELLS ô) và chênh
+# lệch chất lượng (tổng chi phí RSSI + tải) giữa hai cách.
+# Chạy: python3 benchmarks/bench_roam_plan.py --clients 500 1000 2000 --aps 100 --hear 0
+#       (--hear 0: mỗi client nghe được mọi AP, trường hợp xấu nhất; --hear 5: 5 AP gần nhất)
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rssi_matrix  # noqa: E402
+from rssi_matrix import RSSIMatrix  # noqa: E402
+
+THRESHOLD, HYSTERESIS, MIN_DWELL, LOAD_COST = -57, 5, 10, 1.0
+
+
+# Ma trận RSSI với `clients` client rải đều trên `aps` AP; mỗi client có mẫu từ `hear` AP
+# (0 = mọi AP). Trả về (ma trận, AP hiện tại theo slot, chỗ trống, thời điểm)
+def build(clients, aps, hear, max_free, seed):
+    rng = np.random.default_rng(seed)
+    matrix = RSSIMatrix(rows=clients, cols=aps)
+    slot_dpid = rng.integers(1, aps + 1, clients)
+    now = 1000.0
+    for slot in range(clients):
+        heard = np.arange(1, aps + 1) if not hear else np.append(
+            rng.choice(np.arange(1, aps + 1), hear - 1, replace=False), slot_dpid[slot])
+        for dpid in np.unique(heard):
+            matrix.update(slot, int(dpid), float(rng.uniform(-90, -40)), now)
+        matrix.mark_attached(slot, 0.0)
+    free = {dpid: (int(rng.integers(0, max_free + 1)), float(rng.integers(0, 10)))
+            for dpid in range(1, aps + 1)}
+    return matrix, slot_dpid, free, now
+
+
+# Tổng chi phí của kế hoạch: -RSSI đích + tải AP đích cho client chuyển đi
+def plan_cost(moves, free):
+    taken = {}
+    cost = 0.0
+    for _, _, to_ap, _, target in moves:
+        cost += -target + LOAD_COST * (free[to_ap][1] + taken.get(to_ap, 0))
+        taken[to_ap] = taken.get(to_ap, 0) + 1
+    return cost
+
+
+def timed(matrix, slot_dpid, free, now, max_cells, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        moves = matrix.plan_roams(slot_dpid, free, set(), now, THRESHOLD, HYSTERESIS, MIN_DWELL,
+                                  LOAD_COST, max_cells=max_cells)
+        best = min(best, time.perf_counter() - start)
+    return best, moves
+
+
+def run(clients_list, aps, hear, max_free, exact_limit, repeat, seed):
+    print(f"APs={aps} hear={'all' if not hear else hear} free seats/AP=0..{max_free} "
+          f"exact cap={rssi_matrix.ROAM_EXACT_MAX_CELLS} cells")
+    print(f"{'clients':>8} {'moves':>6} {'bounded ms':>11} {'exact ms':>10} {'cost diff':>10}")
+    for clients in clients_list:
+        matrix, slot_dpid, free, now = build(clients, aps, hear, max_free, seed)
+        bounded, moves = timed(matrix, slot_dpid, free, now, rssi_matrix.ROAM_EXACT_MAX_CELLS, repeat)
+        if clients <= exact_limit:
+            exact, exact_moves = timed(matrix, slot_dpid, free, now, float('inf'), 1)
+            # Kế hoạch chính xác có thể chuyển nhiều client hơn; so sánh chi phí trên mỗi lượt chuyển
+            diff = (plan_cost(moves, free) / max(len(moves), 1)
+                    - plan_cost(exact_moves, free) / max(len(exact_moves), 1))
+            exact_col = f"{exact * 1e3:10.1f} {diff:+10.2f}"
+        else:
+            exact_col = f"{'-':>10} {'-':>10}"
+        print(f"{clients:8d} {len(moves):6d} {bounded * 1e3:11.1f} {exact_col}")
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--clients', type=int, nargs='+', default=[500, 1000, 2000, 5000])
+    ap.add_argument('--aps', type=int, default=100)
+    ap.add_argument('--hear', type=int, default=0, help='số AP mỗi client nghe được (0 = mọi AP)')
+    ap.add_argument('--max-free', type=int, default=10, help='số chỗ trống tối đa mỗi AP')
+    ap.add_argument('--exact-limit', type=int, default=1000,
+                    help='chỉ chạy gán chính xác không giới hạn khi số client không vượt quá số này')
+    ap.add_argument('--repeat', type=int, default=3)
+    ap.add_argument('--seed', type=int, default=1)
+    args = ap.parse_args()
+    run(args.clients, args.aps, args.hear, args.max_free, args.exact_limit, args.repeat, args.seed)
@@ -0,0 +1,111 @@
+# Benchmark: số cập nhật RSSI/giây qua /update_rssi (mỗi MAC một POST) so với
+# /update_rssi_batch (lô JSON và lô nhị phân).
+#   - Mặc định gọi thẳng handler REST trong tiến trình (cần ryu, không cần Mininet):
+#       python3 benchmarks/bench_rssi_ingest.py --stations 5000 --batch-size 500
+#   - --controller host:port gửi HTTP thật tới controller đang chạy; cách cũ dùng
+#     requests.post riêng lẻ, cách mới dùng một session dùng chung và gửi theo lô:
+#       python3 benchmarks/bench_rssi_ingest.py --controller 127.0.0.1:8080
+import argparse
+import json
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rssi_batch import RSSI_BATCH_CONTENT_TYPE, pack_rssi_batch  # noqa: E402
+
+
+def build_samples(num_stations):
+    now = time.time()
+    return [((0x020000000000 + i).to_bytes(6, 'big').hex(':'), i % 3 + 1, -40 - i % 50, now)
+            for i in range(num_stations)]
+
+
+def batches(samples, batch_size):
+    return [samples[i:i + batch_size] for i in range(0, len(samples), batch_size)]
+
+
+def timed(name, num_updates, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28} {num_updates / elapsed:12.0f} updates/s  ({elapsed * 1000:8.1f} ms)")
+    return elapsed
+
+
+# Gọi thẳng handler REST với webob Request, đo chi phí phân tích + ghi nhận của controller
+def bench_in_process(samples, batch_size):
+    from webob import Request
+    import ryu_controler
+
+    class StubWSGI(object):
+        def register(self, *args, **kwargs):
+            pass
+
+    app = ryu_controler.SDNWiFiLoadBalancer(wsgi=StubWSGI())
+    app.monitor_thread.kill()
+    data = {ryu_controler.SDN_LB_INSTANCE_NAME: app}
+
+    def call(handler, body, content_type):
+        req = Request.blank('/', method='POST', body=body, content_type=content_type)
+        api = ryu_controler.SDNLBRestAPI(req, None, data)
+        res = getattr(api, handler)(req)
+        assert res.status_code == 200, res.text
+
+    single = [json.dumps({"mac": mac, "rssi": rssi}).encode() for mac, _, rssi, _ in samples]
+    json_batches = [json.dumps({"samples": batch}).encode() for batch in batches(samples, batch_size)]
+    binary_batches = [pack_rssi_batch(batch) for batch in batches(samples, batch_size)]
+
+    old = timed("single POST (JSON)", len(samples),
+                lambda: [call('update_rssi', body, 'application/json') for body in single])
+    new_json = timed(f"batch {batch_size} (JSON)", len(samples),
+                     lambda: [call('update_rssi_batch', body, 'application/json') for body in json_batches])
+    new_bin = timed(f"batch {batch_size} (binary)", len(samples),
+                    lambda: [call('update_rssi_batch', body, RSSI_BATCH_CONTENT_TYPE)
+                             for body in binary_batches])
+    return old, min(new_json, new_bin)
+
+
+# Gửi HTTP thật tới controller đang chạy
+def bench_http(samples, batch_size, controller):
+    base = f"http://{controller}"
+
+    def old_path():
+        for mac, _, rssi, _ in samples:
+            requests.post(f"{base}/update_rssi", json={"mac": mac, "rssi": rssi}, timeout=5)
+
+    def new_path(binary):
+        with requests.Session() as session:
+            for batch in batches(samples, batch_size):
+                if binary:
+                    session.post(f"{base}/update_rssi_batch", data=pack_rssi_batch(batch), timeout=5,
+                                 headers={'Content-Type': RSSI_BATCH_CONTENT_TYPE})
+                else:
+                    session.post(f"{base}/update_rssi_batch", json={"samples": batch}, timeout=5)
+
+    old = timed("requests.post per MAC", len(samples), old_path)
+    new_json = timed(f"session, batch {batch_size} (JSON)", len(samples), lambda: new_path(False))
+    new_bin = timed(f"session, batch {batch_size} (binary)", len(samples), lambda: new_path(True))
+    return old, min(new_json, new_bin)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--stations', type=int, default=5000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--controller', help='host:port của controller đang chạy (đo qua HTTP)')
+    args = parser.parse_args()
+
+    samples = build_samples(args.stations)
+    if args.controller:
+        old, new = bench_http(samples, args.batch_size, args.controller)
+    else:
+        old, new = bench_in_process(samples, args.batch_size)
+    print(f"speedup (best batch vs single): {old / new:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
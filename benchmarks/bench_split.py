@@ -0,0 +1,203 @@
+# Benchmark độ trễ packet-in khi REST API bị tải nặng, có và không có worker phân tích
+# (ANALYTICS_WORKER). Mỗi chế độ chạy trong một tiến trình riêng như ryu-manager
+# (hub.patch, WSGI server thật): SDNWiFiLoadBalancer với datapath giả của bench_controller.py,
+# một green thread đóng vai các switch (trả lời echo/barrier/port stats) và một green thread
+# đưa packet-in theo nhịp cố định. Độ trễ tính từ thời điểm packet-in lẽ ra được xử lý tới
+# khi handler xong, nên gồm cả thời gian chờ hub đang bận với việc khác (REST, snapshot).
+# Tải REST đến từ các tiến trình khác: GET /host_status (toàn bộ danh sách) và POST lô
+# RSSI JSON /update_rssi_batch liên tục.
+# Chạy: python3 benchmarks/bench_split.py --aps 50 --macs 5000 --rest-clients 8
+#       python3 benchmarks/bench_split.py --mode split --duration 30 --rate 500
+#       python3 benchmarks/bench_split.py --mode split --resync-every 1  (luôn gửi toàn bộ bảng client)
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+
+import numpy as np
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# Một tiến trình tạo tải REST: `threads` luồng, mỗi luồng một session, xen kẽ GET
+# /host_status và POST lô RSSI tới khi hết `duration` giây; gửi (số request, số lỗi) về results
+def rest_load(url, threads, duration, macs, aps, rssi_batch, results):
+    stop = time.time() + duration
+    counts = []
+
+    def client(index):
+        session = requests.Session()
+        rng = random.Random(index)
+        done = errors = 0
+        while time.time() < stop:
+            try:
+                if done % 2:
+                    now = time.time()
+                    picked = rng.sample(range(len(macs)), min(rssi_batch, len(macs)))
+                    samples = [[macs[i], rng.choice(aps), rng.randint(-90, -40), now] for i in picked]
+                    res = session.post(f"{url}/update_rssi_batch", data=json.dumps({"samples": samples}),
+                                       headers={'Content-Type': 'application/json'}, timeout=30)
+                else:
+                    res = session.get(f"{url}/host_status", timeout=30)
+                errors += res.status_code != 200
+            except requests.RequestException:
+                errors += 1
+            done += 1
+        counts.append((done, errors))
+
+    workers = [threading.Thread(target=client, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    results.put((sum(done for done, _ in counts), sum(errors for _, errors in counts)))
+
+
+def percentiles(name, latencies):
+    values = np.array(latencies) * 1000
+    p50, p90, p99, p999 = np.percentile(values, (50, 90, 99, 99.9))
+    print(f"  {name:<22} n={len(values):6d}  p50={p50:7.3f}  p90={p90:7.3f}  p99={p99:8.3f}  "
+          f"p99.9={p999:8.3f}  max={values.max():8.3f} ms")
+
+
+# Một chế độ (split = có worker) trong tiến trình riêng để trạng thái module không lẫn nhau
+def run(split, args):
+    from ryu.lib import hub
+    hub.patch(thread=False)
+    import logging
+    from eventlet import tpool
+    from ryu.app.wsgi import WSGIApplication
+    from ryu.controller import ofp_event
+    from ryu.ofproto import ofproto_v1_3_parser
+    import ryu_controler
+    from bench_controller import (IP_BASE, MAC_BASE, StubDatapath, arp_frame, barrier_replies, echo_replies,
+                                  ipv4_frame, packet_in, port_stats_reply)
+    from client_table import int_to_mac
+
+    logging.basicConfig(level=logging.ERROR)
+    ryu_controler.ROAMING_LOG_PATH = None
+    ryu_controler.STATE_PATH = None
+    ryu_controler.MAX_CLIENTS_PER_AP = 2 * -(-args.macs // args.aps)
+    ryu_controler.ANALYTICS_WORKER = split
+    ryu_controler.ANALYTICS_WORKER_HOST = '127.0.0.1'
+    ryu_controler.ANALYTICS_WORKER_PORT = args.port
+    if args.resync_every:
+        ryu_controler.STATE_RESYNC_EVERY = args.resync_every
+    wsgi = WSGIApplication()
+    app = ryu_controler.SDNWiFiLoadBalancer(wsgi=wsgi)
+    app.logger.setLevel(logging.ERROR)
+    if not split:
+        server = hub.WSGIServer(('127.0.0.1', args.port), wsgi)
+        hub.spawn(server.serve_forever)
+
+    datapaths = {dpid: StubDatapath(dpid) for dpid in range(1, args.aps + 1)}
+    for dp in datapaths.values():
+        msg = ofproto_v1_3_parser.OFPSwitchFeatures(dp)
+        msg.datapath = dp
+        app.switch_features_handler(ofp_event.EventOFPSwitchFeatures(msg))
+    macs = [MAC_BASE + i for i in range(args.macs)]
+    ips = [IP_BASE + 256 + i for i in range(args.macs)]
+    home = {mac: datapaths[i % args.aps + 1] for i, mac in enumerate(macs)}
+    for mac, ip in zip(macs, ips):
+        app.packet_in_handler(packet_in(home[mac], arp_frame(mac, ip)))
+
+    # Các switch: trả lời echo, barrier và port stats như switch thật
+    def switches():
+        step = 0
+        while True:
+            step += 1
+            for dp in datapaths.values():
+                if dp.stats_requested:
+                    dp.stats_requested = False
+                    app.port_stats_reply_handler(port_stats_reply(dp, step, 4))
+            for ev in echo_replies(datapaths.values()):
+                app.echo_reply_handler(ev)
+            for ev in barrier_replies(datapaths.values()):
+                app.barrier_reply_handler(ev)
+            hub.sleep(0.05)
+
+    # Packet-in theo nhịp `rate`/giây giữa các cặp client ngẫu nhiên (luồng mới → lên controller)
+    def drive(duration):
+        rng = random.Random(1)
+        latencies = []
+        start = time.perf_counter()
+        for i in range(int(duration * args.rate)):
+            due = start + i / args.rate
+            delay = due - time.perf_counter()
+            if delay > 0:
+                hub.sleep(delay)
+            src, dst = rng.sample(range(args.macs), 2)
+            ev = packet_in(home[macs[src]], ipv4_frame(macs[src], macs[dst], ips[src], ips[dst]))
+            app.packet_in_handler(ev)
+            latencies.append(time.perf_counter() - due)
+        return latencies
+
+    hub.spawn(switches)
+    hub.sleep(args.warmup)
+    mode = 'split (analytics worker)' if split else 'in-process REST'
+    print(f"{mode}: aps={args.aps} macs={args.macs} rate={args.rate}/s duration={args.duration}s "
+          f"rest_clients={args.rest_clients}")
+    percentiles('packet-in idle', drive(args.duration))
+
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    url = f"http://127.0.0.1:{args.port}"
+    mac_text = [int_to_mac(mac) for mac in macs]
+    per_process = -(-args.rest_clients // args.rest_processes)
+    loaders = [context.Process(target=rest_load, args=(url, per_process, args.duration + 1, mac_text,
+                                                       list(datapaths), args.rssi_batch, results))
+               for _ in range(args.rest_processes)]
+    for loader in loaders:
+        loader.start()
+    hub.sleep(1)
+    percentiles('packet-in under REST', drive(args.duration))
+    done = errors = 0
+    for _ in loaders:
+        count, failed = tpool.execute(results.get)  # Hub vẫn phục vụ request REST còn dở
+        done += count
+        errors += failed
+    for loader in loaders:
+        loader.join()
+    print(f"  REST requests={done} ({done / (args.duration + 1):.0f}/s) errors={errors}  "
+          f"monitor loop max={app.jobs.loop.summary()['max_ms']:.1f} ms")
+    if split:
+        # Chi phí mỗi lần gửi trạng thái cho worker trên hub: cả job publish_state và riêng pickle
+        job = app.jobs.summary()['jobs']['publish_state']
+        state = app.worker.summary()['sent_by_kind'].get('state', {})
+        print(f"  state ticks={job['runs']} (full every {ryu_controler.STATE_RESYNC_EVERY})  "
+              f"publish_state avg={job['avg_ms']:.3f} max={job['max_ms']:.3f} ms  "
+              f"pickle avg={state.get('avg_pickle_ms', 0):.3f} ms  size avg={state.get('avg_bytes', 0)} B")
+    app.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--mode', choices=('both', 'inline', 'split'), default='both')
+    parser.add_argument('--aps', type=int, default=50)
+    parser.add_argument('--macs', type=int, default=5000)
+    parser.add_argument('--rate', type=float, default=500.0, help='số packet-in mỗi giây')
+    parser.add_argument('--duration', type=float, default=20.0, help='số giây đo mỗi pha')
+    parser.add_argument('--warmup', type=float, default=3.0)
+    parser.add_argument('--rest-clients', type=int, default=8, help='số luồng gửi request REST')
+    parser.add_argument('--rest-processes', type=int, default=2)
+    parser.add_argument('--rssi-batch', type=int, default=200, help='số mẫu mỗi POST /update_rssi_batch')
+    parser.add_argument('--port', type=int, default=8091, help='cổng REST dùng trong benchmark')
+    parser.add_argument('--resync-every', type=int, default=0,
+                        help='gửi toàn bộ bảng client cho worker sau số lần này (1 = luôn gửi toàn bộ; '
+                             '0 = STATE_RESYNC_EVERY của controller)')
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    for split in {'both': (False, True), 'inline': (False,), 'split': (True,)}[args.mode]:
+        process = context.Process(target=run, args=(split, args))
+        process.start()
+        process.join()
+
+
+if __name__ == '__main__':
+    main()
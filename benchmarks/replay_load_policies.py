@@ -0,0 +1,182 @@
+# Replay: so sánh các chính sách chấm điểm tải (load_policy.py) trên cùng một
+# chuỗi sự kiện client vào/ra. Mỗi client có nhu cầu lưu lượng riêng (vài client
+# xem video chiếm phần lớn băng thông) và chỉ nghe được các AP ở gần. Chính sách
+# chỉ thấy tốc độ EWMA đo được ở các giây trước, giống controller.
+# Báo cáo cho mỗi chính sách: thông lượng tổng, tỉ lệ đáp ứng nhu cầu, chỉ số mất
+# cân bằng tải (Jain và max/mean của mức sử dụng AP), số client bị từ chối.
+# Chạy: python3 benchmarks/replay_load_policies.py --aps 12 --duration 600
+#       python3 benchmarks/replay_load_policies.py --save-trace trace.jsonl
+#       python3 benchmarks/replay_load_policies.py --trace trace.jsonl --policy weighted:rate_weight=0.8
+import argparse
+import json
+import math
+import os
+import random
+import sys
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from load_policy import POLICIES, APState, channels_overlap, make_policy  # noqa: E402
+
+CHANNELS = (1, 6, 11)
+AP_SPACING = 30  # Khoảng cách giữa hai AP liền kề (m)
+HEAR_RANGE = 40  # Client nghe được AP trong bán kính này (m)
+INTERFERENCE_RANGE = 70  # AP cùng kênh trong bán kính này chia sẻ thời gian phát (m)
+CO_CHANNEL_SHARE = 0.5
+
+
+# Sinh chuỗi sự kiện: client đến theo Poisson, ở lại theo phân phối mũ;
+# 10% là client xem video (4–8 Mbit/s), còn lại 50–500 kbit/s
+def synthetic_trace(num_aps, duration, arrivals_per_s, mean_stay, seed):
+    rnd = random.Random(seed)
+    events = []
+    mac = 0
+    for t in range(duration):
+        for _ in range(_poisson(rnd, arrivals_per_s)):
+            mac += 1
+            x = rnd.uniform(0, (num_aps - 1) * AP_SPACING)
+            heard = sorted((abs(x - i * AP_SPACING), i + 1) for i in range(num_aps)
+                           if abs(x - i * AP_SPACING) <= HEAR_RANGE)
+            demand = rnd.uniform(4e6, 8e6) if rnd.random() < 0.1 else math.exp(rnd.uniform(math.log(5e4), math.log(5e5)))
+            events.append({"t": t, "mac": mac, "event": "join", "demand_bps": demand,
+                           "aps": [dpid for _, dpid in heard]})
+            leave = t + 1 + int(rnd.expovariate(1 / mean_stay))
+            if leave < duration:
+                events.append({"t": leave, "mac": mac, "event": "leave"})
+    events.sort(key=lambda e: (e["t"], e["event"] != "leave"))
+    return events
+
+
+def _poisson(rnd, lam):
+    limit, k, p = math.exp(-lam), 0, 1.0
+    while True:
+        p *= rnd.random()
+        if p < limit:
+            return k
+        k += 1
+
+
+def build_aps(num_aps, capacity_bps, max_clients, seed):
+    rnd = random.Random(seed + 1)
+    channels = {dpid: rnd.choice(CHANNELS) for dpid in range(1, num_aps + 1)}
+    co_channel = {
+        dpid: sum(1 for other in channels if other != dpid
+                  and abs(other - dpid) * AP_SPACING <= INTERFERENCE_RANGE
+                  and channels_overlap(channels[dpid], channels[other]))
+        for dpid in channels
+    }
+    return {dpid: {"channel": channels[dpid], "co_channel": co_channel[dpid],
+                   "capacity_bps": capacity_bps, "max_clients": max_clients}
+            for dpid in channels}
+
+
+def jain(values):
+    total = sum(values)
+    squares = sum(v * v for v in values)
+    return total * total / (len(values) * squares) if squares else 1.0
+
+
+# Phát lại chuỗi sự kiện với một chính sách; trả về các chỉ số tổng hợp
+def replay(events, aps, policy, alpha=0.3):
+    clients = {}  # mac → (dpid, nhu cầu)
+    members = defaultdict(dict)  # dpid → {mac: nhu cầu}
+    ewma = {dpid: 0.0 for dpid in aps}
+    served_total = demand_total = 0.0
+    blocked = 0
+    jain_sum = imbalance_sum = 0.0
+    ticks = 0
+    by_tick = defaultdict(list)
+    for event in events:
+        by_tick[event["t"]].append(event)
+    for t in range(max(by_tick) + 1 if by_tick else 0):
+        for event in by_tick.get(t, ()):
+            mac = event["mac"]
+            if event["event"] == "leave":
+                if mac in clients:
+                    dpid, _ = clients.pop(mac)
+                    del members[dpid][mac]
+                continue
+            best = None
+            for rank, dpid in enumerate(event["aps"]):
+                ap = aps[dpid]
+                state = APState(dpid, len(members[dpid]), ap["max_clients"], ewma[dpid],
+                                ap["capacity_bps"], ap["channel"], ap["co_channel"])
+                if policy.admits(state):
+                    key = (policy.score(state), rank)  # Điểm bằng nhau → AP gần hơn
+                    if best is None or key < best[0]:
+                        best = (key, dpid)
+            if best is None:
+                blocked += 1
+                continue
+            clients[mac] = (best[1], event["demand_bps"])
+            members[best[1]][mac] = event["demand_bps"]
+
+        # Mỗi AP phục vụ tối đa dung lượng hiệu dụng (chia sẻ với AP cùng kênh ở gần)
+        utilization = []
+        for dpid, ap in aps.items():
+            demand = sum(members[dpid].values())
+            capacity = ap["capacity_bps"] / (1 + CO_CHANNEL_SHARE * ap["co_channel"])
+            served = min(demand, capacity)
+            served_total += served
+            demand_total += demand
+            utilization.append(demand / capacity)
+            ewma[dpid] += alpha * (served - ewma[dpid])
+        mean = sum(utilization) / len(utilization)
+        jain_sum += jain(utilization)
+        imbalance_sum += max(utilization) / mean if mean else 1.0
+        ticks += 1
+    return {
+        "throughput_mbps": served_total / ticks / 1e6 if ticks else 0.0,
+        "satisfaction": served_total / demand_total if demand_total else 1.0,
+        "jain": jain_sum / ticks if ticks else 1.0,
+        "max_over_mean": imbalance_sum / ticks if ticks else 1.0,
+        "blocked": blocked,
+    }
+
+
+# "weighted:rate_weight=0.8,client_weight=0.2" → (tên, tham số)
+def parse_policy(spec):
+    name, _, rest = spec.partition(':')
+    params = dict(item.split('=', 1) for item in rest.split(',') if item)
+    return spec, make_policy(name, **params)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--aps', type=int, default=12)
+    parser.add_argument('--duration', type=int, default=600, help='số giây mô phỏng')
+    parser.add_argument('--arrivals', type=float, default=0.5, help='số client đến mỗi giây')
+    parser.add_argument('--stay', type=float, default=180, help='thời gian ở lại trung bình (giây)')
+    parser.add_argument('--capacity', type=float, default=20e6, help='dung lượng mỗi AP (bit/giây)')
+    parser.add_argument('--max-clients', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--trace', help='đọc chuỗi sự kiện từ file JSON lines')
+    parser.add_argument('--save-trace', help='ghi chuỗi sự kiện đã sinh ra file JSON lines')
+    parser.add_argument('--policy', action='append',
+                        help='chính sách cần so sánh, dạng ten:tham_so=gia_tri (mặc định: tất cả)')
+    args = parser.parse_args()
+
+    if args.trace:
+        with open(args.trace) as f:
+            events = [json.loads(line) for line in f if line.strip()]
+        num_aps = max(max(e.get("aps") or [0]) for e in events)
+    else:
+        events = synthetic_trace(args.aps, args.duration, args.arrivals, args.stay, args.seed)
+        num_aps = args.aps
+    if args.save_trace:
+        with open(args.save_trace, 'w') as f:
+            f.writelines(json.dumps(e) + '\n' for e in events)
+    aps = build_aps(num_aps, args.capacity, args.max_clients, args.seed)
+    policies = [parse_policy(spec) for spec in (args.policy or sorted(POLICIES))]
+
+    print(f"{num_aps} APs, {sum(1 for e in events if e['event'] == 'join')} clients")
+    print(f"{'policy':<36} {'Mbit/s':>8} {'served':>7} {'jain':>6} {'max/mean':>9} {'blocked':>8}")
+    for spec, policy in policies:
+        result = replay(events, aps, policy)
+        print(f"{spec:<36} {result['throughput_mbps']:8.2f} {result['satisfaction']:7.1%} "
+              f"{result['jain']:6.3f} {result['max_over_mean']:9.2f} {result['blocked']:8d}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+# Replay không cần Mininet/root: chạy một kịch bản của scenario.py (sơ đồ AP lưới hoặc
+# theo file, station di chuyển random waypoint hoặc theo trace, RSSI từ mô hình suy hao,
+# lưu lượng lấy mẫu từ ma trận lưu lượng) trực tiếp trên SDNWiFiLoadBalancer trong tiến
+# trình. Đầu vào OpenFlow đi qua handler với datapath giả của bench_controller.py
+# (packet-in khi station kết nối AP mới và khi luồng chưa có flow, port stats reply
+# theo lưu lượng, echo/barrier reply); RSSI đi qua REST /update_rssi_batch (nhị phân).
+# Kịch bản chạy theo thời gian thật (--speed > 1 tua nhanh kịch bản, các timer của
+# controller vẫn theo đồng hồ thật).
+# Báo cáo độ trễ từng loại đầu vào, chi phí vòng giám sát, số lượt roaming và tỉ lệ
+# client mà controller gán đúng AP station đang kết nối.
+# Chạy: python3 benchmarks/replay_scenario.py --layout grid:4x4 --stations 500 --mobility waypoint --duration 60
+#       python3 benchmarks/replay_scenario.py --layout plan:floor.json --mobility trace:walk.csv
+#       python3 benchmarks/replay_scenario.py --stations 2000 --save-trace walk.csv --duration 300
+import argparse
+import logging
+import os
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+from webob import Request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ryu.controller import ofp_event  # noqa: E402
+from ryu.ofproto import ofproto_v1_3_parser  # noqa: E402
+
+import ryu_controler  # noqa: E402
+from bench_controller import (IP_BASE, MAC_BASE, StubDatapath, StubWSGI, arp_frame, barrier_replies,  # noqa: E402
+                              echo_replies, ipv4_frame, packet_in, report)
+from client_table import int_to_mac  # noqa: E402
+from rssi_batch import RSSI_BATCH_CONTENT_TYPE, pack_rssi_batch  # noqa: E402
+from scenario import build_scenario, record_trace  # noqa: E402
+
+
+# Gọi handler và ghi thời gian xử lý vào times[tên]
+def timed_call(times, name, handler, arg):
+    start = time.perf_counter()
+    handler(arg)
+    times[name].append(time.perf_counter() - start)
+
+
+# Port stats reply của cổng WiFi với bộ đếm byte tích lũy từ các luồng đã sinh
+def wifi_stats_reply(datapath, rx_bytes, tx_bytes):
+    stats = ofproto_v1_3_parser.OFPPortStats(
+        port_no=ryu_controler.WIRELESS_PORT, rx_packets=rx_bytes // 1500, tx_packets=tx_bytes // 1500,
+        rx_bytes=rx_bytes, tx_bytes=tx_bytes, rx_dropped=0, tx_dropped=0, rx_errors=0, tx_errors=0,
+        rx_frame_err=0, rx_over_err=0, rx_crc_err=0, collisions=0, duration_sec=0, duration_nsec=0)
+    msg = ofproto_v1_3_parser.OFPPortStatsReply(datapath, body=[stats])
+    msg.flags = 0
+    return ofp_event.EventOFPPortStatsReply(msg)
+
+
+def post_rssi(app, samples):
+    req = Request.blank('/update_rssi_batch', method='POST', body=pack_rssi_batch(samples),
+                        content_type=RSSI_BATCH_CONTENT_TYPE)
+    api = ryu_controler.SDNLBRestAPI(req, None, {ryu_controler.SDN_LB_INSTANCE_NAME: app})
+    res = api.update_rssi_batch(req)
+    if res.status_code != 200:
+        print(f"[WARN] RSSI batch rejected: {res.status_code} {res.text}")
+
+
+def run(scenario, duration, step, speed, rssi_interval, rssi_batch, flow_bytes, max_clients):
+    ryu_controler.ROAMING_LOG_PATH = None
+    ryu_controler.STATE_PATH = None
+    ryu_controler.MAX_CLIENTS_PER_AP = max_clients or 2 * -(-len(scenario) // len(scenario.aps))
+    app = ryu_controler.SDNWiFiLoadBalancer(wsgi=StubWSGI())
+    app.logger.setLevel(logging.ERROR)
+    datapaths = {int(dpid): StubDatapath(int(dpid)) for dpid in scenario.dpids}
+    macs = [MAC_BASE + i for i in range(len(scenario))]
+    mac_text = [int_to_mac(mac) for mac in macs]
+    ips = [IP_BASE + 256 + i for i in range(len(scenario))]
+    rx_bytes = defaultdict(int)  # dpid → byte nhận trên cổng WiFi
+    tx_bytes = defaultdict(int)
+    times = defaultdict(list)
+    counts = defaultdict(int)
+    print(f"aps={len(scenario.aps)} stations={len(scenario)} max_clients={ryu_controler.MAX_CLIENTS_PER_AP} "
+          f"duration={duration}s step={step}s speed={speed}")
+
+    for dp in datapaths.values():
+        msg = ofproto_v1_3_parser.OFPSwitchFeatures(dp)
+        msg.datapath = dp
+        timed_call(times, 'switch_features', app.switch_features_handler, ofp_event.EventOFPSwitchFeatures(msg))
+
+    associated = np.full(len(scenario), -1)
+    next_rssi = 0.0
+    start = time.time()
+    lag = 0.0
+    t = 0.0
+    while t <= duration:
+        # Station vừa kết nối AP mới tự giới thiệu bằng ARP (gateway)
+        current = scenario.associated_dpids()
+        for i in np.flatnonzero((current != associated) & (current >= 0)).tolist():
+            timed_call(times, 'packet_in (join/roam)', app.packet_in_handler,
+                       packet_in(datapaths[int(current[i])], arp_frame(macs[i], ips[i])))
+            counts['reassociations'] += 1
+        associated = current
+
+        if t >= next_rssi:
+            samples = scenario.rssi_samples(macs, time.time())
+            for i in range(0, len(samples), rssi_batch):
+                timed_call(times, 'REST update_rssi_batch', lambda batch: post_rssi(app, batch),
+                           samples[i:i + rssi_batch])
+            counts['rssi_samples'] += len(samples)
+            next_rssi = t + rssi_interval
+
+        for src, dst in scenario.flows(step).tolist():
+            dp = datapaths[int(current[src])]
+            rx_bytes[dp.id] += flow_bytes
+            tx_bytes[int(current[dst])] += flow_bytes
+            counts['flows'] += 1
+            if dp.forwards(mac_text[src], mac_text[dst]):
+                continue
+            timed_call(times, 'packet_in (traffic)', app.packet_in_handler,
+                       packet_in(dp, ipv4_frame(macs[src], macs[dst], ips[src], ips[dst])))
+
+        # Switch trả lời các request của controller
+        for dp in datapaths.values():
+            if dp.stats_requested:
+                dp.stats_requested = False
+                timed_call(times, 'port_stats_reply', app.port_stats_reply_handler,
+                           wifi_stats_reply(dp, rx_bytes[dp.id], tx_bytes[dp.id]))
+        for ev in echo_replies(datapaths.values()):
+            app.echo_reply_handler(ev)
+        for ev in barrier_replies(datapaths.values()):
+            app.barrier_reply_handler(ev)
+
+        tick = time.perf_counter()
+        now = time.time()
+        app._poll_stats(now)
+        app.jobs.run_pending(now)
+        times['monitor tick'].append(time.perf_counter() - tick)
+
+        t += step
+        scenario.step(step)
+        delay = start + t / speed - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            lag = max(lag, -delay)
+
+    print("inputs:")
+    for name, values in times.items():
+        report(name, np.array(values))
+    ap_of = app.clients.ap_of
+    connected = np.flatnonzero(associated >= 0).tolist()
+    agree = sum(1 for i in connected if ap_of(macs[i]) == associated[i])
+    print("result:")
+    print(f"  flows={counts['flows']} (packet-in {len(times['packet_in (traffic)'])}) "
+          f"reassociations={counts['reassociations']} rssi_samples={counts['rssi_samples']}")
+    print(f"  controller roams={app.roaming_events.total} faulty_aps={len(app.faulty_aps)} "
+          f"clients={len(app.clients)}")
+    print(f"  controller AP == station AP: {agree}/{len(connected)} "
+          f"({agree / max(len(connected), 1) * 100:.1f}%)  max lag behind real time {lag * 1000:.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--layout', default='grid:3x3', help="resort, grid:RxC hoặc plan:<file.json>")
+    parser.add_argument('--stations', type=int, default=200)
+    parser.add_argument('--mobility', default='waypoint', help="static, waypoint hoặc trace:<file.csv>")
+    parser.add_argument('--spacing', type=float, default=30.0)
+    parser.add_argument('--speed-range', type=float, nargs=2, default=(0.5, 1.5), help='tốc độ đi bộ (m/s)')
+    parser.add_argument('--traffic-rate', type=float, default=200.0, help='số luồng mỗi giây')
+    parser.add_argument('--max-flows', type=int, default=None, help='số luồng tối đa mỗi bước')
+    parser.add_argument('--flow-bytes', type=int, default=150000, help='số byte mỗi luồng')
+    parser.add_argument('--shadowing', type=float, default=4.0, help='nhiễu shadowing của RSSI (dB)')
+    parser.add_argument('--duration', type=float, default=60.0)
+    parser.add_argument('--step', type=float, default=1.0)
+    parser.add_argument('--speed', type=float, default=1.0, help='tốc độ phát lại so với thời gian thật')
+    parser.add_argument('--rssi-interval', type=float, default=5.0)
+    parser.add_argument('--rssi-batch', type=int, default=500)
+    parser.add_argument('--max-clients', type=int, default=None,
+                        help='MAX_CLIENTS_PER_AP của controller (mặc định 2 × số station trung bình mỗi AP)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--save-trace', help='ghi quỹ đạo station ra CSV (dùng lại với --mobility trace:...)')
+    args = parser.parse_args()
+
+    def scenario():
+        return build_scenario(args.layout, args.stations, args.mobility, spacing=args.spacing,
+                              speed=tuple(args.speed_range), traffic_rate=args.traffic_rate,
+                              max_flows=args.max_flows, shadowing_db=args.shadowing, seed=args.seed)
+
+    if args.save_trace:
+        record_trace(args.save_trace, scenario().mobility, args.duration, args.step)
+        print(f"trace written to {args.save_trace}")
+        return
+    run(scenario(), args.duration, args.step, args.speed, args.rssi_interval, args.rssi_batch, args.flow_bytes,
+        args.max_clients)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,362 @@
+import socket
+import struct
+from array import array
+
+
+# Chuyển MAC dạng chuỗi 'aa:bb:cc:dd:ee:ff' ↔ số nguyên 48 bit
+def mac_to_int(mac):
+    return int(mac.replace(':', ''), 16)
+
+
+def int_to_mac(value):
+    return value.to_bytes(6, 'big').hex(':')
+
+
+# Chuyển IPv4 dạng chuỗi ↔ số nguyên 32 bit
+def ip_to_int(ip):
+    return struct.unpack('!I', socket.inet_aton(ip))[0]
+
+
+def int_to_ip(value):
+    return socket.inet_ntoa(struct.pack('!I', value))
+
+
+_NONE = -1  # Giá trị rỗng cho dpid/port/ip/liên kết
+_NO_RSSI = -32768  # Giá trị rỗng cho RSSI
+
+
+# Khung nhìn (view) vào một dòng của ClientTable; không lưu dữ liệu riêng
+class ClientRecord(object):
+    __slots__ = ('_table', 'slot')
+
+    def __init__(self, table, slot):
+        self._table = table
+        self.slot = slot
+
+    @property
+    def mac(self):
+        return self._table._mac[self.slot]
+
+    @property
+    def dpid(self):
+        value = self._table._dpid[self.slot]
+        return None if value == _NONE else value
+
+    @property
+    def port(self):
+        value = self._table._port[self.slot]
+        return None if value == _NONE else value
+
+    @port.setter
+    def port(self, value):
+        self._table._port[self.slot] = _NONE if value is None else value
+        self._table._touch(self.slot)
+
+    @property
+    def ip(self):
+        value = self._table._ip[self.slot]
+        return None if value == _NONE else value
+
+    @ip.setter
+    def ip(self, value):
+        self._table._set_ip(self.slot, value)
+
+    @property
+    def rssi(self):
+        value = self._table._rssi[self.slot]
+        return None if value == _NO_RSSI else value
+
+    @rssi.setter
+    def rssi(self, value):
+        value = _NO_RSSI if value is None else int(value)
+        if self._table._rssi[self.slot] != value:
+            self._table._rssi[self.slot] = value
+            self._table._touch(self.slot)
+
+    # Lưu lượng client đã gửi (tx) và nhận (rx) theo flow stats, tốc độ EWMA (bit/giây)
+    @property
+    def tx_bytes(self):
+        return self._table._tx_bytes[self.slot]
+
+    @property
+    def rx_bytes(self):
+        return self._table._rx_bytes[self.slot]
+
+    @property
+    def tx_packets(self):
+        return self._table._tx_packets[self.slot]
+
+    @property
+    def rx_packets(self):
+        return self._table._rx_packets[self.slot]
+
+    @property
+    def tx_bps(self):
+        return self._table._tx_bps[self.slot]
+
+    @property
+    def rx_bps(self):
+        return self._table._rx_bps[self.slot]
+
+    @property
+    def last_seen(self):
+        return self._table._last_seen[self.slot]
+
+    @last_seen.setter
+    def last_seen(self, value):
+        self._table._last_seen[self.slot] = value
+
+
+# Bảng client duy nhất lưu theo cột (array), khóa là MAC 48 bit dạng int.
+# Mỗi client chiếm một slot; các client cùng AP được nối thành danh sách liên
+# kết đôi ngay trong mảng _next/_prev, nên cột _dpid cũng là chỉ mục ngược
+# MAC → AP và mọi thao tác chuyển AP/xóa client đều O(1).
+# track_changes=True → ghi nhận client và AP thay đổi để snapshot chỉ dựng lại phần đó
+class ClientTable(object):
+    def __init__(self, track_changes=False):
+        self._slots = {}  # MAC → slot
+        self._free = []  # Các slot đã giải phóng để dùng lại
+        self._mac = array('q')
+        self._dpid = array('q')
+        self._port = array('l')
+        self._ip = array('q')
+        self._rssi = array('h')
+        self._last_seen = array('d')
+        self._tx_bytes = array('q')
+        self._rx_bytes = array('q')
+        self._tx_packets = array('q')
+        self._rx_packets = array('q')
+        self._tx_bps = array('f')
+        self._rx_bps = array('f')
+        self._next = array('l')  # Slot kế tiếp trên cùng AP
+        self._prev = array('l')  # Slot liền trước trên cùng AP
+        self._head = {}  # dpid → slot đầu danh sách
+        self._count = {}  # dpid → số client đang kết nối
+        self._by_ip = {}  # IP → MAC (chỉ mục ngược cho proxy ARP)
+        self._changed = set() if track_changes else None  # MAC đổi từ lần take_changes() trước
+        self._changed_aps = set()  # AP có client vào/ra từ lần take_changes() trước
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, mac):
+        return mac in self._slots
+
+    def __iter__(self):
+        return (ClientRecord(self, slot) for slot in list(self._slots.values()))
+
+    def get(self, mac):
+        slot = self._slots.get(mac)
+        return None if slot is None else ClientRecord(self, slot)
+
+    def get_or_create(self, mac, now=0.0):
+        slot = self._slots.get(mac)
+        if slot is None:
+            slot = self._alloc(mac, now)
+        return ClientRecord(self, slot)
+
+    # Gán client vào AP/cổng; trả về AP cũ (None nếu trước đó chưa kết nối)
+    def attach(self, mac, dpid, port):
+        slot = self._slots.get(mac)
+        if slot is None:
+            slot = self._alloc(mac, 0.0)
+        old_dpid = self._dpid[slot]
+        if old_dpid != dpid:
+            if old_dpid != _NONE:
+                self._unlink(slot)
+            self._link(slot, dpid)
+        if self._port[slot] != port:
+            self._port[slot] = port
+            self._touch(slot)
+        return None if old_dpid == _NONE else old_dpid
+
+    # Tách client khỏi AP hiện tại nhưng vẫn giữ IP/RSSI; trả về AP cũ
+    def detach(self, mac):
+        slot = self._slots.get(mac)
+        if slot is None or self._dpid[slot] == _NONE:
+            return None
+        old_dpid = self._dpid[slot]
+        self._unlink(slot)
+        return old_dpid
+
+    # Xóa hẳn client khỏi bảng; trả về AP cũ
+    def remove(self, mac):
+        slot = self._slots.pop(mac, None)
+        if slot is None:
+            return None
+        old_dpid = self._dpid[slot]
+        if old_dpid != _NONE:
+            self._unlink(slot)
+        self._set_ip(slot, None)
+        self._touch(slot)
+        self._free.append(slot)
+        return None if old_dpid == _NONE else old_dpid
+
+    # Tách mọi client khỏi một AP (AP ngắt kết nối); trả về danh sách MAC
+    def drop_ap(self, dpid):
+        macs = [client.mac for client in self.on_ap(dpid)]
+        for mac in macs:
+            self.detach(mac)
+        return macs
+
+    # Tìm MAC đang giữ một IP; None nếu chưa biết
+    def mac_of_ip(self, ip):
+        return self._by_ip.get(ip)
+
+    def ap_of(self, mac):
+        slot = self._slots.get(mac)
+        if slot is None or self._dpid[slot] == _NONE:
+            return None
+        return self._dpid[slot]
+
+    # Danh sách client trên một AP (chụp lại để có thể sửa bảng khi duyệt)
+    def on_ap(self, dpid):
+        records = []
+        slot = self._head.get(dpid, _NONE)
+        while slot != _NONE:
+            records.append(ClientRecord(self, slot))
+            slot = self._next[slot]
+        return records
+
+    def count(self, dpid):
+        return self._count.get(dpid, 0)
+
+    # Cộng dồn lưu lượng client gửi (tx) hoặc nhận (rx)
+    def add_traffic(self, mac, tx_bytes=0, tx_packets=0, rx_bytes=0, rx_packets=0):
+        slot = self._slots.get(mac)
+        if slot is None:
+            return False
+        self._tx_bytes[slot] += tx_bytes
+        self._tx_packets[slot] += tx_packets
+        self._rx_bytes[slot] += rx_bytes
+        self._rx_packets[slot] += rx_packets
+        self._touch(slot)
+        return True
+
+    # Cập nhật tốc độ EWMA (bit/giây) của client từ tốc độ đo được trong lượt hỏi vừa xong
+    def update_rate(self, mac, tx_bps, rx_bps, alpha):
+        slot = self._slots.get(mac)
+        if slot is None:
+            return
+        old = (self._tx_bps[slot], self._rx_bps[slot])
+        self._tx_bps[slot] += alpha * (tx_bps - self._tx_bps[slot])
+        self._rx_bps[slot] += alpha * (rx_bps - self._rx_bps[slot])
+        if (self._tx_bps[slot], self._rx_bps[slot]) != old:
+            self._touch(slot)
+
+    # Bản sao cột AP theo slot (-1 = chưa kết nối hoặc slot trống) cho tính toán vector hóa
+    def dpids_by_slot(self):
+        return array('q', self._dpid)
+
+    # Slot của mọi client (hoặc `slots` nếu có) và các cột (mac, dpid, port, ip, rssi),
+    # dùng cho snapshot trạng thái
+    def export_columns(self, slots=None):
+        if slots is None:
+            slots = array('q', self._slots.values())
+        return slots, (self._mac, self._dpid, self._port, self._ip, self._rssi)
+
+    # Các cột lưu lượng (tx/rx byte, tx/rx gói, tx/rx bit/giây) theo slot, đi cùng export_columns
+    def export_traffic(self):
+        return (self._tx_bytes, self._rx_bytes, self._tx_packets, self._rx_packets, self._tx_bps, self._rx_bps)
+
+    # Đánh dấu các slot có dữ liệu ngoài bảng vừa đổi (ví dụ hàng RSSI theo AP)
+    def touch(self, slots):
+        for slot in slots:
+            if slot < len(self._mac) and self._slots.get(self._mac[slot]) == slot:
+                self._touch(slot)
+
+    # MAC của các client đã đổi (kể cả đã bị xóa) và các AP có client vào/ra từ lần gọi
+    # trước; chỉ dùng khi bảng được tạo với track_changes=True
+    def take_changes(self):
+        changed, aps = self._changed, self._changed_aps
+        self._changed, self._changed_aps = set(), set()
+        return changed, aps
+
+    # Duyệt các client đang kết nối với một AP nào đó
+    def associated(self):
+        for dpid in list(self._head):
+            yield from self.on_ap(dpid)
+
+    def _alloc(self, mac, now):
+        if self._free:
+            slot = self._free.pop()
+            self._mac[slot] = mac
+            self._dpid[slot] = _NONE
+            self._port[slot] = _NONE
+            self._ip[slot] = _NONE
+            self._rssi[slot] = _NO_RSSI
+            self._last_seen[slot] = now
+            for column in (self._tx_bytes, self._rx_bytes, self._tx_packets, self._rx_packets,
+                           self._tx_bps, self._rx_bps):
+                column[slot] = 0
+            self._next[slot] = _NONE
+            self._prev[slot] = _NONE
+        else:
+            slot = len(self._mac)
+            self._mac.append(mac)
+            self._dpid.append(_NONE)
+            self._port.append(_NONE)
+            self._ip.append(_NONE)
+            self._rssi.append(_NO_RSSI)
+            self._last_seen.append(now)
+            for column in (self._tx_bytes, self._rx_bytes, self._tx_packets, self._rx_packets,
+                           self._tx_bps, self._rx_bps):
+                column.append(0)
+            self._next.append(_NONE)
+            self._prev.append(_NONE)
+        self._slots[mac] = slot
+        self._touch(slot)
+        return slot
+
+    def _touch(self, slot):
+        if self._changed is not None:
+            self._changed.add(self._mac[slot])
+
+    def _set_ip(self, slot, ip):
+        old_ip = self._ip[slot]
+        if old_ip != _NONE and self._by_ip.get(old_ip) == self._mac[slot]:
+            del self._by_ip[old_ip]
+        if ip is None:
+            self._ip[slot] = _NONE
+        else:
+            self._ip[slot] = ip
+            self._by_ip[ip] = self._mac[slot]
+        if self._ip[slot] != old_ip:
+            self._touch(slot)
+
+    def _link(self, slot, dpid):
+        head = self._head.get(dpid, _NONE)
+        self._next[slot] = head
+        self._prev[slot] = _NONE
+        if head != _NONE:
+            self._prev[head] = slot
+        self._head[dpid] = slot
+        self._dpid[slot] = dpid
+        self._count[dpid] = self._count.get(dpid, 0) + 1
+        if self._changed is not None:
+            self._changed.add(self._mac[slot])
+            self._changed_aps.add(dpid)
+
+    def _unlink(self, slot):
+        dpid = self._dpid[slot]
+        nxt, prv = self._next[slot], self._prev[slot]
+        if prv != _NONE:
+            self._next[prv] = nxt
+        elif nxt != _NONE:
+            self._head[dpid] = nxt
+        else:
+            del self._head[dpid]
+        if nxt != _NONE:
+            self._prev[nxt] = prv
+        self._next[slot] = _NONE
+        self._prev[slot] = _NONE
+        self._dpid[slot] = _NONE
+        self._port[slot] = _NONE
+        count = self._count[dpid] - 1
+        if count:
+            self._count[dpid] = count
+        else:
+            del self._count[dpid]
+        if self._changed is not None:
+            self._changed.add(self._mac[slot])
+            self._changed_aps.add(dpid)
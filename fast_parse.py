@@ -0,0 +1,67 @@
+import struct
+
+ETH_TYPE_IP = 0x0800
+ETH_TYPE_ARP = 0x0806
+ETH_TYPE_8021Q = 0x8100
+ETH_TYPE_LLDP = 0x88cc
+
+ETH_HEADER_LEN = 14
+_MAC_PAIR = struct.Struct('!HIHIH')  # dst (2+4 byte), src (2+4 byte), ethertype
+_MAC = struct.Struct('!HI')
+_U16 = struct.Struct('!H')
+_U32 = struct.Struct('!I')
+_ARP_OPER = struct.Struct('!HHBBH')  # htype, ptype, hlen, plen, oper
+
+
+# Đọc header Ethernet trực tiếp từ buffer, không dựng ryu Packet.
+# Trả về (dst, src, ethertype, offset của header lớp 3); MAC là int 48 bit.
+# Trả về None nếu gói tin quá ngắn.
+def parse_eth_header(data):
+    if len(data) < ETH_HEADER_LEN:
+        return None
+    dst_hi, dst_lo, src_hi, src_lo, ethertype = _MAC_PAIR.unpack_from(data, 0)
+    offset = ETH_HEADER_LEN
+    if ethertype == ETH_TYPE_8021Q and len(data) >= offset + 4:
+        ethertype = _U16.unpack_from(data, offset + 2)[0]
+        offset += 4
+    return (dst_hi << 32) | dst_lo, (src_hi << 32) | src_lo, ethertype, offset
+
+
+# Lấy (MAC người gửi, IP người gửi) của gói ARP IPv4/Ethernet; None nếu không hợp lệ
+def arp_sender(data, offset):
+    if len(data) < offset + 28:
+        return None
+    htype, ptype, hlen, plen, _ = _ARP_OPER.unpack_from(data, offset)
+    if htype != 1 or ptype != ETH_TYPE_IP or hlen != 6 or plen != 4:
+        return None
+    hi, lo = _MAC.unpack_from(data, offset + 8)
+    return (hi << 32) | lo, _U32.unpack_from(data, offset + 14)[0]
+
+
+# Lấy IP nguồn của gói IPv4; None nếu không hợp lệ
+def ipv4_src(data, offset):
+    if len(data) < offset + 20:
+        return None
+    return _U32.unpack_from(data, offset + 12)[0]
+
+
+
+ARP_REQUEST = 1
+ARP_REPLY = 2
+_ARP_FRAME = struct.Struct('!6s6sHHHBBH6sI6sI')
+
+
+# Lấy (ARP opcode, IP đích) của gói ARP; None nếu không hợp lệ
+def arp_target(data, offset):
+    if len(data) < offset + 28:
+        return None
+    return _ARP_OPER.unpack_from(data, offset)[4], _U32.unpack_from(data, offset + 24)[0]
+
+
+# Dựng khung ARP reply: target_mac/target_ip trả lời cho requester_mac/requester_ip
+def arp_reply_frame(target_mac, target_ip, requester_mac, requester_ip):
+    target = target_mac.to_bytes(6, 'big')
+    requester = requester_mac.to_bytes(6, 'big')
+    return _ARP_FRAME.pack(requester, target, ETH_TYPE_ARP,
+                           1, ETH_TYPE_IP, 6, 4, ARP_REPLY,
+                           target, target_ip, requester, requester_ip)
@@ -0,0 +1,198 @@
+import itertools
+from collections import deque
+
+
+# Một lô FlowMod gửi tới một datapath trong một chu kỳ giám sát
+class FlowBatch(object):
+    __slots__ = ('dpid', 'msgs', 'callbacks', 'xids', 'confirm_xid',
+                 'bundle_id', 'started', 'failed')
+
+    def __init__(self, dpid):
+        self.dpid = dpid
+        self.msgs = []  # Các message chờ gửi
+        self.callbacks = []  # Gọi callback(ok) khi lô hoàn tất hoặc thất bại
+        self.xids = []  # xid của mọi message đã gửi (để gán lỗi cho lô)
+        self.confirm_xid = None  # xid của barrier hoặc bundle commit cần chờ
+        self.bundle_id = None
+        self.started = None
+        self.failed = False
+
+
+# Gom các FlowMod theo datapath rồi gửi một lần mỗi chu kỳ: dùng bundle
+# OpenFlow 1.3 (ONF extension) nếu switch hỗ trợ, ngược lại gửi liên tiếp
+# và kết thúc bằng một barrier. Lô chỉ được xác nhận khi nhận commit reply /
+# barrier reply không kèm lỗi; độ trễ của từng lô được lưu lại.
+class FlowBatcher(object):
+    def __init__(self, logger, use_bundles=True, history=100):
+        self.logger = logger
+        self.use_bundles = use_bundles
+        self.bundle_support = {}  # dpid → True/False khi đã dò xong
+        self.latencies = deque(maxlen=history)  # (dpid, số message, độ trễ giây, ok)
+        self.committed = 0
+        self.failed = 0
+        self._queued = {}  # dpid → FlowBatch đang gom
+        self._inflight = {}  # (dpid, xid xác nhận) → FlowBatch
+        self._by_xid = {}  # (dpid, xid) → FlowBatch
+        self._probes = {}  # (dpid, xid) → bundle_id của lần dò
+        self._bundle_ids = itertools.count(1)
+
+    def _batch(self, dpid):
+        batch = self._queued.get(dpid)
+        if batch is None:
+            batch = self._queued[dpid] = FlowBatch(dpid)
+        return batch
+
+    def pending(self, dpid=None):
+        if dpid is None:
+            return sum(len(batch.msgs) for batch in self._queued.values())
+        batch = self._queued.get(dpid)
+        return len(batch.msgs) if batch else 0
+
+    # Thêm message vào lô của datapath
+    def queue(self, datapath, msg):
+        self._batch(datapath.id).msgs.append((datapath, msg))
+
+    # Đăng ký callback(ok) chạy khi lô hiện tại của dpid được xác nhận
+    def on_commit(self, dpid, callback):
+        self._batch(dpid).callbacks.append(callback)
+
+    # Dò xem switch có hỗ trợ bundle không (gọi khi switch kết nối)
+    def probe(self, datapath):
+        self.bundle_support.pop(datapath.id, None)
+        self._drop_datapath(datapath.id)
+        if not self.use_bundles:
+            self.bundle_support[datapath.id] = False
+            return
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        bundle_id = next(self._bundle_ids)
+        req = parser.ONFBundleCtrlMsg(datapath, bundle_id, ofproto.ONF_BCT_OPEN_REQUEST,
+                                      ofproto.ONF_BF_ATOMIC, [])
+        datapath.set_xid(req)
+        self._probes[(datapath.id, req.xid)] = bundle_id
+        datapath.send_msg(req)
+
+    # Gửi toàn bộ các lô đang gom
+    def flush(self, now):
+        queued, self._queued = self._queued, {}
+        for dpid, batch in queued.items():
+            if not batch.msgs:
+                # Không có gì cần gửi → xác nhận ngay
+                for callback in batch.callbacks:
+                    callback(True)
+                continue
+            datapath = batch.msgs[-1][0]
+            batch.started = now
+            if self.bundle_support.get(dpid):
+                self._send_bundle(datapath, batch)
+            else:
+                self._send_barrier(datapath, batch)
+            self._inflight[(dpid, batch.confirm_xid)] = batch
+
+    def _send(self, datapath, batch, msg):
+        datapath.set_xid(msg)
+        batch.xids.append(msg.xid)
+        self._by_xid[(batch.dpid, msg.xid)] = batch
+        datapath.send_msg(msg)
+        return msg.xid
+
+    def _send_barrier(self, datapath, batch):
+        for dp, msg in batch.msgs:
+            self._send(dp, batch, msg)
+        batch.confirm_xid = self._send(datapath, batch, datapath.ofproto_parser.OFPBarrierRequest(datapath))
+
+    def _send_bundle(self, datapath, batch):
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        flags = ofproto.ONF_BF_ATOMIC | ofproto.ONF_BF_ORDERED
+        batch.bundle_id = next(self._bundle_ids)
+        self._send(datapath, batch, parser.ONFBundleCtrlMsg(
+            datapath, batch.bundle_id, ofproto.ONF_BCT_OPEN_REQUEST, flags, []))
+        for dp, msg in batch.msgs:
+            self._send(dp, batch, parser.ONFBundleAddMsg(dp, batch.bundle_id, flags, msg, []))
+        batch.confirm_xid = self._send(datapath, batch, parser.ONFBundleCtrlMsg(
+            datapath, batch.bundle_id, ofproto.ONF_BCT_COMMIT_REQUEST, flags, []))
+
+    # Nhận barrier reply hoặc bundle commit reply → hoàn tất lô
+    def confirm(self, dpid, xid, now):
+        batch = self._inflight.pop((dpid, xid), None)
+        if batch is None:
+            return None
+        self._finish(batch, not batch.failed, now)
+        return batch
+
+    # Nhận bundle control reply; trả về True nếu reply thuộc lần dò
+    def bundle_reply(self, datapath, msg, now):
+        ofproto = datapath.ofproto
+        bundle_id = self._probes.pop((datapath.id, msg.xid), None)
+        if bundle_id is not None:
+            # Switch hỗ trợ bundle → hủy bundle dùng để dò
+            self.bundle_support[datapath.id] = True
+            datapath.send_msg(datapath.ofproto_parser.ONFBundleCtrlMsg(
+                datapath, bundle_id, ofproto.ONF_BCT_DISCARD_REQUEST, ofproto.ONF_BF_ATOMIC, []))
+            return True
+        if msg.type == ofproto.ONF_BCT_COMMIT_REPLY:
+            self.confirm(datapath.id, msg.xid, now)
+        return False
+
+    # Nhận thông báo lỗi; đánh dấu lô chứa message lỗi là thất bại
+    def error(self, dpid, xid, now):
+        if self._probes.pop((dpid, xid), None) is not None:
+            self.bundle_support[dpid] = False
+            return None
+        batch = self._by_xid.get((dpid, xid))
+        if batch is None:
+            return None
+        batch.failed = True
+        if xid == batch.confirm_xid:
+            # Lỗi ngay tại commit → không còn reply nào nữa
+            self._inflight.pop((dpid, xid), None)
+            self._finish(batch, False, now)
+        return batch
+
+    # Lô chờ quá timeout giây mà chưa được xác nhận → coi là thất bại
+    def expire(self, now, timeout):
+        expired = [key for key, batch in self._inflight.items() if now - batch.started > timeout]
+        for key in expired:
+            self._finish(self._inflight.pop(key), False, now)
+        return len(expired)
+
+    # Switch ngắt kết nối → hủy mọi lô của nó
+    def drop(self, dpid, now):
+        batch = self._queued.pop(dpid, None)
+        if batch is not None:
+            for callback in batch.callbacks:
+                callback(False)
+        for key in [key for key in self._inflight if key[0] == dpid]:
+            self._finish(self._inflight.pop(key), False, now)
+        self._drop_datapath(dpid)
+
+    def _drop_datapath(self, dpid):
+        for key in [key for key in self._probes if key[0] == dpid]:
+            del self._probes[key]
+
+    def _finish(self, batch, ok, now):
+        for xid in batch.xids:
+            self._by_xid.pop((batch.dpid, xid), None)
+        latency = now - batch.started
+        self.latencies.append((batch.dpid, len(batch.msgs), latency, ok))
+        self.logger.info(f"Flow batch on AP {batch.dpid}: {len(batch.msgs)} messages "
+                         f"{'committed' if ok else 'failed'} in {latency * 1000:.1f} ms")
+        if ok:
+            self.committed += 1
+        else:
+            self.failed += 1
+        for callback in batch.callbacks:
+            callback(ok)
+
+    # Thống kê độ trễ các lô gần đây (ms)
+    def summary(self):
+        latencies = [latency * 1000 for _, _, latency, _ in self.latencies]
+        return {
+            "committed": self.committed,
+            "failed": self.failed,
+            "in_flight": len(self._inflight),
+            "last_ms": round(latencies[-1], 3) if latencies else None,
+            "avg_ms": round(sum(latencies) / len(latencies), 3) if latencies else None,
+            "max_ms": round(max(latencies), 3) if latencies else None,
+        }
@@ -0,0 +1,95 @@
+from collections import defaultdict
+
+OFPAT_OUTPUT = 0  # Loại action output trong OpenFlow 1.3
+
+
+# Khóa của một flow: (priority, các trường match đã sắp xếp)
+def flow_key(priority, match):
+    return (priority, tuple(sorted(match.items())))
+
+
+# Khóa của danh sách action: (loại, cổng) của từng action, lấy từ giá trị thuần
+# thay vì str() đối tượng action của ryu (rất chậm)
+def actions_key(actions):
+    return tuple((action.type, getattr(action, 'port', None)) for action in actions)
+
+
+# Khóa của một action output duy nhất, tính được trước khi dựng đối tượng action
+def output_key(out_port):
+    return ((OFPAT_OUTPUT, out_port),)
+
+
+# Bộ nhớ đệm các flow đã cài trên từng datapath để không gửi lại FlowMod trùng
+# và biết flow nào cần xóa khi client chuyển AP. Đồng bộ với switch qua
+# EventOFPFlowRemoved (flow hết idle/hard timeout hoặc bị xóa).
+class FlowCache(object):
+    def __init__(self):
+        self._flows = defaultdict(dict)  # dpid → {khóa flow: khóa actions}
+        self._by_mac = defaultdict(lambda: defaultdict(set))  # dpid → MAC → {khóa flow}
+        self.installed = 0  # Số FlowMod thêm flow đã gửi
+        self.suppressed = 0  # Số FlowMod trùng đã bỏ qua
+
+    def __len__(self):
+        return sum(len(flows) for flows in self._flows.values())
+
+    def count(self, dpid):
+        return len(self._flows.get(dpid, ()))
+
+    # Ghi nhận flow (match là OFPMatch hoặc dict các trường, actions là khóa từ
+    # actions_key/output_key); trả về False nếu flow giống hệt đã được cài trên switch
+    def add(self, dpid, priority, match, actions):
+        key = flow_key(priority, match)
+        flows = self._flows[dpid]
+        if flows.get(key) == actions:
+            self.suppressed += 1
+            return False
+        flows[key] = actions
+        for field in ('eth_src', 'eth_dst'):
+            if field in match:
+                self._by_mac[dpid][match[field]].add(key)
+        self.installed += 1
+        return True
+
+    # Ghi nhận flow đã có sẵn trên switch (đối chiếu khi switch kết nối lại), không tính là đã cài
+    def adopt(self, dpid, priority, match, actions):
+        if self.add(dpid, priority, match, actions):
+            self.installed -= 1
+
+    # Xóa một flow khỏi cache (khi nhận FlowRemoved)
+    def remove(self, dpid, priority, match):
+        key = flow_key(priority, match)
+        if self._flows.get(dpid, {}).pop(key, None) is None:
+            return False
+        macs = self._by_mac.get(dpid)
+        if macs is not None:
+            for field in ('eth_src', 'eth_dst'):
+                if field in match:
+                    keys = macs.get(match[field])
+                    if keys is not None:
+                        keys.discard(key)
+                        if not keys:
+                            del macs[match[field]]
+        return True
+
+    # Xóa mọi flow có eth_src hoặc eth_dst là mac; trả về số flow đã xóa
+    def pop_mac(self, dpid, mac):
+        macs = self._by_mac.get(dpid)
+        if macs is None:
+            return 0
+        keys = macs.pop(mac, set())
+        flows = self._flows.get(dpid, {})
+        for key in keys:
+            flows.pop(key, None)
+            for field, value in key[1]:
+                if field in ('eth_src', 'eth_dst') and value != mac:
+                    other = macs.get(value)
+                    if other is not None:
+                        other.discard(key)
+                        if not other:
+                            del macs[value]
+        return len(keys)
+
+    # Quên toàn bộ flow của một datapath (switch ngắt kết nối)
+    def clear(self, dpid):
+        self._flows.pop(dpid, None)
+        self._by_mac.pop(dpid, None)
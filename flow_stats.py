@@ -0,0 +1,117 @@
+from client_table import mac_to_int
+from flow_cache import flow_key
+
+# Cookie của flow theo client: 16 bit cao là nhãn, 48 bit thấp là MAC của client
+# (eth_src). Nhờ nhãn, OFPFlowStatsRequest chỉ cần lọc theo cookie/cookie_mask để
+# switch trả về đúng các flow của client thay vì toàn bộ bảng flow.
+CLIENT_COOKIE_TAG = 0x5344 << 48
+CLIENT_COOKIE_TAG_MASK = 0xFFFF << 48
+_MAC_MASK = (1 << 48) - 1
+
+
+def client_cookie(mac):
+    return CLIENT_COOKIE_TAG | mac
+
+
+# MAC của client từ cookie; None nếu không phải flow của client
+def cookie_mac(cookie):
+    if cookie & CLIENT_COOKIE_TAG_MASK != CLIENT_COOKIE_TAG:
+        return None
+    return cookie & _MAC_MASK
+
+
+# Đếm lưu lượng theo client từ flow stats. Mỗi flow được nhớ bộ đếm lần trước để
+# chỉ cộng phần chênh lệch; flow bị xóa (FlowRemoved) được cộng nốt phần cuối.
+# Flow của một AP được chia thành `shards` phần theo bit thấp của MAC trong
+# cookie, mỗi lần hỏi một phần để reply nhỏ khi AP có rất nhiều flow.
+class FlowAccounting(object):
+    def __init__(self, shards=1):
+        if shards < 1 or shards & (shards - 1):
+            raise ValueError("shards must be a power of two")
+        self.shards = shards
+        self._last = {}  # dpid → {khóa flow: (byte, gói) lần trước}
+        self._next_shard = {}  # dpid → phần sẽ hỏi tiếp theo
+        self._requests = {}  # (dpid, xid) → phần đã hỏi
+        self._sweep_start = {}  # dpid → thời điểm bắt đầu lượt hỏi hiện tại
+        self._pending = {}  # dpid → {MAC: [tx_byte, rx_byte]} cộng dồn trong lượt hỏi
+        self.flows_seen = 0
+
+    # (cookie, cookie_mask) cho lần hỏi tiếp theo của AP
+    def next_filter(self, dpid):
+        shard = self._next_shard.get(dpid, 0)
+        return CLIENT_COOKIE_TAG | shard, CLIENT_COOKIE_TAG_MASK | (self.shards - 1)
+
+    # Ghi nhận đã gửi request (xid) cho phần hiện tại và chuyển sang phần kế tiếp
+    def sent(self, dpid, xid, now):
+        shard = self._next_shard.get(dpid, 0)
+        if shard == 0:
+            self._sweep_start.setdefault(dpid, now)
+        self._requests[(dpid, xid)] = shard
+        self._next_shard[dpid] = (shard + 1) % self.shards
+
+    # Xử lý một phần reply; trả về danh sách (mac nguồn, mac đích, Δbyte, Δgói)
+    def flow_stats(self, dpid, stats):
+        deltas = []
+        pending = self._pending.setdefault(dpid, {})
+        flows = self._last.setdefault(dpid, {})
+        for stat in stats:
+            src = cookie_mac(stat.cookie)
+            if src is None:
+                continue
+            self.flows_seen += 1
+            key = flow_key(stat.priority, stat.match)
+            last = flows.get(key)
+            if last is None or stat.byte_count < last[0]:
+                last = (0, 0)  # Flow mới hoặc đã được cài lại
+            flows[key] = (stat.byte_count, stat.packet_count)
+            deltas.append(self._delta(pending, src, stat.match, stat.byte_count - last[0],
+                                      stat.packet_count - last[1]))
+        return deltas
+
+    # Reply cuối của một request; trả về (thời gian lượt hỏi, {MAC: [tx_byte, rx_byte]})
+    # khi vừa hỏi xong mọi phần của AP, ngược lại None
+    def reply_done(self, dpid, xid, now):
+        shard = self._requests.pop((dpid, xid), None)
+        if shard != self.shards - 1 or dpid not in self._sweep_start:
+            return None
+        elapsed = now - self._sweep_start[dpid]
+        self._sweep_start[dpid] = now
+        return elapsed, self._pending.pop(dpid, {})
+
+    # Lấy bộ đếm hiện tại của các flow làm mốc mà không cộng vào lưu lượng của client
+    # (flow đã có trên switch từ trước khi controller khởi động lại)
+    def baseline(self, dpid, stats):
+        flows = self._last.setdefault(dpid, {})
+        for stat in stats:
+            flows[flow_key(stat.priority, stat.match)] = (stat.byte_count, stat.packet_count)
+
+    # Flow của client bị xóa → cộng phần lưu lượng cuối; None nếu không phải flow của client
+    def flow_removed(self, dpid, msg):
+        src = cookie_mac(msg.cookie)
+        if src is None:
+            return None
+        last = self._last.get(dpid, {}).pop(flow_key(msg.priority, msg.match), (0, 0))
+        if msg.byte_count < last[0]:
+            last = (0, 0)
+        return self._delta(self._pending.setdefault(dpid, {}), src, msg.match,
+                           msg.byte_count - last[0], msg.packet_count - last[1])
+
+    def _delta(self, pending, src, match, byte_delta, packet_delta):
+        dst = match.get('eth_dst')
+        dst = mac_to_int(dst) if dst is not None else None
+        pending.setdefault(src, [0, 0])[0] += byte_delta
+        if dst is not None:
+            pending.setdefault(dst, [0, 0])[1] += byte_delta
+        return src, dst, byte_delta, packet_delta
+
+    # Switch ngắt kết nối → quên mọi bộ đếm của nó
+    def drop(self, dpid):
+        self._last.pop(dpid, None)
+        for key in [key for key in self._requests if key[0] == dpid]:
+            del self._requests[key]
+        self._next_shard.pop(dpid, None)
+        self._sweep_start.pop(dpid, None)
+        self._pending.pop(dpid, None)
+
+    def __len__(self):
+        return sum(len(flows) for flows in self._last.values())
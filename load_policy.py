@@ -0,0 +1,118 @@
+import math
+from collections import namedtuple
+
+# Trạng thái của một AP dùng để chấm điểm tải
+#   clients: số client (kể cả lượt chuyển đang chờ), rate_bps: tổng tốc độ EWMA rx+tx,
+#   co_channel: số AP khác đang hoạt động trên kênh chồng lấn
+APState = namedtuple('APState', 'dpid clients max_clients rate_bps capacity_bps channel co_channel')
+
+
+# Hai kênh có chồng lấn không: 2.4 GHz (1–14) chồng lấn khi cách nhau dưới 5 kênh,
+# 5 GHz chỉ khi trùng kênh
+def channels_overlap(a, b):
+    if a is None or b is None:
+        return False
+    if a > 14 or b > 14:
+        return a == b
+    return abs(a - b) < 5
+
+
+# Số AP khác trên kênh chồng lấn với từng AP; channels: dpid → kênh
+def co_channel_counts(channels):
+    per_channel = {}
+    for channel in channels.values():
+        per_channel[channel] = per_channel.get(channel, 0) + 1
+    counts = {}
+    for dpid, channel in channels.items():
+        if channel is None:
+            counts[dpid] = 0
+            continue
+        overlapping = sum(count for other, count in per_channel.items() if channels_overlap(channel, other))
+        counts[dpid] = overlapping - 1  # Không tính chính AP này
+    return counts
+
+
+# Kiểm tra cấu hình một AP trước khi dùng để chấm điểm; ValueError nếu không hợp lệ
+def check_ap_profile(dpid, max_clients, capacity_bps):
+    if not max_clients > 0:
+        raise ValueError(f"AP {dpid}: max_clients must be > 0, got {max_clients!r}")
+    if not (capacity_bps > 0 and math.isfinite(capacity_bps)):
+        raise ValueError(f"AP {dpid}: capacity_bps must be a finite number > 0, got {capacity_bps!r}")
+
+
+# Chính sách chấm điểm tải: score(ap) là mức tải (1.0 = đầy), admits(ap) cho biết
+# AP còn nhận thêm client không. Tham số của chính sách truyền qua keyword và
+# được kiểm tra với `defaults` và khoảng cho phép `bounds` (tên → (min, max),
+# None = không giới hạn); tham số lạ hoặc ngoài khoảng → ValueError.
+class LoadPolicy(object):
+    name = None
+    defaults = {}
+    bounds = {}
+
+    def __init__(self, **params):
+        unknown = set(params) - set(self.defaults)
+        if unknown:
+            raise ValueError(f"Unknown parameters for policy {self.name}: {sorted(unknown)}")
+        self.params = dict(self.defaults, **{key: float(value) for key, value in params.items()})
+        for key, value in self.params.items():
+            low, high = self.bounds.get(key, (None, None))
+            if not math.isfinite(value) or (low is not None and value < low) or (high is not None and value > high):
+                raise ValueError(f"Parameter {key} of policy {self.name} must be a finite number in "
+                                 f"[{'-inf' if low is None else low}, {'inf' if high is None else high}], "
+                                 f"got {value}")
+
+    def score(self, ap):
+        raise NotImplementedError
+
+    def admits(self, ap):
+        return ap.clients < ap.max_clients and self.score(ap) < 1.0
+
+    def describe(self):
+        return {"name": self.name, "params": self.params}
+
+
+# Chỉ đếm client (cách cũ): tải = số client / số client tối đa
+class ClientCountPolicy(LoadPolicy):
+    name = 'client_count'
+
+    def score(self, ap):
+        return ap.clients / ap.max_clients
+
+
+# Chỉ xét lưu lượng: tải = tốc độ hiện tại / dung lượng của AP
+class ThroughputPolicy(LoadPolicy):
+    name = 'throughput'
+
+    def score(self, ap):
+        return ap.rate_bps / ap.capacity_bps
+
+
+# Kết hợp số client và lưu lượng; dung lượng hiệu dụng của AP giảm khi có AP khác
+# trên kênh chồng lấn (chia sẻ thời gian phát). AP nhận thêm client khi chưa đủ
+# số client tối đa và lưu lượng chưa vượt dung lượng hiệu dụng.
+class WeightedPolicy(LoadPolicy):
+    name = 'weighted'
+    defaults = {'client_weight': 0.4, 'rate_weight': 0.6, 'co_channel_share': 0.5}
+    bounds = {'client_weight': (0.0, None), 'rate_weight': (0.0, None), 'co_channel_share': (0.0, 1.0)}
+
+    def utilization(self, ap):
+        capacity = ap.capacity_bps / (1 + self.params['co_channel_share'] * ap.co_channel)
+        return ap.rate_bps / capacity
+
+    def score(self, ap):
+        return (self.params['client_weight'] * ap.clients / ap.max_clients
+                + self.params['rate_weight'] * self.utilization(ap))
+
+    def admits(self, ap):
+        return ap.clients < ap.max_clients and self.utilization(ap) < 1.0
+
+
+POLICIES = {policy.name: policy for policy in (ClientCountPolicy, ThroughputPolicy, WeightedPolicy)}
+
+
+# Tạo chính sách theo tên; ValueError nếu tên hoặc tham số không hợp lệ
+def make_policy(name, **params):
+    policy = POLICIES.get(name)
+    if policy is None:
+        raise ValueError(f"Unknown load policy {name!r}, expected one of {sorted(POLICIES)}")
+    return policy(**params)
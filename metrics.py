@@ -0,0 +1,160 @@
+import math
+import time
+from bisect import bisect_left
+from functools import wraps
+
+# Mốc histogram mặc định cho thời gian xử lý (giây): 50 µs … 2.5 s
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class Counter(object):
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+# Histogram với các mốc cố định: observe chỉ tìm nhị phân mốc và tăng một ô đếm,
+# phần cộng dồn (cumulative) theo định dạng Prometheus chỉ tính khi xuất
+class Histogram(object):
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Ô cuối là +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+# Một metric (có thể có nhãn); labels(...) trả về bộ đếm con theo giá trị nhãn.
+# Metric không nhãn dùng trực tiếp inc()/observe()
+class Metric(object):
+    def __init__(self, kind, name, help_text, labelnames, factory):
+        self.kind = kind
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self._children = {}
+        self._default = None if self.labelnames else self.labels()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[values] = self._factory()
+        return child
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def samples(self):
+        for values, child in self._children.items():
+            labels = dict(zip(self.labelnames, values))
+            if self.kind == 'histogram':
+                cumulative = 0
+                for bound, count in zip(child.buckets + (math.inf,), child.counts):
+                    cumulative += count
+                    yield self.name + '_bucket', dict(labels, le=_format(bound)), cumulative
+                yield self.name + '_sum', labels, child.sum
+                yield self.name + '_count', labels, child.count
+            else:
+                yield self.name, labels, child.value
+
+
+# Metric được tính lúc xuất từ một hàm: func() trả về số, hoặc danh sách
+# (giá trị nhãn, số) nếu có labelnames
+class CallbackMetric(object):
+    def __init__(self, kind, name, help_text, func, labelnames=()):
+        self.kind = kind
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._func = func
+
+    def samples(self):
+        value = self._func()
+        if not self.labelnames:
+            yield self.name, {}, value
+            return
+        for values, sample in value:
+            yield self.name, dict(zip(self.labelnames, values)), sample
+
+
+def _format(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(value) if isinstance(value, float) else str(int(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+# Tập các metric, xuất theo định dạng văn bản của Prometheus (text format 0.0.4)
+class MetricsRegistry(object):
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric, replace=False):
+        if metric.name in self._metrics and not replace:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Metric('counter', name, help_text, labelnames, Counter))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        buckets = tuple(sorted(buckets))
+        return self._register(Metric('histogram', name, help_text, labelnames, lambda: Histogram(buckets)))
+
+    # Metric tính lúc xuất; đăng ký lại cùng tên sẽ thay hàm cũ (app được tạo lại)
+    def gauge_callback(self, name, help_text, func, labelnames=()):
+        return self._register(CallbackMetric('gauge', name, help_text, func, labelnames), replace=True)
+
+    def counter_callback(self, name, help_text, func, labelnames=()):
+        return self._register(CallbackMetric('counter', name, help_text, func, labelnames), replace=True)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                if labels:
+                    label_text = ','.join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                    lines.append(f"{name}{{{label_text}}} {_format(value)}")
+                else:
+                    lines.append(f"{name} {_format(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()  # Registry mặc định của controller
+
+
+# Decorator đo thời gian chạy của hàm vào một histogram (kể cả khi hàm ném lỗi)
+def timed(histogram, clock=time.perf_counter):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(clock() - start)
+        return wrapper
+    return decorator
@@ -0,0 +1,149 @@
+import numpy as np
+
+
+# Bộ đệm vòng kích thước cố định chứa các mẫu (thời gian, rx_bytes, tx_bytes)
+# của một cổng. Tốc độ (bit/giây), EWMA và phân vị được tính bằng NumPy trên
+# toàn bộ cửa sổ thay vì từng mẫu một.
+class PortStatsRing(object):
+    def __init__(self, capacity=120, alpha=0.3):
+        self.capacity = capacity
+        self.alpha = alpha  # Hệ số làm mượt EWMA
+        self._data = np.zeros((capacity, 3), dtype=np.float64)  # cột: t, rx, tx
+        self._next = 0
+        self._size = 0
+        self.ewma_rx_bps = None
+        self.ewma_tx_bps = None
+
+    def __len__(self):
+        return self._size
+
+    def append(self, t, rx_bytes, tx_bytes):
+        if self._size:
+            last = self._data[(self._next - 1) % self.capacity]
+            dt = t - last[0]
+            if dt <= 0:
+                return
+            rx_bps = float(max(rx_bytes - last[1], 0) * 8 / dt)
+            tx_bps = float(max(tx_bytes - last[2], 0) * 8 / dt)
+            if self.ewma_rx_bps is None:
+                self.ewma_rx_bps, self.ewma_tx_bps = rx_bps, tx_bps
+            else:
+                self.ewma_rx_bps += self.alpha * (rx_bps - self.ewma_rx_bps)
+                self.ewma_tx_bps += self.alpha * (tx_bps - self.ewma_tx_bps)
+        self._data[self._next] = (t, rx_bytes, tx_bytes)
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    # Các mẫu theo thứ tự thời gian, mảng (n, 3)
+    def samples(self):
+        if self._size < self.capacity:
+            return self._data[:self._size]
+        return np.roll(self._data, -self._next, axis=0)
+
+    # Tốc độ giữa các mẫu liên tiếp: (thời điểm, rx_bps, tx_bps);
+    # bộ đếm bị reset (giảm) được tính là 0
+    def rates(self, window=None):
+        data = self.samples()
+        if window is not None and len(data):
+            data = data[data[:, 0] >= data[-1, 0] - window]
+        if len(data) < 2:
+            empty = np.empty(0)
+            return empty, empty, empty
+        dt = np.diff(data[:, 0])
+        delta = np.clip(np.diff(data[:, 1:], axis=0), 0, None) * 8
+        return data[1:, 0], delta[:, 0] / dt, delta[:, 1] / dt
+
+    # Tốc độ của khoảng gần nhất (rx_bps, tx_bps); None nếu chưa đủ 2 mẫu
+    def latest_rate(self):
+        if self._size < 2:
+            return None
+        last = self._data[(self._next - 1) % self.capacity]
+        prev = self._data[(self._next - 2) % self.capacity]
+        dt = last[0] - prev[0]
+        return float(max(last[1] - prev[1], 0) * 8 / dt), float(max(last[2] - prev[2], 0) * 8 / dt)
+
+    # EWMA tính vector hóa trên chuỗi tốc độ trong cửa sổ
+    def ewma_series(self, window=None):
+        t, rx, tx = self.rates(window)
+        if not len(t):
+            return t, rx, tx
+        n = len(t)
+        decay = (1 - self.alpha) ** np.arange(n - 1, -1, -1)
+        weights = self.alpha * decay
+        weights[0] = decay[0]  # Mẫu đầu làm giá trị khởi tạo
+        cum = np.cumsum(np.stack([rx, tx]) * weights, axis=1) / decay
+        return t, cum[0], cum[1]
+
+    # Phân vị tốc độ trong cửa sổ `window` giây gần nhất
+    def percentiles(self, window=None, qs=(50, 95, 99)):
+        _, rx, tx = self.rates(window)
+        if not len(rx):
+            return None
+        return {
+            "rx_bps": dict(zip(qs, np.percentile(rx, qs).tolist())),
+            "tx_bps": dict(zip(qs, np.percentile(tx, qs).tolist())),
+        }
+
+
+# Lịch sử thống kê cổng của mọi AP: (dpid, port) → PortStatsRing
+class PortStatsHistory(object):
+    def __init__(self, capacity=120, alpha=0.3):
+        self.capacity = capacity
+        self.alpha = alpha
+        self._rings = {}  # dpid → {port: PortStatsRing}
+
+    def record(self, dpid, port, t, rx_bytes, tx_bytes):
+        ports = self._rings.setdefault(dpid, {})
+        ring = ports.get(port)
+        if ring is None:
+            ring = ports[port] = PortStatsRing(self.capacity, self.alpha)
+        ring.append(t, rx_bytes, tx_bytes)
+
+    def ring(self, dpid, port):
+        return self._rings.get(dpid, {}).get(port)
+
+    def ports(self, dpid):
+        return self._rings.get(dpid, {})
+
+    def dpids(self):
+        return list(self._rings)
+
+    def drop(self, dpid):
+        self._rings.pop(dpid, None)
+
+    # Tổng tốc độ gần nhất của mọi cổng trên AP (rx_bps, tx_bps); None nếu chưa đủ mẫu
+    def ap_rate(self, dpid):
+        rates = [ring.latest_rate() for ring in self.ports(dpid).values()]
+        rates = [rate for rate in rates if rate is not None]
+        if not rates:
+            return None
+        return sum(rate[0] for rate in rates), sum(rate[1] for rate in rates)
+
+    # Tổng tốc độ EWMA của mọi cổng trên AP (rx_bps, tx_bps)
+    def ap_ewma(self, dpid):
+        rings = [ring for ring in self.ports(dpid).values() if ring.ewma_rx_bps is not None]
+        return (sum(ring.ewma_rx_bps for ring in rings),
+                sum(ring.ewma_tx_bps for ring in rings))
+
+    # Thông tin tốc độ của một cổng để trả về qua REST
+    def port_summary(self, dpid, port, window=None, series=False):
+        ring = self.ring(dpid, port)
+        if ring is None:
+            return None
+        latest = ring.latest_rate()
+        summary = {
+            "rx_bps": latest[0] if latest else None,
+            "tx_bps": latest[1] if latest else None,
+            "ewma_rx_bps": ring.ewma_rx_bps,
+            "ewma_tx_bps": ring.ewma_tx_bps,
+            "samples": len(ring),
+            "percentiles": ring.percentiles(window),
+        }
+        if series:
+            t, rx, tx = ring.rates(window)
+            _, ewma_rx, ewma_tx = ring.ewma_series(window)
+            summary["series"] = {
+                "time": t.tolist(), "rx_bps": rx.tolist(), "tx_bps": tx.tolist(),
+                "ewma_rx_bps": ewma_rx.tolist(), "ewma_tx_bps": ewma_tx.tolist(),
+            }
+        return summary
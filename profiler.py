@@ -0,0 +1,62 @@
+import signal
+import time
+from collections import Counter
+
+
+# Bộ lấy mẫu stack theo tín hiệu SIGPROF: mỗi `interval` giây thời gian CPU của tiến
+# trình, handler ghi lại stack đang chạy trên luồng chính (với eventlet là green
+# thread đang giữ hub). Chi phí chỉ phát sinh khi đang lấy mẫu. Kết quả ở dạng
+# "folded stacks" (hàm ngoài;...;hàm trong số_mẫu) dùng được với flamegraph.pl.
+class StackSampler(object):
+    def __init__(self, max_depth=64):
+        self.max_depth = max_depth
+        self.samples = Counter()
+        self.total = 0
+        self.running = False
+        self.started = None
+        self._old_handler = None
+
+    # ValueError nếu interval không phải số giây dương; handler SIGPROF cũ được giữ
+    # nguyên nếu không đặt được timer
+    def start(self, interval=0.005):
+        if self.running:
+            raise RuntimeError("Sampler already running")
+        if not 0 < interval < float('inf'):
+            raise ValueError(f"Sampling interval must be a positive number of seconds, got {interval}")
+        self.samples.clear()
+        self.total = 0
+        self._old_handler = signal.signal(signal.SIGPROF, self._sample)
+        try:
+            signal.setitimer(signal.ITIMER_PROF, interval, interval)
+        except (signal.ItimerError, OverflowError, ValueError):
+            signal.signal(signal.SIGPROF, self._old_handler or signal.SIG_DFL)
+            raise
+        self.running = True
+        self.started = time.time()
+
+    def stop(self):
+        if not self.running:
+            return
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self._old_handler or signal.SIG_DFL)
+        self.running = False
+
+    def _sample(self, signum, frame):
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            code = frame.f_code
+            stack.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}:{frame.f_lineno}")
+            frame = frame.f_back
+        self.samples[';'.join(reversed(stack))] += 1
+        self.total += 1
+
+    # Các stack có nhiều mẫu nhất, mỗi dòng "stack số_mẫu"
+    def folded(self, top=None):
+        return '\n'.join(f"{stack} {count}" for stack, count in self.samples.most_common(top)) + '\n'
+
+    # Số mẫu theo hàm đang chạy (đỉnh stack), giúp tìm điểm nóng nhanh
+    def hot_functions(self, top=20):
+        leaves = Counter()
+        for stack, count in self.samples.items():
+            leaves[stack.rsplit(';', 1)[-1].rsplit(':', 1)[0]] += count
+        return leaves.most_common(top)
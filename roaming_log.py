@@ -0,0 +1,211 @@
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from itertools import islice
+
+from client_table import int_to_mac, mac_to_int
+
+WRITE_BATCH = 500  # Số sự kiện tối đa ghi trong một transaction
+PRUNE_INTERVAL = 3600  # Chu kỳ xóa sự kiện quá hạn lưu giữ (giây)
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS roaming_events (
+    id INTEGER PRIMARY KEY,
+    time REAL NOT NULL,
+    mac INTEGER NOT NULL,
+    from_ap INTEGER,
+    to_ap INTEGER,
+    reason TEXT,
+    rssi REAL,
+    target_rssi REAL
+);
+CREATE INDEX IF NOT EXISTS roaming_events_time ON roaming_events (time);
+CREATE INDEX IF NOT EXISTS roaming_events_mac_time ON roaming_events (mac, time);
+CREATE INDEX IF NOT EXISTS roaming_events_from_time ON roaming_events (from_ap, time);
+CREATE INDEX IF NOT EXISTS roaming_events_to_time ON roaming_events (to_ap, time);
+'''
+_COLUMNS = ('time', 'mac', 'from_ap', 'to_ap', 'reason', 'rssi', 'target_rssi')
+_INSERT = f"INSERT INTO roaming_events ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})"
+
+
+def _row(event):
+    return (event["time"], mac_to_int(event["mac"]), event["from_ap"], event["to_ap"],
+            event.get("reason"), event.get("rssi"), event.get("target_rssi"))
+
+
+def _event(row):
+    event = dict(zip(_COLUMNS, row))
+    event["mac"] = int_to_mac(event["mac"])
+    return event
+
+
+def _matches(event, mac, ap, start, end):
+    return ((mac is None or event["mac"] == mac)
+            and (ap is None or event["from_ap"] == ap or event["to_ap"] == ap)
+            and (start is None or event["time"] >= start)
+            and (end is None or event["time"] < end))
+
+
+# Các lần chuyển qua lại (ping-pong): client rời AP A sang B rồi quay lại A trong
+# vòng `window` giây. events phải được sắp theo thời gian.
+def ping_pongs(events, window):
+    last = {}  # MAC → sự kiện chuyển AP gần nhất
+    found = []
+    for event in events:
+        previous = last.get(event["mac"])
+        if (previous is not None and previous["to_ap"] == event["from_ap"]
+                and previous["from_ap"] == event["to_ap"] and event["time"] - previous["time"] <= window):
+            found.append({"mac": event["mac"], "ap": previous["from_ap"], "via_ap": previous["to_ap"],
+                          "left": previous["time"], "returned": event["time"],
+                          "dwell": event["time"] - previous["time"]})
+        last[event["mac"]] = event
+    return found
+
+
+# Vòng đệm sự kiện roaming trong bộ nhớ với dung lượng cố định: giữ `capacity`
+# sự kiện gần nhất, sự kiện cũ hơn chỉ còn trong RoamingLog (nếu có)
+class RoamingRing(object):
+    def __init__(self, capacity):
+        self._events = deque(maxlen=capacity)
+        self.total = 0  # Tổng số sự kiện đã ghi nhận kể từ khi khởi động
+
+    def append(self, event):
+        self._events.append(event)
+        self.total += 1
+
+    def recent(self, count):
+        return list(islice(reversed(self._events), count))[::-1]
+
+    # Tìm trong vòng đệm, kết quả sắp theo thời gian (limit: chỉ lấy các sự kiện mới nhất)
+    def query(self, mac=None, ap=None, start=None, end=None, limit=None):
+        found = [event for event in self._events if _matches(event, mac, ap, start, end)]
+        return found[-limit:] if limit else found
+
+    def __len__(self):
+        return len(self._events)
+
+    def __iter__(self):
+        return iter(self._events)
+
+
+# Nhật ký sự kiện roaming trên đĩa (SQLite, chỉ thêm), có chỉ mục theo thời gian,
+# MAC và AP. Việc ghi chạy trên một luồng riêng theo lô; sự kiện cũ hơn `retention`
+# giây được xóa định kỳ. `offload(func, *args)` chạy các lệnh SQLite ngoài luồng gọi
+# (ví dụ eventlet.tpool.execute khi luồng bị eventlet monkey-patch thành green thread);
+# mỗi luồng đọc có kết nối riêng nên các truy vấn chạy song song không dùng chung kết nối.
+class RoamingLog(object):
+    def __init__(self, path, retention=None, logger=None, offload=None):
+        self.path = path
+        self.retention = retention
+        self.logger = logger
+        self._offload = offload or (lambda func, *args: func(*args))
+        self.written = 0
+        self.failed = 0
+        self._queue = queue.Queue()
+        self._local = threading.local()  # Kết nối đọc của từng luồng (db)
+        self._readers = []  # Mọi kết nối đọc đã mở, để đóng khi close()
+        self._readers_lock = threading.Lock()
+        db = self._connect()
+        db.execute('PRAGMA journal_mode=WAL')
+        db.executescript(_SCHEMA)
+        db.close()
+        self._thread = threading.Thread(target=self._write_loop, name='roaming-log', daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        db.execute('PRAGMA synchronous=NORMAL')
+        return db
+
+    def append(self, event):
+        self._queue.put_nowait(event)
+
+    def _write(self, db, batch, prune_before):
+        with db:
+            db.executemany(_INSERT, [_row(event) for event in batch])
+            if prune_before is not None:
+                db.execute('DELETE FROM roaming_events WHERE time < ?', (prune_before,))
+
+    def _write_loop(self):
+        db = self._connect()
+        last_prune = 0.0
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            while len(batch) < WRITE_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                running = False
+                batch = [event for event in batch if event is not None]
+            now = time.time()
+            prune_before = None
+            if self.retention and now - last_prune >= PRUNE_INTERVAL:
+                prune_before = now - self.retention
+                last_prune = now
+            try:
+                self._offload(self._write, db, batch, prune_before)
+                self.written += len(batch)
+            except (sqlite3.Error, ValueError, KeyError) as e:
+                self.failed += len(batch)
+                if self.logger is not None:
+                    self.logger.error(f"Failed to write {len(batch)} roaming events to {self.path}: {e}")
+        db.close()
+
+    # Sự kiện khớp điều kiện, sắp theo thời gian; limit: chỉ lấy các sự kiện mới nhất
+    def query(self, mac=None, ap=None, start=None, end=None, limit=None):
+        clauses, args = [], []
+        if mac is not None:
+            clauses.append('mac = ?')
+            args.append(mac_to_int(mac))
+        if ap is not None:
+            clauses.append('(from_ap = ? OR to_ap = ?)')
+            args.extend((ap, ap))
+        if start is not None:
+            clauses.append('time >= ?')
+            args.append(start)
+        if end is not None:
+            clauses.append('time < ?')
+            args.append(end)
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM roaming_events"
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY time DESC'
+        if limit:
+            sql += ' LIMIT ?'
+            args.append(limit)
+        rows = self._offload(self._read, sql, args)
+        return [_event(row) for row in reversed(rows)]
+
+    # Chạy truy vấn trên kết nối đọc của luồng hiện tại (mở khi cần)
+    def _read(self, sql, args):
+        local = self._local
+        db = getattr(local, 'db', None)
+        if db is None:
+            db = local.db = self._connect()
+            with self._readers_lock:
+                self._readers.append(db)
+        return db.execute(sql, args).fetchall()
+
+    def recent(self, count):
+        return self.query(limit=count)
+
+    def pending(self):
+        return self._queue.qsize()
+
+    # Ghi nốt các sự kiện đang chờ rồi dừng luồng ghi
+    def close(self, timeout=5):
+        self._queue.put(None)
+        self._thread.join(timeout)
+        with self._readers_lock:
+            readers, self._readers = self._readers, []
+            self._local = threading.local()
+        for db in readers:
+            db.close()
+
+    def summary(self):
+        return {"path": self.path, "written": self.written, "failed": self.failed, "pending": self.pending()}
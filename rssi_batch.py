@@ -0,0 +1,64 @@
+import struct
+
+from client_table import mac_to_int
+
+# Định dạng nhị phân của một lô RSSI: header (magic, số bản ghi) rồi các bản ghi
+# (MAC 6 byte, dpid AP, RSSI dBm có dấu, thời điểm đo). dpid 0 = không rõ AP.
+RSSI_BATCH_MAGIC = b'RSB1'
+RSSI_BATCH_CONTENT_TYPE = 'application/octet-stream'
+_HEADER = struct.Struct('!4sI')
+_RECORD = struct.Struct('!6sQbd')
+
+
+# Đóng gói danh sách (mac, ap, rssi, thời điểm) thành lô nhị phân; mac là chuỗi hoặc int
+def pack_rssi_batch(samples):
+    parts = [_HEADER.pack(RSSI_BATCH_MAGIC, len(samples))]
+    for mac, ap, rssi, ts in samples:
+        if isinstance(mac, str):
+            mac = mac_to_int(mac)
+        parts.append(_RECORD.pack(mac.to_bytes(6, 'big'), ap or 0, int(rssi), ts))
+    return b''.join(parts)
+
+
+# Giải mã lô nhị phân → danh sách (mac int, ap hoặc None, rssi, thời điểm).
+# ValueError nếu dữ liệu không đúng định dạng
+def unpack_rssi_batch(data):
+    if len(data) < _HEADER.size:
+        raise ValueError("RSSI batch too short")
+    magic, count = _HEADER.unpack_from(data, 0)
+    if magic != RSSI_BATCH_MAGIC:
+        raise ValueError("Bad RSSI batch magic")
+    if len(data) != _HEADER.size + count * _RECORD.size:
+        raise ValueError("RSSI batch length does not match record count")
+    return [(int.from_bytes(mac, 'big'), ap or None, rssi, ts)
+            for mac, ap, rssi, ts in _RECORD.iter_unpack(memoryview(data)[_HEADER.size:])]
+
+
+# Đọc một mẫu RSSI dạng JSON: mac là chuỗi, ap và thời điểm có thể là null, RSSI trong
+# khoảng của định dạng nhị phân. ValueError nếu mẫu không hợp lệ
+def parse_rssi_sample(mac, ap, rssi, ts):
+    try:
+        sample = (mac_to_int(mac), int(ap) if ap else None, int(rssi), float(ts) if ts is not None else None)
+    except (AttributeError, TypeError, ValueError, OverflowError) as e:
+        raise ValueError(f"Invalid RSSI sample: {e}")
+    if not 0 <= sample[0] < 1 << 48:
+        raise ValueError(f"Invalid RSSI sample: MAC out of range: {mac}")
+    if not -128 <= sample[2] <= 127:
+        raise ValueError(f"Invalid RSSI sample: RSSI out of range: {rssi}")
+    return sample
+
+
+# Đọc lô JSON: {"samples": [[mac, ap, rssi, thời điểm], ...]} hoặc chỉ danh sách.
+# ap và thời điểm có thể là null. ValueError nếu dữ liệu không đúng định dạng
+def parse_rssi_json(obj):
+    if isinstance(obj, dict):
+        obj = obj.get('samples')
+    if not isinstance(obj, list):
+        raise ValueError("Expected a list of RSSI samples")
+    samples = []
+    try:
+        for mac, ap, rssi, ts in obj:
+            samples.append(parse_rssi_sample(mac, ap, rssi, ts))
+    except TypeError as e:
+        raise ValueError(f"Invalid RSSI sample: {e}")
+    return samples
@@ -0,0 +1,251 @@
+import numpy as np
+
+_INFEASIBLE = 1e6  # Chi phí của cặp (client, AP) không thể gán
+_STAY_FAULTY = 1e5  # Chi phí để client ở lại AP lỗi (chỉ khi không còn AP nào nhận)
+ROAM_EXACT_MAX_CELLS = 10000  # Bài toán gán lớn hơn số ô này được giải tham lam thay vì chính xác
+
+
+# Bài toán gán chi phí nhỏ nhất (Hungarian, đường tăng ngắn nhất) cho ma trận
+# cost (n × m, n <= m): trả về mảng cột được gán cho mỗi hàng.
+# Vòng lặp trong được vector hóa theo cột, độ phức tạp O(n² · m).
+def min_cost_assignment(cost):
+    n, m = cost.shape
+    if n > m:
+        raise ValueError("More rows than columns")
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    owner = np.zeros(m + 1, dtype=np.int64)  # owner[j] = hàng (đánh số từ 1) đang giữ cột j
+    way = np.zeros(m + 1, dtype=np.int64)
+    for i in range(1, n + 1):
+        owner[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            free = ~used[1:]
+            better = free & (reduced < minv[1:])
+            minv[1:][better] = reduced[better]
+            way[1:][better] = j0
+            candidates = np.where(free, minv[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+            u[owner[used]] += delta
+            v[used] -= delta
+            minv[~used] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+    result = np.empty(n, dtype=np.int64)
+    assigned = np.nonzero(owner[1:])[0]
+    result[owner[1:][assigned] - 1] = assigned
+    return result
+
+
+# Ma trận RSSI đã làm mượt (EWMA) cho từng cặp (client, AP): hàng là slot của
+# client trong ClientTable, cột là AP. Kèm thời điểm đo gần nhất của từng ô và
+# thời điểm client bắt đầu ở AP hiện tại (để tính thời gian lưu lại tối thiểu).
+class RSSIMatrix(object):
+    def __init__(self, alpha=0.3, max_age=10, rows=64, cols=4):
+        self.alpha = alpha
+        self.max_age = max_age  # Ô không có mẫu mới trong số giây này bị bỏ qua
+        self._rssi = np.full((rows, cols), np.nan, dtype=np.float32)
+        self._seen = np.zeros((rows, cols), dtype=np.float64)
+        self._since = np.zeros(rows, dtype=np.float64)
+        self._col = {}  # dpid → cột
+        self._dpids = []  # cột → dpid
+        self._changed = set()  # Hàng có mẫu mới từ lần changed_rows() trước
+
+    def _column(self, dpid):
+        col = self._col.get(dpid)
+        if col is None:
+            col = self._col[dpid] = len(self._dpids)
+            self._dpids.append(dpid)
+            if col >= self._rssi.shape[1]:
+                self._grow(self._rssi.shape[0], col * 2)
+        return col
+
+    def _ensure_rows(self, rows):
+        if rows > self._rssi.shape[0]:
+            self._grow(max(rows, self._rssi.shape[0] * 2), self._rssi.shape[1])
+
+    def _grow(self, rows, cols):
+        old_rows, old_cols = self._rssi.shape
+        rssi = np.full((rows, cols), np.nan, dtype=np.float32)
+        seen = np.zeros((rows, cols), dtype=np.float64)
+        rssi[:old_rows, :old_cols] = self._rssi
+        seen[:old_rows, :old_cols] = self._seen
+        since = np.zeros(rows, dtype=np.float64)
+        since[:old_rows] = self._since
+        self._rssi, self._seen, self._since = rssi, seen, since
+
+    # Thêm một mẫu RSSI của client (slot) đo tại AP dpid
+    def update(self, slot, dpid, rssi, now):
+        col = self._column(dpid)
+        self._ensure_rows(slot + 1)
+        old = self._rssi[slot, col]
+        if np.isnan(old) or now - self._seen[slot, col] > self.max_age:
+            self._rssi[slot, col] = rssi
+        else:
+            self._rssi[slot, col] = old + self.alpha * (rssi - old)
+        self._seen[slot, col] = now
+        self._changed.add(slot)
+
+    # Client vừa được gán vào AP mới → bắt đầu tính thời gian lưu lại
+    def mark_attached(self, slot, now):
+        self._ensure_rows(slot + 1)
+        self._since[slot] = now
+
+    # Slot được giải phóng (client bị xóa) → xóa dữ liệu để slot dùng lại không bị lẫn
+    def clear(self, slot):
+        if slot < self._rssi.shape[0]:
+            self._rssi[slot] = np.nan
+            self._seen[slot] = 0
+            self._since[slot] = 0
+
+    # AP ngắt kết nối → bỏ mọi giá trị đo tại AP đó
+    def drop_ap(self, dpid):
+        col = self._col.get(dpid)
+        if col is not None:
+            self._rssi[:, col] = np.nan
+
+    # RSSI đã làm mượt của một client theo từng AP (bỏ các ô đã quá cũ)
+    def row(self, slot, now):
+        if slot >= self._rssi.shape[0]:
+            return {}
+        return {dpid: round(float(self._rssi[slot, col]), 1)
+                for col, dpid in enumerate(self._dpids)
+                if not np.isnan(self._rssi[slot, col]) and now - self._seen[slot, col] <= self.max_age}
+
+    # Các hàng mà row() đã đổi trong khoảng (since, now]: có mẫu mới hoặc có ô vừa quá max_age
+    def changed_rows(self, since, now):
+        changed, self._changed = self._changed, set()
+        seen = self._seen
+        expired = (seen >= since - self.max_age) & (seen < now - self.max_age) & ~np.isnan(self._rssi)
+        changed.update(np.nonzero(expired.any(axis=1))[0].tolist())
+        return changed
+
+    def value(self, slot, dpid, now):
+        col = self._col.get(dpid)
+        if col is None or slot >= self._rssi.shape[0] or now - self._seen[slot, col] > self.max_age:
+            return None
+        value = self._rssi[slot, col]
+        return None if np.isnan(value) else float(value)
+
+    # Tính các lượt chuyển AP của cả chu kỳ trong một lượt vector hóa.
+    #   slot_dpid: AP hiện tại theo slot (-1 = không kết nối)
+    #   free: dpid → (số chỗ còn trống, tải hiện tại tính theo số client tương đương);
+    #         chỉ các AP có trong free mới được nhận client
+    #   faulty: các AP lỗi, mọi client trên đó phải chuyển đi
+    # Client chỉ chuyển vì tín hiệu khi RSSI tại AP hiện tại dưới `threshold`, đã ở
+    # lại ít nhất `min_dwell` giây và có AP khác mạnh hơn ít nhất `hysteresis` dB.
+    # Đích được chọn bằng bài toán gán chi phí nhỏ nhất dưới giới hạn chỗ trống của
+    # từng AP; chi phí = -RSSI + load_cost × số client trên AP đích. Khi ma trận gán
+    # vượt `max_cells` ô, đích được chọn tham lam để thời gian mỗi chu kỳ có giới hạn.
+    # Trả về danh sách (slot, AP cũ, AP mới, RSSI tại AP cũ, RSSI tại AP mới).
+    def plan_roams(self, slot_dpid, free, faulty, now, threshold, hysteresis, min_dwell,
+                   load_cost=1.0, floor=-100.0, only_dpid=None, max_cells=ROAM_EXACT_MAX_CELLS):
+        slot_dpid = np.asarray(slot_dpid, dtype=np.int64)
+        self._ensure_rows(len(slot_dpid))
+        slots = np.nonzero(slot_dpid >= 0)[0]
+        if only_dpid is not None:
+            slots = slots[slot_dpid[slots] == only_dpid]
+        if not len(slots):
+            return []
+        for dpid in list(free) + list(faulty) + np.unique(slot_dpid[slots]).tolist():
+            self._column(dpid)
+        dpids = np.array(self._dpids, dtype=np.int64)
+        order = np.argsort(dpids)
+        cur_dpid = slot_dpid[slots]
+        cur_col = order[np.searchsorted(dpids, cur_dpid, sorter=order)]
+        rows = np.arange(len(slots))
+
+        rssi = self._rssi[slots, :len(dpids)].astype(np.float64)
+        rssi[now - self._seen[slots, :len(dpids)] > self.max_age] = np.nan
+        cur_rssi = rssi[rows, cur_col]
+        targets = np.isin(dpids, list(free))
+        alt = np.where(targets, rssi, np.nan)
+        alt[rows, cur_col] = np.nan
+        best_alt = np.max(np.where(np.isnan(alt), -np.inf, alt), axis=1)
+
+        is_faulty = np.isin(cur_dpid, list(faulty))
+        with np.errstate(invalid='ignore'):
+            weak = cur_rssi < threshold
+            gain = best_alt >= cur_rssi + hysteresis
+        dwell = now - self._since[slots] >= min_dwell
+        want = is_faulty | (weak & dwell & gain)
+        if not want.any():
+            return []
+        cand = np.nonzero(want)[0]
+        n = len(cand)
+
+        # Chỉ giữ các AP còn chỗ trống và có ít nhất một client nhận được; số chỗ của
+        # mỗi AP không vượt quá số client có thể sang đó
+        ap_col = np.nonzero(targets)[0]
+        cand_rssi = alt[cand][:, ap_col]
+        # Client trên AP lỗi có thể sang AP chưa có mẫu RSSI (coi như mức sàn)
+        cand_rssi = np.where(np.isnan(cand_rssi) & is_faulty[cand, None], floor, cand_rssi)
+        feasible = ~np.isnan(cand_rssi)
+        seats = np.array([max(free[self._dpids[col]][0], 0) for col in ap_col], dtype=np.int64)
+        seats = np.minimum(seats, feasible.sum(axis=0))
+        keep = seats > 0
+        ap_col, cand_rssi, feasible, seats = ap_col[keep], cand_rssi[:, keep], feasible[:, keep], seats[keep]
+        loads = np.array([free[self._dpids[col]][1] for col in ap_col], dtype=np.float64)
+        stay = np.where(is_faulty[cand], _STAY_FAULTY, -(cur_rssi[cand] + hysteresis))
+
+        if n * (int(seats.sum()) + n) <= max_cells:
+            picked = _exact_roams(cand_rssi, feasible, seats, loads, stay, load_cost)
+        else:
+            # Bài toán quá lớn để giải chính xác trên vòng sự kiện → gán tham lam: client
+            # trên AP lỗi trước, rồi theo mức lợi RSSI giảm dần
+            urgency = np.where(is_faulty[cand], np.inf, best_alt[cand] - cur_rssi[cand])
+            picked = _greedy_roams(cand_rssi, feasible, seats, loads, stay, load_cost,
+                                   np.argsort(-urgency, kind='stable'))
+
+        moves = []
+        for k, j in picked:
+            i = cand[k]
+            col = ap_col[j]
+            moves.append((int(slots[i]), int(cur_dpid[i]), self._dpids[col],
+                          None if np.isnan(cur_rssi[i]) else float(cur_rssi[i]),
+                          None if np.isnan(rssi[i, col]) else float(rssi[i, col])))
+        return moves
+
+
+# Gán chính xác: mỗi chỗ trống của mỗi AP là một cột, cộng một cột "ở lại" riêng cho
+# từng client; trả về các cặp (chỉ số client, chỉ số AP) được chuyển
+def _exact_roams(cand_rssi, feasible, seats, loads, stay, load_cost):
+    n = len(stay)
+    seat_ap = np.repeat(np.arange(len(seats)), seats)
+    seat_load = loads[seat_ap] + (np.arange(len(seat_ap)) - np.repeat(np.cumsum(seats) - seats, seats))
+    cost = np.where(feasible[:, seat_ap], -cand_rssi[:, seat_ap] + load_cost * seat_load, _INFEASIBLE)
+    stay_cols = np.full((n, n), _INFEASIBLE)
+    stay_cols[np.arange(n), np.arange(n)] = stay
+    assignment = min_cost_assignment(np.hstack([cost, stay_cols]))
+    return [(k, int(seat_ap[column])) for k, column in enumerate(assignment)
+            if column < len(seat_ap) and cost[k, column] < _INFEASIBLE]
+
+
+# Gán tham lam theo thứ tự `order`: mỗi client lấy AP có chi phí chỗ kế tiếp nhỏ nhất
+# nếu rẻ hơn ở lại; O(n · số AP)
+def _greedy_roams(cand_rssi, feasible, seats, loads, stay, load_cost, order):
+    left = seats.copy()
+    taken = np.zeros(len(seats))
+    base = np.where(feasible, -cand_rssi, np.inf)
+    picked = []
+    for k in order:
+        if not left.any():
+            break
+        cost = np.where(left > 0, base[k] + load_cost * (loads + taken), np.inf)
+        j = int(np.argmin(cost))
+        if cost[j] < min(stay[k], _INFEASIBLE):
+            picked.append((int(k), j))
+            left[j] -= 1
+            taken[j] += 1
+    return picked
@@ -2,18 +2,116 @@ from ryu.base import app_manager
 from ryu.controller import ofp_event
 from ryu.controller.handler import CONFIG_DISPATCHER, MAIN_DISPATCHER, DEAD_DISPATCHER, set_ev_cls
 from ryu.ofproto import ofproto_v1_3
-from ryu.lib.packet import packet, ethernet, arp, ipv4
 from ryu.lib import hub
+from eventlet import tpool
+from array import array
 from collections import defaultdict
+from functools import partial
 import time
+import numpy as np
 
 from ryu.app.wsgi import WSGIApplication, ControllerBase, route
 from webob import Response
 import json
 
+from ap_load_index import APLoadIndex
+from api_snapshot import SnapshotStore, view_body, view_delta, view_select
+from load_policy import POLICIES, APState, check_ap_profile, co_channel_counts, make_policy
+from client_table import ClientTable, ClientRecord, mac_to_int, int_to_mac, int_to_ip
+from timer_wheel import TimerWheel
+from flow_cache import FlowCache, actions_key, output_key
+from flow_batch import FlowBatcher
+from flow_stats import CLIENT_COOKIE_TAG, CLIENT_COOKIE_TAG_MASK, FlowAccounting, client_cookie, cookie_mac
+from port_history import PortStatsHistory
+from scheduler import JobScheduler, StatsPoller
+from ap_health import HealthMonitor, echo_payload, echo_sent_time
+from rssi_matrix import RSSIMatrix
+from roaming_log import RoamingLog, RoamingRing, ping_pongs
+from state_snapshot import StateStore, client_records
+from metrics import REGISTRY, timed
+from profiler import StackSampler
+from analytics_worker import AnalyticsWorker, host_records
+from rssi_batch import RSSI_BATCH_CONTENT_TYPE, parse_rssi_json, parse_rssi_sample, unpack_rssi_batch
+from fast_parse import (parse_eth_header, arp_sender, arp_target, arp_reply_frame, ipv4_src,
+                        ARP_REQUEST, ETH_TYPE_ARP, ETH_TYPE_IP, ETH_TYPE_LLDP)
+
 # Tên của controller trong WSGI
 SDN_LB_INSTANCE_NAME = 'sdn_lb_api_app'
-MAX_CLIENTS_PER_AP = 3  # Giới hạn số lượng client trên mỗi AP
+MAX_CLIENTS_PER_AP = 3  # Giới hạn số lượng client trên mỗi AP (mặc định)
+AP_CAPACITY_BPS = 20e6  # Dung lượng lưu lượng rx+tx của mỗi AP (bit/giây, mặc định)
+# Cấu hình riêng từng AP: dpid → max_clients, capacity_bps, channel (khớp topology_mininetwifi.py)
+AP_PROFILES = {
+    1: {'channel': 1},
+    2: {'channel': 6},
+    3: {'channel': 11},
+}
+LOAD_POLICY = 'weighted'  # Chính sách chấm điểm tải (xem load_policy.POLICIES)
+LOAD_POLICY_PARAMS = {}  # Tham số của chính sách, ví dụ {'rate_weight': 0.8}
+HOST_IDLE_TIMEOUT = 60  # Số giây không gửi gói tin trước khi host bị loại bỏ
+FLOW_IDLE_TIMEOUT = 30  # Flow bị xóa sau số giây không có gói tin khớp (0 = không giới hạn)
+FLOW_HARD_TIMEOUT = 0  # Flow bị xóa sau số giây kể từ khi cài (0 = không giới hạn)
+FLOW_BATCH_BUNDLES = True  # Dùng bundle OpenFlow 1.3 (ONF extension) cho lô FlowMod nếu switch hỗ trợ
+FLOW_BATCH_TIMEOUT = 3  # Số giây chờ xác nhận một lô FlowMod trước khi coi là thất bại
+PROXY_ARP = True  # Controller tự trả lời ARP request khi đã biết IP đích thay vì flood
+ARP_FLOW_PRIORITY = 2  # Cao hơn flow của client để mọi gói ARP đều lên controller
+PORT_HISTORY_SIZE = 120  # Số mẫu thống kê lưu cho mỗi cổng (120 mẫu × 5 giây = 10 phút)
+PORT_RATE_ALPHA = 0.3  # Hệ số làm mượt EWMA cho tốc độ cổng
+FLOW_STATS_SHARDS = 1  # Chia flow của client trên mỗi AP thành số phần này (lũy thừa 2), mỗi lần hỏi một phần
+CLIENT_RATE_ALPHA = 0.3  # Hệ số làm mượt EWMA cho tốc độ của từng client
+STATS_POLL_INTERVAL = 5  # Chu kỳ hỏi thống kê cổng của AP bình thường (giây)
+STATS_POLL_FAST_INTERVAL = 1  # Chu kỳ hỏi AP bận hoặc nghi lỗi (giây)
+STATS_REPLY_TIMEOUT = 2  # Số giây chờ reply thống kê trước khi tính là mất
+BUSY_AP_BPS = 1e6  # AP có tổng tốc độ EWMA vượt ngưỡng này (bit/giây) được coi là bận
+WIRELESS_PORT = 1  # Cổng WiFi (apX-wlan1) của AP, dùng làm cổng ra cho client được chuyển tới
+WIRELESS_PORT_TAG = 'wlan'  # Cổng có tên chứa chuỗi này là cổng WiFi
+ECHO_INTERVAL = 0.5  # Chu kỳ gửi echo request kiểm tra sức khỏe AP (giây)
+ECHO_TIMEOUT = 1.0  # Số giây chờ echo reply trước khi tính là mất
+ECHO_SLOW_RTT = 0.2  # RTT echo vượt ngưỡng này (giây) bị trừ điểm sức khỏe
+HEALTH_THRESHOLD = 0.5  # AP có điểm sức khỏe dưới ngưỡng này bị coi là lỗi
+RSSI_MAX_AGE = 10  # Mẫu RSSI cũ hơn số giây này bị bỏ qua
+RSSI_EWMA_ALPHA = 0.3  # Hệ số làm mượt EWMA cho RSSI của từng cặp (client, AP)
+RSSI_ROAM_THRESHOLD = -57  # RSSI (đã làm mượt) tại AP hiện tại dưới ngưỡng này → tìm AP khác
+RSSI_HYSTERESIS_DB = 5  # AP mới phải mạnh hơn AP hiện tại ít nhất số dB này
+RSSI_MIN_DWELL = 10  # Số giây tối thiểu client ở lại một AP trước khi chuyển vì tín hiệu
+ROAM_LOAD_COST_DB = 1.0  # Mỗi client đã có trên AP đích tương đương mất số dB này
+CLEANUP_INTERVAL = 1  # Chu kỳ loại bỏ host hết hạn (giây)
+ROAM_INTERVAL = 5  # Chu kỳ kiểm tra RSSI và roaming (giây)
+FLOW_FLUSH_INTERVAL = 1  # Chu kỳ gửi lô FlowMod (giây)
+MONITOR_MAX_SLEEP = 0.5  # Thời gian ngủ tối đa giữa hai vòng giám sát (giây)
+SNAPSHOT_INTERVAL = 1  # Chu kỳ công bố snapshot trạng thái cho REST API (giây)
+STATE_RESYNC_EVERY = 60  # Sau số lần gửi phần thay đổi này thì gửi lại toàn bộ bảng client cho worker
+SNAPSHOT_HISTORY = 120  # Số phiên bản snapshot gần nhất còn trả được phần thay đổi (?since=)
+HOST_PAGE_MAX = 1000  # Số client tối đa trong một trang của /host_status
+ROAMING_RING_SIZE = 1000  # Số sự kiện roaming gần nhất giữ trong bộ nhớ
+ROAMING_LOG_PATH = 'roaming_events.sqlite3'  # Nhật ký roaming trên đĩa (None = chỉ giữ trong bộ nhớ)
+ROAMING_LOG_RETENTION = 7 * 24 * 3600  # Sự kiện cũ hơn số giây này bị xóa khỏi nhật ký
+ROAMING_QUERY_MAX = 1000  # Số sự kiện tối đa trả về cho một truy vấn /roaming_events
+PING_PONG_WINDOW = 60  # Client quay lại AP cũ trong số giây này được tính là ping-pong
+STATE_PATH = 'controller_state.bin'  # Snapshot trạng thái client để khởi động lại nhanh (None = tắt)
+STATE_SAVE_INTERVAL = 5  # Chu kỳ ghi phần thay đổi của trạng thái (giây)
+STATE_COMPACT_EVERY = 60  # Sau số lần ghi thay đổi này thì ghi lại bản đầy đủ
+STATE_MAX_AGE = 300  # Snapshot cũ hơn số giây này bị bỏ qua khi khởi động
+PROFILER_ENABLED = False  # Cho phép lấy mẫu stack qua /profile (bật khi cần tìm điểm nóng)
+PROFILE_MAX_SECONDS = 30  # Thời gian lấy mẫu tối đa của một lần /profile
+ANALYTICS_WORKER = False  # Chạy REST API, dựng snapshot và tính roaming theo RSSI ở tiến trình riêng
+ANALYTICS_WORKER_HOST = '0.0.0.0'  # Địa chỉ REST API của worker phân tích
+ANALYTICS_WORKER_PORT = 8081  # Cổng REST API của worker (cổng của ryu chỉ còn /metrics và /profile)
+
+# Metric của controller, xuất ở /metrics theo định dạng Prometheus
+PACKET_IN_SECONDS = REGISTRY.histogram('sdnlb_packet_in_seconds', 'Time spent handling one PacketIn')
+HANDLER_SECONDS = REGISTRY.histogram('sdnlb_handler_seconds', 'Time spent in OpenFlow event handlers', ('handler',))
+REST_SECONDS = REGISTRY.histogram('sdnlb_rest_seconds', 'Time spent in REST handlers', ('endpoint',))
+MONITOR_LOOP_SECONDS = REGISTRY.histogram('sdnlb_monitor_loop_seconds', 'Duration of one monitor loop iteration')
+MONITOR_JOB_SECONDS = REGISTRY.histogram('sdnlb_monitor_job_seconds', 'Duration of periodic monitor jobs', ('job',))
+STATS_REPLY_SECONDS = REGISTRY.histogram('sdnlb_stats_reply_seconds', 'Delay from port stats request to reply')
+ECHO_RTT_SECONDS = REGISTRY.histogram('sdnlb_echo_rtt_seconds', 'OpenFlow echo round-trip time')
+FLOW_MODS = REGISTRY.counter('sdnlb_flow_mods_total', 'FlowMod messages sent', ('command',))
+PACKET_OUTS = REGISTRY.counter('sdnlb_packet_outs_total', 'PacketOut messages sent', ('kind',))
+ROAMS = REGISTRY.counter('sdnlb_roams_total', 'Completed client roams', ('reason',))
+FLOW_MODS_ADD = FLOW_MODS.labels('add')
+FLOW_MODS_DELETE = FLOW_MODS.labels('delete')
+PACKET_OUTS_FORWARD = PACKET_OUTS.labels('forward')
+PACKET_OUTS_PROXY_ARP = PACKET_OUTS.labels('proxy_arp')
 
 class SDNWiFiLoadBalancer(app_manager.RyuApp):
     OFP_VERSIONS = [ofproto_v1_3.OFP_VERSION]
@@ -22,109 +120,661 @@ class SDNWiFiLoadBalancer(app_manager.RyuApp):
     def __init__(self, *args, **kwargs):
         super(SDNWiFiLoadBalancer, self).__init__(*args, **kwargs)
         wsgi = kwargs['wsgi']
-        wsgi.register(SDNLBRestAPI, {SDN_LB_INSTANCE_NAME: self})
+        wsgi.register(ControllerAPI if ANALYTICS_WORKER else SDNLBRestAPI, {SDN_LB_INSTANCE_NAME: self})
 
         # Cấu trúc lưu trữ trạng thái mạng
-        self.mac_to_port = defaultdict(dict)  # MAC → cổng (trên từng AP)
-        self.mac_to_ip = {}  # MAC → IP
-        self.client_count = defaultdict(int)  # Số client kết nối trên mỗi AP
-        self.last_seen = defaultdict(dict)  # Thời gian cuối cùng mỗi MAC gửi gói tin
+        # MAC → AP, cổng, IP, RSSI, thời gian cuối cùng gửi gói tin
+        self.clients = ClientTable(track_changes=True)
         self.active_switches = set()  # Danh sách AP đang hoạt động
         self.switch_connect_time = {}  # Thời điểm switch kết nối vào mạng
         self.dpid_to_ip = {}  # Gán IP đại diện cho từng DPID
         self.port_stats = defaultdict(dict)  # Thống kê lưu lượng trên từng cổng
         self.datapaths = {}  # Lưu các datapath object
-        self.mac_rssi = {}  # RSSI giả lập cho từng MAC
         self.faulty_aps = set()  # Tập hợp các AP bị coi là lỗi
-        self.prev_port_stats = defaultdict(dict)  # Thống kê cũ để phát hiện lỗi
-        self.roaming_events = []  # Lưu lịch sử chuyển AP
+        self.port_history = PortStatsHistory(PORT_HISTORY_SIZE, PORT_RATE_ALPHA)  # Lịch sử thống kê → tốc độ
+        self.roaming_events = RoamingRing(ROAMING_RING_SIZE)  # Các sự kiện chuyển AP gần nhất
+        self.roaming_log = None  # Nhật ký chuyển AP trên đĩa
+        if ROAMING_LOG_PATH:
+            self.roaming_log = RoamingLog(ROAMING_LOG_PATH, ROAMING_LOG_RETENTION, self.logger, tpool.execute)
+            for event in self.roaming_log.recent(ROAMING_RING_SIZE):
+                self.roaming_events.append(event)
+        for dpid in list(AP_PROFILES) + [None]:
+            check_ap_profile(dpid, *self._ap_profile(dpid)[:2])  # None: cấu hình mặc định
+        self.load_policy = make_policy(LOAD_POLICY, **LOAD_POLICY_PARAMS)  # Cách chấm điểm tải AP
+        self.co_channel = {}  # dpid → số AP khác trên kênh chồng lấn
+        self.load_index = APLoadIndex(1.0)  # Chỉ mục AP theo điểm tải (1.0 = đầy)
+        self.host_expiry = TimerWheel(resolution=1.0, size=HOST_IDLE_TIMEOUT + 4)  # Lịch hết hạn của host
+        self.flow_cache = FlowCache()  # Các flow đã cài trên từng AP
+        self.flow_batcher = FlowBatcher(self.logger, use_bundles=FLOW_BATCH_BUNDLES)  # Lô FlowMod mỗi chu kỳ
+        self.pending_moves = {}  # MAC → (AP cũ, AP mới, lưu lượng) đang chờ lô FlowMod xác nhận
+        self.pending_load = defaultdict(int)  # Số client dự kiến tăng/giảm trên mỗi AP
+        self.pending_rate = defaultdict(float)  # Lưu lượng (bit/giây) dự kiến tăng/giảm trên mỗi AP
+        self.flow_accounting = FlowAccounting(FLOW_STATS_SHARDS)  # Lưu lượng theo client từ flow stats
+        self.proxy_arp_replies = 0  # Số ARP request đã được controller trả lời thay
+        self.rssi_samples = 0  # Số mẫu RSSI đã ghi nhận
+        self.rssi_matrix = RSSIMatrix(RSSI_EWMA_ALPHA, RSSI_MAX_AGE)  # RSSI làm mượt theo (client, AP)
+        self.health = HealthMonitor(ECHO_TIMEOUT, ECHO_SLOW_RTT, HEALTH_THRESHOLD)  # Điểm sức khỏe từng AP
+        self.state_store = StateStore(STATE_PATH, STATE_COMPACT_EVERY) if STATE_PATH else None
+        self.reconciling = {}  # dpid → xid của flow stats request đối chiếu flow khi switch kết nối
+        self.restored_clients = 0  # Số client khôi phục từ snapshot khi khởi động
+        self.snapshots = SnapshotStore(f"{int(time.time() * 1000):x}", SNAPSHOT_HISTORY)  # Trạng thái cho REST API
+        self.snapshot_dpids = None  # Các AP của snapshot trước; đổi → dựng lại toàn bộ
+        self.snapshot_time = 0.0
+        self.mac_tables = {}  # dpid → MAC các client trên AP (cho /load_status)
+        self.worker = None  # Tiến trình phân tích khi ANALYTICS_WORKER
+        self.state_sends = 0  # Số lần đã gửi trạng thái cho worker (lần đầu và mỗi STATE_RESYNC_EVERY: toàn bộ)
+        self.port_samples = []  # Mẫu thống kê cổng chưa gửi sang worker
+        self.events_published = 0  # Số sự kiện roaming đã gửi sang worker
+        self.rssi_seq = 0  # Số thứ tự lô RSSI từ worker đã áp dụng, gửi kèm trạng thái
+
+        # Lịch hỏi thống kê theo từng AP và các công việc định kỳ, mỗi việc một chu kỳ
+        now = time.time()
+        self.stats_poller = StatsPoller(STATS_POLL_INTERVAL, STATS_REPLY_TIMEOUT)
+        self.jobs = JobScheduler(self.logger, lambda name, duration: MONITOR_JOB_SECONDS.labels(name).observe(duration))
+        self.jobs.add('flow_batch_expire', FLOW_FLUSH_INTERVAL,
+                      lambda: self.flow_batcher.expire(time.time(), FLOW_BATCH_TIMEOUT), now)
+        self.jobs.add('check_ap_health', ECHO_INTERVAL, self._check_ap_health, now)
+        self.jobs.add('cleanup_stale_hosts', CLEANUP_INTERVAL, self._cleanup_stale_hosts, now)
+        self.jobs.add('flow_batch_flush', FLOW_FLUSH_INTERVAL,
+                      lambda: self.flow_batcher.flush(time.time()), now)
+        if ANALYTICS_WORKER:
+            # Roaming theo RSSI được tính ở worker, controller chỉ gửi trạng thái thô mỗi chu kỳ
+            self.worker = AnalyticsWorker(self._worker_config(), self._on_worker_message, self.logger)
+            self.jobs.add('publish_state', SNAPSHOT_INTERVAL, self._publish_state, now)
+        else:
+            self.jobs.add('check_rssi_and_roam', ROAM_INTERVAL, self.check_rssi_and_roam, now)
+            self.jobs.add('publish_snapshot', SNAPSHOT_INTERVAL, self._publish_snapshot, now)
+        if self.state_store is not None:
+            self._restore_state(now)
+            self.jobs.add('save_state', STATE_SAVE_INTERVAL, self._save_state, now + STATE_SAVE_INTERVAL)
+        if self.worker is not None:
+            self._publish_state()
+        else:
+            self._publish_snapshot()
+
+        self.sampler = StackSampler()  # Lấy mẫu stack theo yêu cầu (/profile)
+        self._register_metrics()
 
         # Bắt đầu luồng giám sát
         self.monitor_thread = hub.spawn(self._monitor)
 
-    # Hàm giám sát định kỳ
+    # Metric tính lúc xuất từ trạng thái hiện tại của controller
+    def _register_metrics(self):
+        REGISTRY.gauge_callback('sdnlb_clients', 'Clients attached per AP',
+                                lambda: [((str(dpid),), self.clients.count(dpid)) for dpid in self.active_switches],
+                                ('dpid',))
+        REGISTRY.gauge_callback('sdnlb_active_aps', 'Connected APs', lambda: len(self.active_switches))
+        REGISTRY.gauge_callback('sdnlb_faulty_aps', 'APs marked faulty', lambda: len(self.faulty_aps))
+        REGISTRY.gauge_callback('sdnlb_flows_cached', 'Flows known to be installed', lambda: len(self.flow_cache))
+        REGISTRY.gauge_callback('sdnlb_pending_moves', 'Roams waiting for FlowMod confirmation',
+                                lambda: len(self.pending_moves))
+        REGISTRY.counter_callback('sdnlb_flow_mods_suppressed_total', 'Duplicate FlowMods not sent',
+                                  lambda: self.flow_cache.suppressed)
+        REGISTRY.counter_callback('sdnlb_rssi_samples_total', 'RSSI samples ingested', lambda: self.rssi_samples)
+        REGISTRY.counter_callback('sdnlb_stats_timeouts_total', 'Port stats replies that timed out',
+                                  lambda: self.stats_poller.timeout_count)
+
+    # Dừng app → lưu trạng thái và ghi nốt nhật ký roaming
+    def close(self):
+        if self.state_store is not None:
+            self._save_state()
+        if self.roaming_log is not None:
+            self.roaming_log.close()
+        if self.worker is not None:
+            self.worker.close()
+
+    # Khôi phục bảng client từ snapshot: AP, cổng, IP, RSSI; client được cho thêm
+    # HOST_IDLE_TIMEOUT giây để gửi gói tin trước khi bị loại như bình thường
+    def _restore_state(self, now):
+        loaded = self.state_store.load()
+        if loaded is None:
+            return
+        records, saved = loaded
+        if now - saved > STATE_MAX_AGE:
+            self.logger.warning(f"Ignoring controller state saved {now - saved:.0f}s ago ({STATE_PATH})")
+            return
+        for record in records.tolist():
+            mac, dpid, port, ip, rssi = record
+            client = self.get_client(mac, now)
+            if dpid >= 0:
+                self.clients.attach(mac, dpid, port)
+            client.ip = ip if ip >= 0 else None
+            client.rssi = None if rssi == -32768 else rssi
+        self.restored_clients = len(records)
+        self.logger.info(f"Restored {len(records)} clients from state saved {now - saved:.1f}s ago")
+
+    # Ghi phần thay đổi của bảng client; việc ghi file chạy ngoài hub
+    def _save_state(self):
+        tpool.execute(self.state_store.save, client_records(self.clients), time.time())
+
+    # Hàm giám sát: hỏi thống kê các AP đến hạn rồi chạy các công việc đến hạn,
+    # sau đó ngủ tới mốc gần nhất
     def _monitor(self):
         while True:
-            for dp in self.datapaths.values():
-                self._request_stats(dp)
-            self._detect_ap_failure()
-            self._cleanup_stale_hosts()
-            self.check_rssi_and_roam()  # Gọi kiểm tra roaming theo RSSI
-            hub.sleep(5)
+            start = time.perf_counter()
+            now = time.time()
+            self._poll_stats(now)
+            self.jobs.run_pending(now)
+            duration = time.perf_counter() - start
+            self.jobs.loop.record(duration)
+            MONITOR_LOOP_SECONDS.observe(duration)
+            wake = min(self.stats_poller.next_due(), self.jobs.next_due())
+            hub.sleep(min(max(wake - time.time(), 0), MONITOR_MAX_SLEEP))
+
+    # Gửi request thống kê tới các AP đến hạn và ghi nhận các reply bị mất
+    def _poll_stats(self, now):
+        for dpid in self.stats_poller.timed_out(now):
+            missed = self.stats_poller.missed[dpid]
+            log = self.logger.warning if missed == 1 else self.logger.debug
+            log(f"Port stats reply from AP {dpid} timed out ({missed} missed in a row)")
+            self._adapt_poll_interval(dpid, now)
+        for dpid in self.stats_poller.due(now):
+            datapath = self.datapaths.get(dpid)
+            if datapath is not None:
+                self.stats_poller.sent(dpid, now)
+                self._request_stats(datapath)
+
+    # AP bận (đầy client hoặc nhiều lưu lượng) hoặc nghi lỗi được hỏi thống kê nhanh hơn
+    def _adapt_poll_interval(self, dpid, now):
+        ewma_rx, ewma_tx = self.port_history.ap_ewma(dpid)
+        busy = (self._ap_load(dpid) >= self._ap_profile(dpid)[0] or ewma_rx + ewma_tx >= BUSY_AP_BPS)
+        suspect = dpid in self.faulty_aps or self.stats_poller.missed.get(dpid, 0) > 0
+        interval = STATS_POLL_FAST_INTERVAL if busy or suspect else STATS_POLL_INTERVAL
+        self.stats_poller.set_interval(dpid, interval, now)
 
     def _request_stats(self, datapath):
+        ofproto = datapath.ofproto
         parser = datapath.ofproto_parser
         req = parser.OFPPortStatsRequest(datapath, 0, ofproto_v1_3.OFPP_ANY)
         datapath.send_msg(req)
+        # Chỉ hỏi các flow theo client (lọc theo cookie), mỗi lần một phần
+        cookie, cookie_mask = self.flow_accounting.next_filter(datapath.id)
+        req = parser.OFPFlowStatsRequest(datapath, 0, ofproto.OFPTT_ALL, ofproto.OFPP_ANY,
+                                         ofproto.OFPG_ANY, cookie, cookie_mask, parser.OFPMatch())
+        datapath.set_xid(req)
+        self.flow_accounting.sent(datapath.id, req.xid, time.time())
+        datapath.send_msg(req)
 
-    # Phát hiện AP không có lưu lượng thay đổi → coi là lỗi
-    def _detect_ap_failure(self):
-        for dpid in self.port_stats:
-            unchanged = True
-            for port_no, stats in self.port_stats[dpid].items():
-                prev = self.prev_port_stats[dpid].get(port_no, {})
-                if stats.get('rx_bytes') != prev.get('rx_bytes') or stats.get('tx_bytes') != prev.get('tx_bytes'):
-                    unchanged = False
-                    break
-            if unchanged:
-                self.faulty_aps.add(dpid)
+    # Công bố snapshot cho REST API: request REST chỉ đọc snapshot này thay vì duyệt các
+    # dict đang chạy. Chỉ client đã đổi từ chu kỳ trước (bảng client, hàng RSSI) được dựng
+    # lại và serialize; khi tập AP đổi thì dựng lại toàn bộ
+    def _publish_snapshot(self):
+        now = time.time()
+        dpids = sorted(self.active_switches)
+        self.clients.touch(self.rssi_matrix.changed_rows(self.snapshot_time, now))
+        changed, changed_aps = self.clients.take_changes()
+        full = dpids != self.snapshot_dpids
+        if full:
+            self.mac_tables = {}
+            changed_aps = dpids
+        for dpid in changed_aps:
+            if dpid in self.active_switches:
+                self.mac_tables[dpid] = [int_to_mac(client.mac) for client in self.clients.on_ap(dpid)]
             else:
-                self.faulty_aps.discard(dpid)
-            self.prev_port_stats[dpid] = dict(self.port_stats[dpid])
+                self.mac_tables.pop(dpid, None)
+        if full:
+            hosts = [self._host_entry(client, now) for dpid in dpids for client in self.clients.on_ap(dpid)]
+            hosts.sort(key=lambda host: host[0])  # Thứ tự cố định để phân trang
+            host_view = ('list', hosts)
+        else:
+            hosts, gone = [], []
+            for mac in changed:
+                client = self.clients.get(mac)
+                if client is not None and client.dpid in self.mac_tables:
+                    hosts.append(self._host_entry(client, now))
+                else:
+                    gone.append(int_to_mac(mac))
+            host_view = ('list', hosts, gone)
+        self.snapshot_dpids = dpids
+        self.snapshot_time = now
+        self.snapshots.publish({
+            'load_status': ('dict', [(str(dpid), dpid, self._ap_summary(dpid, self.mac_tables[dpid]))
+                                     for dpid in dpids]),
+            'host_status': host_view,
+            'performance_metrics': ('dict', [(key, None, value) for key, value in self._metrics(dpids).items()]),
+        }, now)
+
+    # Một client cho /host_status: (khóa, nhãn AP, đối tượng JSON)
+    def _host_entry(self, client, now):
+        mac = int_to_mac(client.mac)
+        return (mac, client.dpid, {
+            "mac": mac,
+            "ip": int_to_ip(client.ip) if client.ip is not None else "N/A",
+            "ap": client.dpid,
+            "port": client.port,
+            "rx_bytes": client.rx_bytes,
+            "tx_bytes": client.tx_bytes,
+            "rx_packets": client.rx_packets,
+            "tx_packets": client.tx_packets,
+            "rx_bps": client.rx_bps,
+            "tx_bps": client.tx_bps,
+            "rssi": client.rssi if client.rssi is not None else -100,
+            "rssi_by_ap": self.rssi_matrix.row(client.slot, now)
+        })
+
+    # Thông tin một AP cho /load_status
+    def _ap_summary(self, dpid, mac_table):
+        history = self.port_history
+        return {
+            "ip": self.dpid_to_ip.get(dpid, "N/A"),
+            "clients": self.clients.count(dpid),
+            "last_seen": self.switch_connect_time.get(dpid, "unknown"),
+            "mac_table": mac_table,
+            "port_stats": self.port_stats.get(dpid, {}),
+            "rate_bps": history.ap_rate(dpid) or (0, 0),
+            "ewma_bps": history.ap_ewma(dpid),
+            "load_score": self.load_policy.score(self._ap_state(dpid)),
+            "is_faulty": dpid in self.faulty_aps,
+            "health": self.health.status(dpid)
+        }
+
+    # Số liệu hiệu năng của toàn hệ thống cho /performance_metrics
+    def _metrics(self, dpids):
+        metrics = {
+            "total_clients": sum(self.clients.count(dpid) for dpid in dpids),
+            "ap_load": {dpid: self.clients.count(dpid) for dpid in dpids},
+            "faulty_aps": sorted(self.faulty_aps),
+            "flows_installed": self.flow_cache.installed,
+            "flow_mods_suppressed": self.flow_cache.suppressed,
+            "flow_batches": self.flow_batcher.summary(),
+            "proxy_arp_replies": self.proxy_arp_replies,
+            "rssi_samples": self.rssi_samples,
+            "client_flows_tracked": len(self.flow_accounting),
+            "ap_health": dict(self.health.summary(),
+                              scores={dpid: self.health.score(dpid) for dpid in dpids}),
+            "scheduler": dict(self.jobs.summary(), stats_polling=self.stats_poller.summary()),
+            "snapshot": {"version": self.snapshots.version, "interval": SNAPSHOT_INTERVAL},
+            "state": dict(self.state_store.summary() if self.state_store else {},
+                          restored_clients=self.restored_clients),
+            "roaming_log": dict(self.roaming_log.summary() if self.roaming_log else {},
+                                ring=len(self.roaming_events), recorded=self.roaming_events.total),
+            "roaming_events": self.roaming_events.recent(10)
+        }
+        if self.worker is not None:
+            metrics["analytics_worker"] = self.worker.summary()
+        return metrics
+
+    # Cấu hình gửi cho worker phân tích (giá trị hiện tại của các hằng số, không đọc lại từ file)
+    def _worker_config(self):
+        return {
+            "host": ANALYTICS_WORKER_HOST,
+            "port": ANALYTICS_WORKER_PORT,
+            "log_level": self.logger.getEffectiveLevel(),
+            "epoch": self.snapshots.epoch,
+            "snapshot_history": SNAPSHOT_HISTORY,
+            "port_history": (PORT_HISTORY_SIZE, PORT_RATE_ALPHA),
+            "roaming_ring_size": ROAMING_RING_SIZE,
+            "roaming_log_path": ROAMING_LOG_PATH,
+            "load_policy": self.load_policy.describe(),
+            "rssi": (RSSI_EWMA_ALPHA, RSSI_MAX_AGE),
+            "roam": {"threshold": RSSI_ROAM_THRESHOLD, "hysteresis": RSSI_HYSTERESIS_DB,
+                     "min_dwell": RSSI_MIN_DWELL, "load_cost": ROAM_LOAD_COST_DB},
+            "roam_interval": ROAM_INTERVAL
+        }
+
+    # Gửi trạng thái thô sang worker thay cho _publish_snapshot: chỉ client đã đổi (chụp
+    # thành mảng) và MAC đã bị xóa từ lần gửi trước, mỗi STATE_RESYNC_EVERY lần gửi lại
+    # toàn bộ bảng; việc serialize JSON và đọc ma trận RSSI diễn ra ở worker
+    def _publish_state(self):
+        dpids = sorted(self.active_switches)
+        changed, _ = self.clients.take_changes()
+        full = self.state_sends % STATE_RESYNC_EVERY == 0
+        self.state_sends += 1
+        removed = []
+        if full:
+            hosts = host_records(self.clients)
+        else:
+            slots = array('q')
+            for mac in changed:
+                client = self.clients.get(mac)
+                if client is None:
+                    removed.append(mac)
+                else:
+                    slots.append(client.slot)
+            hosts = host_records(self.clients, slots)
+        free, faulty, pending = self._roam_inputs()
+        total = self.roaming_events.total
+        new_events = min(total - self.events_published, len(self.roaming_events))
+        self.events_published = total
+        self.worker.send('state', {
+            "time": time.time(),
+            "full": full,
+            "hosts": hosts,
+            "removed": removed,
+            "aps": [(dpid, self._ap_summary(dpid, None)) for dpid in dpids],
+            "metrics": self._metrics(dpids),
+            "free": free,
+            "faulty": faulty,
+            "pending": pending,
+            "events": self.roaming_events.recent(new_events) if new_events > 0 else [],
+            "port_samples": self.port_samples,
+            "rssi_seq": self.rssi_seq
+        })
+        self.port_samples = []
+
+    # Thông điệp từ worker: lượt chuyển AP đã tính, RSSI mới nhất, đổi chính sách tải
+    def _on_worker_message(self, kind, data):
+        if kind == 'roams':
+            self._apply_roams(*data)
+        elif kind == 'rssi':
+            self.rssi_seq, updates, applied = data
+            now = time.time()
+            for mac, rssi in updates:
+                self.get_client(mac, now).rssi = rssi
+            self.rssi_samples += applied
+        elif kind == 'load_policy':
+            name, params = data
+            try:
+                self.set_load_policy(name, params)
+            except (ValueError, TypeError) as e:
+                self.logger.warning(f"Invalid load policy from analytics worker: {e}")
+
+    # Thực hiện các lượt chuyển worker đã tính; trạng thái có thể đã đổi từ lúc worker
+    # nhận snapshot nên mỗi lượt được kiểm tra lại. Lượt sơ tán AP lỗi được gửi ngay
+    def _apply_roams(self, moves, fault_reason=None):
+        applied = 0
+        for mac, from_ap, to_ap, rssi, target_rssi in moves:
+            client = self.clients.get(mac)
+            if (client is None or client.dpid != from_ap or mac in self.pending_moves
+                    or to_ap not in self.datapaths or to_ap in self.faulty_aps or not self._admits(to_ap)):
+                continue
+            reason = (fault_reason or "ap_failure") if from_ap in self.faulty_aps else "low_rssi"
+            self._roam_client(client, from_ap, to_ap, reason, rssi, target_rssi)
+            applied += 1
+        if fault_reason is not None and applied:
+            self.logger.info(f"Evacuating {applied} clients ({fault_reason})")
+            self.flow_batcher.flush(time.time())
+
+    # Ghi nhận echo bị mất rồi gửi echo request mới tới các AP không còn echo đang chờ
+    def _check_ap_health(self):
+        now = time.time()
+        for dpid in self.health.echo_timeouts(now):
+            self._update_ap_health(dpid, "echo_timeout")
+        for dpid, datapath in list(self.datapaths.items()):
+            if self.health.echo_due(dpid):
+                self.health.echo_sent(dpid, now)
+                datapath.send_msg(datapath.ofproto_parser.OFPEchoRequest(datapath, data=echo_payload(now)))
 
-    # Loại bỏ các host không gửi gói tin trong 60 giây
+    # Đánh giá lại AP theo điểm sức khỏe: AP vừa lỗi được loại khỏi chỉ mục tải
+    # và chuyển hết client đi ngay; AP hồi phục được đưa trở lại
+    def _update_ap_health(self, dpid, reason):
+        faulty = self.health.is_faulty(dpid)
+        if faulty == (dpid in self.faulty_aps):
+            return
+        score = self.health.score(dpid)
+        if faulty:
+            self.faulty_aps.add(dpid)
+            self.logger.warning(f"AP {dpid} marked faulty ({reason}, health {score:.2f})")
+        else:
+            self.faulty_aps.discard(dpid)
+            self.logger.info(f"AP {dpid} recovered ({reason}, health {score:.2f})")
+        self._sync_load_index(dpid)
+        self._adapt_poll_interval(dpid, time.time())
+        if faulty:
+            self._evacuate_ap(dpid, reason)
+
+    # Chuyển mọi client khỏi AP lỗi và gửi lô FlowMod ngay, không chờ chu kỳ giám sát
+    def _evacuate_ap(self, dpid, reason):
+        if self.worker is not None:
+            self.worker.send('evacuate', (dpid, reason, self._roam_inputs()))
+            return
+        moved = self._plan_roams(only_dpid=dpid, fault_reason=reason)
+        if moved:
+            self.logger.info(f"Evacuating {moved} clients from AP {dpid} ({reason})")
+            self.flow_batcher.flush(time.time())
+
+    # Loại bỏ các host không gửi gói tin trong HOST_IDLE_TIMEOUT giây.
+    # Chỉ xét các host có lịch hết hạn đã đến; host vẫn còn hoạt động thì đặt lịch lại.
     def _cleanup_stale_hosts(self):
         now = time.time()
-        timeout = 60
-        for dpid in list(self.mac_to_port.keys()):
-            self.mac_to_port[dpid] = {
-                mac: port for mac, port in self.mac_to_port[dpid].items()
-                if now - self.last_seen[dpid].get(mac, 0) < timeout
-            }
-            self.client_count[dpid] = len(self.mac_to_port[dpid])
+        changed = set()
+        for mac in self.host_expiry.expire(now):
+            client = self.clients.get(mac)
+            if client is None:
+                continue
+            deadline = client.last_seen + HOST_IDLE_TIMEOUT
+            if deadline > now:
+                self.host_expiry.schedule(mac, deadline)
+                continue
+            slot = client.slot
+            dpid = self.clients.remove(mac)
+            self.rssi_matrix.clear(slot)
+            if dpid is None:
+                continue
+            changed.add(dpid)
+            self._delete_client_flows(dpid, int_to_mac(mac), batch=True)
+        for dpid in changed:
+            self._sync_load_index(dpid)
+
+    # Lấy bản ghi client; nếu là client mới thì tạo và đặt lịch hết hạn
+    def get_client(self, mac, now):
+        client = self.clients.get(mac)
+        if client is None:
+            client = self.clients.get_or_create(mac, now)
+            self.host_expiry.schedule(mac, now + HOST_IDLE_TIMEOUT)
+        return client
+
+    # Ghi nhận các mẫu RSSI (mac, ap, rssi, thời điểm), bỏ qua mẫu quá cũ; trả về số
+    # mẫu đã ghi nhận. Mẫu không kèm AP được tính cho AP hiện tại của client
+    def ingest_rssi(self, samples, now):
+        applied = 0
+        for mac, ap, rssi, ts in samples:
+            if ts is not None and now - ts > RSSI_MAX_AGE:
+                continue
+            client = self.get_client(mac, now)
+            client.rssi = rssi
+            if ap is None:
+                ap = client.dpid
+            if ap is not None and rssi is not None:
+                self.rssi_matrix.update(client.slot, ap, rssi, min(ts or now, now))
+            applied += 1
+        self.rssi_samples += applied
+        return applied
+
+    # Chuyển client sang AP/cổng mới, xóa flow cũ của client trên AP cũ
+    # và cập nhật chỉ mục tải của cả hai AP
+    def _move_client(self, mac, dpid, port, batch=False):
+        old_dpid = self.clients.attach(mac, dpid, port)
+        if old_dpid != dpid:
+            self.rssi_matrix.mark_attached(self.clients.get(mac).slot, time.time())
+            if old_dpid is not None:
+                self._delete_client_flows(old_dpid, int_to_mac(mac), batch=batch)
+                self._sync_load_index(old_dpid)
+            self._sync_load_index(dpid)
+        return old_dpid
+
+    # Tải của AP: số client hiện tại cộng với các lượt chuyển AP đang chờ xác nhận
+    def _ap_load(self, dpid):
+        return self.clients.count(dpid) + self.pending_load.get(dpid, 0)
+
+    # Cấu hình của AP: (số client tối đa, dung lượng bit/giây, kênh)
+    def _ap_profile(self, dpid):
+        profile = AP_PROFILES.get(dpid, {})
+        return (profile.get('max_clients', MAX_CLIENTS_PER_AP),
+                profile.get('capacity_bps', AP_CAPACITY_BPS),
+                profile.get('channel'))
+
+    # Trạng thái AP để chấm điểm: client, tốc độ EWMA rx+tx trên cổng WiFi, cấu hình, kênh
+    def _ap_state(self, dpid):
+        max_clients, capacity_bps, channel = self._ap_profile(dpid)
+        ring = self.port_history.ring(dpid, WIRELESS_PORT)
+        rate = ring.ewma_rx_bps + ring.ewma_tx_bps if ring is not None and ring.ewma_rx_bps is not None else 0.0
+        rate = max(rate + self.pending_rate.get(dpid, 0.0), 0.0)
+        return APState(dpid, self._ap_load(dpid), max_clients, rate,
+                       capacity_bps, channel, self.co_channel.get(dpid, 0))
+
+    # AP còn nhận thêm client theo chính sách tải hiện tại không
+    def _admits(self, dpid):
+        return self.load_policy.admits(self._ap_state(dpid))
+
+    # Chỉ AP đang hoạt động, không lỗi và còn nhận client mới được đưa vào chỉ mục tải
+    def _sync_load_index(self, dpid):
+        if dpid in self.active_switches and dpid not in self.faulty_aps:
+            state = self._ap_state(dpid)
+            if self.load_policy.admits(state):
+                self.load_index.update(dpid, self.load_policy.score(state))
+                return
+        self.load_index.remove(dpid)
+
+    # Tính lại số AP cùng kênh khi tập AP thay đổi, rồi chấm điểm lại mọi AP
+    def _update_co_channel(self):
+        self.co_channel = co_channel_counts({dpid: self._ap_profile(dpid)[2] for dpid in self.active_switches})
+        for dpid in self.active_switches:
+            self._sync_load_index(dpid)
+
+    # Đổi chính sách chấm điểm tải lúc đang chạy (A/B test); ValueError nếu không hợp lệ
+    # Chính sách mới được chấm thử trên mọi AP trước, chỉ thay chính sách đang chạy khi thành công
+    def set_load_policy(self, name, params):
+        policy = make_policy(name, **params)
+        try:
+            for dpid in self.active_switches:
+                state = self._ap_state(dpid)
+                policy.admits(state)
+                policy.score(state)
+        except ArithmeticError as e:
+            raise ValueError(f"Policy {name} cannot score the current APs: {e!r}")
+        self.load_policy = policy
+        self.logger.info(f"Load policy set to {name} {self.load_policy.params}")
+        for dpid in self.active_switches:
+            self._sync_load_index(dpid)
+
+    # Giữ chỗ (và lưu lượng của client) trên AP mới, trả lại trên AP cũ, trong khi
+    # chờ lô FlowMod xác nhận
+    def _reserve_move(self, mac, from_ap, to_ap, delta=1):
+        if delta > 0:
+            client = self.clients.get(mac)
+            rate = client.tx_bps + client.rx_bps if client is not None else 0.0
+            self.pending_moves[mac] = (from_ap, to_ap, rate)
+        else:
+            rate = self.pending_moves.pop(mac, (None, None, 0.0))[2]
+        for dpid, change in ((from_ap, -delta), (to_ap, delta)):
+            self.pending_load[dpid] += change
+            self.pending_rate[dpid] += change * rate
+            if not self.pending_load[dpid]:
+                del self.pending_load[dpid]
+                del self.pending_rate[dpid]
+            self._sync_load_index(dpid)
+
+    # Cộng lưu lượng của một flow vào client gửi (eth_src) và client nhận (eth_dst)
+    def _fold_traffic(self, src, dst, byte_delta, packet_delta):
+        self.clients.add_traffic(src, tx_bytes=byte_delta, tx_packets=packet_delta)
+        if dst is not None:
+            self.clients.add_traffic(dst, rx_bytes=byte_delta, rx_packets=packet_delta)
+
+    # Hết một lượt hỏi flow stats của AP → cập nhật tốc độ của các client có lưu lượng
+    # trong lượt và của các client trên AP không còn lưu lượng
+    def _update_client_rates(self, dpid, elapsed, traffic):
+        if elapsed <= 0:
+            return
+        for mac, (tx_bytes, rx_bytes) in traffic.items():
+            self.clients.update_rate(mac, tx_bytes * 8 / elapsed, rx_bytes * 8 / elapsed, CLIENT_RATE_ALPHA)
+        for client in self.clients.on_ap(dpid):
+            if client.mac not in traffic:
+                self.clients.update_rate(client.mac, 0.0, 0.0, CLIENT_RATE_ALPHA)
+
+    # Lô FlowMod trên AP mới đã được xác nhận (ok) hoặc thất bại → cập nhật bảng client
+    def _finish_roam(self, mac, from_ap, to_ap, out_port, event, ok):
+        self._reserve_move(mac, from_ap, to_ap, delta=-1)
+        client = self.clients.get(mac)
+        if not ok:
+            self.flow_cache.pop_mac(to_ap, int_to_mac(mac))
+            self.logger.warning(f"Roaming {int_to_mac(mac)} from AP {from_ap} to AP {to_ap} failed, keeping old AP")
+            return
+        if client is None or client.dpid != from_ap:
+            return  # Client đã hết hạn hoặc đã tự chuyển AP trong lúc chờ
+        self._move_client(mac, to_ap, out_port, batch=True)
+        ROAMS.labels(event["reason"]).inc()
+        self.roaming_events.append(event)
+        if self.roaming_log is not None:
+            self.roaming_log.append(event)
 
     # Kiểm tra RSSI của các client, nếu thấp thì thực hiện chuyển AP
     def check_rssi_and_roam(self):
-        RSSI_THRESHOLD = -57 # Ngưỡng RSSI thấp để chuyển AP
+        self._plan_roams()
+
+    # Tính mọi lượt chuyển AP của chu kỳ trong một lượt vector hóa trên ma trận RSSI:
+    # client trên AP lỗi phải chuyển đi, client có tín hiệu yếu chuyển khi có AP tốt
+    # hơn (có trễ và thời gian lưu lại tối thiểu); đích được chọn theo chất lượng tín
+    # hiệu dưới giới hạn tải của từng AP. Trả về số client đã lên lịch chuyển
+    def _plan_roams(self, only_dpid=None, fault_reason="ap_failure"):
+        now = time.time()
+        slot_dpid = np.frombuffer(self.clients.dpids_by_slot(), dtype=np.int64).copy()
+        for mac in self.pending_moves:
+            client = self.clients.get(mac)
+            if client is not None:
+                slot_dpid[client.slot] = -1  # Đang chờ lô FlowMod của lần chuyển trước
+        free, faulty, _ = self._roam_inputs()
+        moves = self.rssi_matrix.plan_roams(
+            slot_dpid, free, faulty, now, RSSI_ROAM_THRESHOLD, RSSI_HYSTERESIS_DB,
+            RSSI_MIN_DWELL, ROAM_LOAD_COST_DB, only_dpid=only_dpid)
+        for slot, from_ap, to_ap, rssi, target_rssi in moves:
+            reason = fault_reason if from_ap in self.faulty_aps else "low_rssi"
+            self._roam_client(ClientRecord(self.clients, slot), from_ap, to_ap, reason, rssi, target_rssi)
+        return len(moves)
+
+    # Đầu vào của bài toán roaming: chỗ trống của mỗi AP theo chính sách tải (tải quy đổi
+    # ra số client tương đương), các AP lỗi và các client đang chờ lô FlowMod
+    def _roam_inputs(self):
+        free = {}
         for dpid in self.active_switches:
-            for mac in list(self.mac_to_port[dpid].keys()):
-                rssi = self.mac_rssi.get(mac, -100)
-                if rssi < RSSI_THRESHOLD or dpid in self.faulty_aps:
-                    alt_ap = self.find_least_loaded_ap(exclude_dpid=dpid)
-                    if alt_ap and alt_ap != dpid:
-                        self.logger.info(f"Roaming {mac} from AP {dpid} to AP {alt_ap} due to {'low RSSI' if rssi < RSSI_THRESHOLD else 'faulty AP'}")
-                        self.mac_to_port[dpid].pop(mac, None)  # Xóa khỏi AP cũ
-                        self.client_count[dpid] -= 1
-                        out_port = 1
-                        self.mac_to_port[alt_ap][mac] = out_port  # Gán sang AP mới
-                        self.client_count[alt_ap] = len(self.mac_to_port[alt_ap])
-                        match = self.datapaths[alt_ap].ofproto_parser.OFPMatch(eth_src=mac)
-                        actions = [self.datapaths[alt_ap].ofproto_parser.OFPActionOutput(out_port)]
-                        self.add_flow(self.datapaths[alt_ap], 1, match, actions)  # Tạo flow mới
-                        self.roaming_events.append({
-                            "mac": mac,
-                            "from_ap": dpid,
-                            "to_ap": alt_ap,
-                            "reason": "low_rssi" if rssi < RSSI_THRESHOLD else "ap_failure",
-                            "rssi": rssi,
-                            "time": time.time()
-                        })
+            if dpid not in self.faulty_aps:
+                state = self._ap_state(dpid)
+                seats = state.max_clients - state.clients if self.load_policy.admits(state) else 0
+                free[dpid] = (seats, self.load_policy.score(state) * state.max_clients)
+        return free, set(self.faulty_aps), list(self.pending_moves)
+
+    # Cài flow cho client trên AP mới (gom vào lô FlowMod); client chỉ được gán
+    # sang AP mới khi lô đã được xác nhận
+    def _roam_client(self, client, dpid, alt_ap, reason, rssi=None, target_rssi=None):
+        mac = int_to_mac(client.mac)
+        self.logger.info(f"Roaming {mac} from AP {dpid} to AP {alt_ap} due to {reason}")
+        out_port = WIRELESS_PORT
+        self._reserve_move(client.mac, dpid, alt_ap)
+        self.add_flow(self.datapaths[alt_ap], 1, {'eth_src': mac}, out_port, batch=True,
+                      cookie=client_cookie(client.mac))  # Tạo flow mới
+        event = {
+            "mac": mac,
+            "from_ap": dpid,
+            "to_ap": alt_ap,
+            "reason": reason,
+            "rssi": rssi,
+            "target_rssi": target_rssi,
+            "time": time.time()
+        }
+        self.flow_batcher.on_commit(alt_ap, partial(
+            self._finish_roam, client.mac, dpid, alt_ap, out_port, event))
 
     # Khi switch kết nối lần đầu → gán flow mặc định và ghi nhận thông tin
     @set_ev_cls(ofp_event.EventOFPSwitchFeatures, CONFIG_DISPATCHER)
+    @timed(HANDLER_SECONDS.labels('switch_features'))
     def switch_features_handler(self, ev):
         datapath = ev.msg.datapath
         parser = datapath.ofproto_parser
         ofproto = datapath.ofproto
-        match = parser.OFPMatch()
-        actions = [parser.OFPActionOutput(ofproto.OFPP_CONTROLLER, ofproto.OFPCML_NO_BUFFER)]
-        self.add_flow(datapath, 0, match, actions)
-
         dpid = datapath.id
+        self.flow_cache.clear(dpid)
+        self.add_flow(datapath, 0, {}, ofproto.OFPP_CONTROLLER, max_len=ofproto.OFPCML_NO_BUFFER,
+                      idle_timeout=0, hard_timeout=0)
+        if PROXY_ARP:
+            # Đưa mọi gói ARP lên controller để trả lời thay (proxy ARP)
+            self.add_flow(datapath, ARP_FLOW_PRIORITY, {'eth_type': ETH_TYPE_ARP}, ofproto.OFPP_CONTROLLER,
+                          max_len=ofproto.OFPCML_NO_BUFFER, idle_timeout=0, hard_timeout=0)
+        self.flow_batcher.probe(datapath)
+
         self.active_switches.add(dpid)
         self.switch_connect_time[dpid] = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime())
         self.datapaths[dpid] = datapath
         self.dpid_to_ip[dpid] = f"192.168.0.{dpid}"
+        self._update_co_channel()
+        self.stats_poller.add(dpid, time.time())
+        self.health.add(dpid)
+        self._sync_load_index(dpid)
+        # Hỏi các flow theo client còn trên switch để đối chiếu với bảng client
+        req = parser.OFPFlowStatsRequest(datapath, 0, ofproto.OFPTT_ALL, ofproto.OFPP_ANY, ofproto.OFPG_ANY,
+                                         CLIENT_COOKIE_TAG, CLIENT_COOKIE_TAG_MASK, parser.OFPMatch())
+        datapath.set_xid(req)
+        self.reconciling[dpid] = req.xid
+        datapath.send_msg(req)
         self.logger.info(f"Switch {dpid} connected at {self.switch_connect_time[dpid]}")
 
     # Khi switch ngắt kết nối → loại khỏi danh sách
@@ -136,49 +786,200 @@ class SDNWiFiLoadBalancer(app_manager.RyuApp):
         dpid = datapath.id
         if ev.state == DEAD_DISPATCHER:
             self.active_switches.discard(dpid)
-            self.mac_to_port.pop(dpid, None)
-            self.client_count.pop(dpid, None)
-            self.last_seen.pop(dpid, None)
+            self.clients.drop_ap(dpid)
+            self.port_stats.pop(dpid, None)
+            self.port_history.drop(dpid)
+            self.stats_poller.remove(dpid)
+            self.health.remove(dpid)
+            self.rssi_matrix.drop_ap(dpid)
             self.switch_connect_time.pop(dpid, None)
             self.dpid_to_ip.pop(dpid, None)
             self.datapaths.pop(dpid, None)
+            self.flow_cache.clear(dpid)
+            self.flow_batcher.drop(dpid, time.time())
+            self.flow_accounting.drop(dpid)
             self.faulty_aps.discard(dpid)
+            self.load_index.remove(dpid)
+            self._update_co_channel()
             self.logger.warning(f"Switch {dpid} disconnected")
 
     # Nhận thống kê lưu lượng từ switch
     @set_ev_cls(ofp_event.EventOFPPortStatsReply, MAIN_DISPATCHER)
+    @timed(HANDLER_SECONDS.labels('port_stats_reply'))
     def port_stats_reply_handler(self, ev):
         dpid = ev.msg.datapath.id
+        now = time.time()
         self.port_stats[dpid] = {}
         for stat in ev.msg.body:
             self.port_stats[dpid][stat.port_no] = {
                 'rx_bytes': stat.rx_bytes,
                 'tx_bytes': stat.tx_bytes
             }
+            self.port_history.record(dpid, stat.port_no, now, stat.rx_bytes, stat.tx_bytes)
+            if self.worker is not None:
+                self.port_samples.append((dpid, stat.port_no, now, stat.rx_bytes, stat.tx_bytes))
+        if not ev.msg.flags & ofproto_v1_3.OFPMPF_REPLY_MORE:
+            lag = self.stats_poller.reply(dpid, now)
+            if lag is not None:
+                STATS_REPLY_SECONDS.observe(lag)
+            # Bộ đếm đứng yên chỉ đáng ngờ khi AP đang có client
+            rate = self.port_history.ap_rate(dpid)
+            stalled = rate is not None and rate == (0, 0) and self.clients.count(dpid) > 0
+            self.health.counter_stall(dpid, stalled)
+            self._update_ap_health(dpid, "counter_stall")
+            self._sync_load_index(dpid)  # Tốc độ mới → điểm tải mới
+            self._adapt_poll_interval(dpid, now)
+
+    # Cổng của AP thay đổi trạng thái; cổng WiFi down → AP lỗi và client được chuyển đi ngay
+    @set_ev_cls(ofp_event.EventOFPPortStatus, MAIN_DISPATCHER)
+    @timed(HANDLER_SECONDS.labels('port_status'))
+    def port_status_handler(self, ev):
+        msg = ev.msg
+        dpid = msg.datapath.id
+        ofproto = msg.datapath.ofproto
+        desc = msg.desc
+        name = desc.name.decode(errors='replace') if isinstance(desc.name, bytes) else desc.name
+        if WIRELESS_PORT_TAG not in name and desc.port_no != WIRELESS_PORT:
+            return
+        down = (msg.reason == ofproto.OFPPR_DELETE
+                or bool(desc.state & ofproto.OFPPS_LINK_DOWN)
+                or bool(desc.config & ofproto.OFPPC_PORT_DOWN))
+        if self.health.port_status(dpid, desc.port_no, down):
+            self.logger.info(f"Port {name} ({desc.port_no}) on AP {dpid} is {'down' if down else 'up'}")
+            self._update_ap_health(dpid, "port_down" if down else "port_up")
+
+    # Echo reply của bộ giám sát sức khỏe → RTT tới AP
+    @set_ev_cls(ofp_event.EventOFPEchoReply, MAIN_DISPATCHER)
+    @timed(HANDLER_SECONDS.labels('echo_reply'))
+    def echo_reply_handler(self, ev):
+        sent = echo_sent_time(ev.msg.data)
+        if sent is None:
+            return
+        dpid = ev.msg.datapath.id
+        rtt = self.health.echo_reply(dpid, sent, time.time())
+        if rtt is not None:
+            ECHO_RTT_SECONDS.observe(rtt)
+            self._update_ap_health(dpid, "echo_reply")
+
+    # Switch báo flow đã bị xóa (hết timeout hoặc bị xóa) → cập nhật cache
+    @set_ev_cls(ofp_event.EventOFPFlowRemoved, MAIN_DISPATCHER)
+    @timed(HANDLER_SECONDS.labels('flow_removed'))
+    def flow_removed_handler(self, ev):
+        msg = ev.msg
+        self.flow_cache.remove(msg.datapath.id, msg.priority, msg.match)
+        delta = self.flow_accounting.flow_removed(msg.datapath.id, msg)
+        if delta is not None:
+            self._fold_traffic(*delta)
+
+    # Flow stats của các flow theo client → cộng dồn lưu lượng vào bản ghi client
+    @set_ev_cls(ofp_event.EventOFPFlowStatsReply, MAIN_DISPATCHER)
+    @timed(HANDLER_SECONDS.labels('flow_stats_reply'))
+    def flow_stats_reply_handler(self, ev):
+        msg = ev.msg
+        dpid = msg.datapath.id
+        if self.reconciling.get(dpid) == msg.xid:
+            self._reconcile_flows(msg.datapath, msg.body)
+            if not msg.flags & ofproto_v1_3.OFPMPF_REPLY_MORE:
+                del self.reconciling[dpid]
+            return
+        for delta in self.flow_accounting.flow_stats(dpid, msg.body):
+            self._fold_traffic(*delta)
+        if not msg.flags & ofproto_v1_3.OFPMPF_REPLY_MORE:
+            sweep = self.flow_accounting.reply_done(dpid, msg.xid, time.time())
+            if sweep is not None:
+                self._update_client_rates(dpid, *sweep)
+
+    # Đối chiếu flow theo client còn trên switch (từ trước khi controller khởi động lại)
+    # với bảng client: giữ flow của client đang gắn với AP này và ghi vào cache để
+    # không cài lại, xóa các flow còn lại
+    def _reconcile_flows(self, datapath, stats):
+        dpid = datapath.id
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        kept = []
+        stale = 0
+        for stat in stats:
+            mac = cookie_mac(stat.cookie)
+            if mac is None:
+                continue
+            if self.clients.ap_of(mac) == dpid:
+                actions = [action for inst in stat.instructions for action in getattr(inst, 'actions', ())]
+                self.flow_cache.adopt(dpid, stat.priority, stat.match, actions_key(actions))
+                kept.append(stat)
+                continue
+            mod = parser.OFPFlowMod(datapath=datapath, cookie=stat.cookie, cookie_mask=0xFFFFFFFFFFFFFFFF,
+                                    command=ofproto.OFPFC_DELETE_STRICT, priority=stat.priority,
+                                    out_port=ofproto.OFPP_ANY, out_group=ofproto.OFPG_ANY, match=stat.match)
+            self.flow_batcher.queue(datapath, mod)
+            FLOW_MODS_DELETE.inc()
+            stale += 1
+        self.flow_accounting.baseline(dpid, kept)
+        if kept or stale:
+            self.logger.info(f"Reconciled flows on AP {dpid}: kept {len(kept)}, removing {stale} stale")
+
+    # Barrier reply → lô FlowMod tương ứng đã được switch xử lý xong
+    @set_ev_cls(ofp_event.EventOFPBarrierReply, MAIN_DISPATCHER)
+    def barrier_reply_handler(self, ev):
+        self.flow_batcher.confirm(ev.msg.datapath.id, ev.msg.xid, time.time())
 
-    # Thêm flow vào bảng định tuyến của switch
-    def add_flow(self, datapath, priority, match, actions):
+    # Reply của bundle (dò hỗ trợ bundle hoặc commit lô FlowMod)
+    @set_ev_cls(ofp_event.EventONFBundleCtrlMsg, MAIN_DISPATCHER)
+    def bundle_ctrl_handler(self, ev):
+        self.flow_batcher.bundle_reply(ev.msg.datapath, ev.msg, time.time())
+
+    # Thông báo lỗi từ switch → đánh dấu lô FlowMod chứa message lỗi là thất bại
+    @set_ev_cls(ofp_event.EventOFPErrorMsg, MAIN_DISPATCHER)
+    def error_msg_handler(self, ev):
+        msg = ev.msg
+        dpid = msg.datapath.id
+        if self.flow_batcher.error(dpid, msg.xid, time.time()) is not None:
+            self.logger.warning(f"OpenFlow error from AP {dpid} in flow batch: type={msg.type} code={msg.code}")
+
+    # Thêm flow match theo các trường `fields` (dict) và xuất ra out_port vào bảng định tuyến
+    # của switch (bỏ qua nếu flow đã được cài; cache được kiểm tra trước khi dựng OFPMatch/action).
+    # batch=True → gom vào lô FlowMod của chu kỳ giám sát thay vì gửi ngay
+    def add_flow(self, datapath, priority, fields, out_port, max_len=ofproto_v1_3.OFPCML_MAX,
+                 idle_timeout=FLOW_IDLE_TIMEOUT, hard_timeout=FLOW_HARD_TIMEOUT, batch=False, cookie=0):
+        if not self.flow_cache.add(datapath.id, priority, fields, output_key(out_port)):
+            return
         ofproto = datapath.ofproto
         parser = datapath.ofproto_parser
+        match = parser.OFPMatch(**fields)
+        actions = [parser.OFPActionOutput(out_port, max_len)]
         inst = [parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS, actions)]
-        mod = parser.OFPFlowMod(datapath=datapath, priority=priority, match=match, instructions=inst)
-        datapath.send_msg(mod)
+        mod = parser.OFPFlowMod(datapath=datapath, cookie=cookie, priority=priority, match=match, instructions=inst,
+                                idle_timeout=idle_timeout, hard_timeout=hard_timeout,
+                                flags=ofproto.OFPFF_SEND_FLOW_REM)
+        FLOW_MODS_ADD.inc()
+        if batch:
+            self.flow_batcher.queue(datapath, mod)
+        else:
+            datapath.send_msg(mod)
 
-    # Tìm AP đang hoạt động có ít client nhất
+    # Xóa các flow của một client (theo MAC nguồn và MAC đích) trên AP, nếu cache có ghi nhận
+    def _delete_client_flows(self, dpid, mac, batch=False):
+        datapath = self.datapaths.get(dpid)
+        if datapath is None or not self.flow_cache.pop_mac(dpid, mac):
+            return
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        for match in (parser.OFPMatch(eth_src=mac), parser.OFPMatch(eth_dst=mac)):
+            mod = parser.OFPFlowMod(datapath=datapath, command=ofproto.OFPFC_DELETE,
+                                    out_port=ofproto.OFPP_ANY, out_group=ofproto.OFPG_ANY,
+                                    match=match)
+            FLOW_MODS_DELETE.inc()
+            if batch:
+                self.flow_batcher.queue(datapath, mod)
+            else:
+                datapath.send_msg(mod)
+
+    # Tìm AP đang hoạt động có điểm tải thấp nhất (truy vấn chỉ mục tải, O(log N))
     def find_least_loaded_ap(self, exclude_dpid=None):
-        best_ap = None
-        min_clients = float('inf')
-        for dpid in self.active_switches:
-            if dpid == exclude_dpid or dpid in self.faulty_aps:
-                continue
-            count = self.client_count.get(dpid, 0)
-            if count < min_clients and count < MAX_CLIENTS_PER_AP:
-                min_clients = count
-                best_ap = dpid
-        return best_ap
+        return self.load_index.least_loaded(exclude_dpid)
 
     # Hàm xử lý gói tin đầu vào từ AP
     @set_ev_cls(ofp_event.EventOFPPacketIn, MAIN_DISPATCHER)
+    @timed(PACKET_IN_SECONDS)
     def packet_in_handler(self, ev):
         msg = ev.msg
         datapath = msg.datapath
@@ -186,117 +987,285 @@ class SDNWiFiLoadBalancer(app_manager.RyuApp):
         parser = datapath.ofproto_parser
         dpid = datapath.id
 
-        pkt = packet.Packet(msg.data)
-        eth = pkt.get_protocol(ethernet.ethernet)
-        if eth.ethertype == 0x88cc:
+        # Chỉ đọc header Ethernet từ buffer; ARP/IPv4 được đọc theo offset khi cần
+        data = msg.data
+        header = parse_eth_header(data)
+        if header is None:
+            return
+        dst_mac, src_mac, ethertype, l3 = header
+        if ethertype == ETH_TYPE_LLDP:
             return  # Bỏ qua LLDP
 
-        dst = eth.dst
-        src = eth.src
         in_port = msg.match['in_port']
+        now = time.time()
 
-        # Ghi nhận địa chỉ IP từ gói ARP hoặc IPv4
-        pkt_arp = pkt.get_protocol(arp.arp)
-        pkt_ip = pkt.get_protocol(ipv4.ipv4)
-        if pkt_arp and pkt_arp.src_ip:
-            self.mac_to_ip[pkt_arp.src_mac] = pkt_arp.src_ip
-        elif pkt_ip:
-            self.mac_to_ip[src] = pkt_ip.src
+        # Ghi nhận địa chỉ IP từ gói ARP hoặc IPv4 (chỉ ghi khi IP thay đổi)
+        client = self.get_client(src_mac, now)
+        if ethertype == ETH_TYPE_ARP:
+            sender = arp_sender(data, l3)
+            if sender is not None and sender[1]:
+                sender_client = client if sender[0] == src_mac else self.get_client(sender[0], now)
+                if sender_client.ip != sender[1]:
+                    sender_client.ip = sender[1]
+        elif ethertype == ETH_TYPE_IP:
+            ip = ipv4_src(data, l3)
+            if ip is not None and client.ip != ip:
+                client.ip = ip
+        src = int_to_mac(src_mac)
 
         # Nếu AP đã đầy → chuyển hướng sang AP khác
-        if src not in self.mac_to_port[dpid]:
-            if self.client_count[dpid] >= MAX_CLIENTS_PER_AP:
+        if self.clients.ap_of(src_mac) != dpid:
+            if not self._admits(dpid):
                 alt_ap = self.find_least_loaded_ap(exclude_dpid=dpid)
                 if alt_ap:
                     self.logger.info(f"Redirecting {src} from AP {dpid} to AP {alt_ap}")
-                    for ap in list(self.mac_to_port):
-                        self.mac_to_port[ap].pop(src, None)
-                        self.client_count[ap] = len(self.mac_to_port[ap])
-                    out_port = 1
-                    self.mac_to_port[alt_ap][src] = out_port
-                    self.client_count[alt_ap] = len(self.mac_to_port[alt_ap])
-                    match = self.datapaths[alt_ap].ofproto_parser.OFPMatch(eth_src=src)
-                    actions = [self.datapaths[alt_ap].ofproto_parser.OFPActionOutput(out_port)]
-                    self.add_flow(self.datapaths[alt_ap], 1, match, actions)
+                    out_port = WIRELESS_PORT
+                    self._move_client(src_mac, alt_ap, out_port)
+                    client.last_seen = now
+                    self.add_flow(self.datapaths[alt_ap], 1, {'eth_src': src}, out_port,
+                                  cookie=client_cookie(src_mac))
                 else:
                     self.logger.warning(f"No available AP for {src}, dropping connection")
                 return
             
         # Cập nhật bảng MAC → port
-        self.mac_to_port[dpid][src] = in_port
-        self.last_seen[dpid][src] = time.time()
-        self.client_count[dpid] = len(self.mac_to_port[dpid])
+        self._move_client(src_mac, dpid, in_port)
+        client.last_seen = now
 
-        out_port = self.mac_to_port[dpid].get(dst, ofproto.OFPP_FLOOD)
-        actions = [parser.OFPActionOutput(out_port)]
+        # Proxy ARP: trả lời ngay nếu đã biết IP đích, chỉ flood khi chưa biết
+        if PROXY_ARP and ethertype == ETH_TYPE_ARP and self._proxy_arp(datapath, data, l3, src_mac, in_port):
+            return
 
+        dst_client = self.clients.get(dst_mac)
+        if dst_client is not None and dst_client.dpid == dpid:
+            out_port = dst_client.port
+        else:
+            out_port = ofproto.OFPP_FLOOD
         if out_port != ofproto.OFPP_FLOOD:
-            match = parser.OFPMatch(in_port=in_port, eth_dst=dst, eth_src=src)
-            self.add_flow(datapath, 1, match, actions)
+            fields = {'in_port': in_port, 'eth_dst': int_to_mac(dst_mac), 'eth_src': src}
+            self.add_flow(datapath, 1, fields, out_port, cookie=client_cookie(src_mac))
 
         out = parser.OFPPacketOut(
             datapath=datapath, buffer_id=msg.buffer_id,
-            in_port=in_port, actions=actions,
-            data=msg.data if msg.buffer_id == ofproto.OFP_NO_BUFFER else None
+            in_port=in_port, actions=[parser.OFPActionOutput(out_port)],
+            data=data if msg.buffer_id == ofproto.OFP_NO_BUFFER else None
         )
         datapath.send_msg(out)
+        PACKET_OUTS_FORWARD.inc()
 
-# REST API cung cấp trạng thái hệ thống
-class SDNLBRestAPI(ControllerBase):
+    # Trả lời ARP request thay cho host đích; trả về True nếu đã trả lời
+    def _proxy_arp(self, datapath, data, offset, src_mac, in_port):
+        target = arp_target(data, offset)
+        if target is None or target[0] != ARP_REQUEST:
+            return False
+        sender = arp_sender(data, offset)
+        target_mac = self.clients.mac_of_ip(target[1])
+        if sender is None or target_mac is None or target_mac == src_mac:
+            return False
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        out = parser.OFPPacketOut(
+            datapath=datapath, buffer_id=ofproto.OFP_NO_BUFFER,
+            in_port=ofproto.OFPP_CONTROLLER, actions=[parser.OFPActionOutput(in_port)],
+            data=arp_reply_frame(target_mac, target[1], sender[0], sender[1])
+        )
+        datapath.send_msg(out)
+        PACKET_OUTS_PROXY_ARP.inc()
+        self.proxy_arp_replies += 1
+        return True
+
+# REST API của tiến trình: metric Prometheus và profiler. Khi ANALYTICS_WORKER, controller
+# chỉ phục vụ phần này, còn SDNLBRestAPI chạy trong worker phân tích (có /metrics, /profile riêng)
+class ControllerAPI(ControllerBase):
     def __init__(self, req, link, data, **config):
-        super(SDNLBRestAPI, self).__init__(req, link, data, **config)
+        super(ControllerAPI, self).__init__(req, link, data, **config)
         self.sdn_app = data[SDN_LB_INSTANCE_NAME]
 
+    # Metric theo định dạng văn bản của Prometheus
+    @route('metrics', '/metrics', methods=['GET'])
+    def get_prometheus_metrics(self, req, **kwargs):
+        return Response(content_type='text/plain', charset='utf-8', text=REGISTRY.render(),
+                        headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
+
+    # Lấy mẫu stack trong `seconds` giây (mỗi `interval_ms` ms thời gian CPU) rồi trả về các
+    # stack nóng nhất dạng folded (dùng được với flamegraph.pl). Chỉ khi PROFILER_ENABLED
+    @route('profile', '/profile', methods=['GET'])
+    def get_profile(self, req, **kwargs):
+        if not PROFILER_ENABLED:
+            return Response(status=403, text="Profiler disabled (set PROFILER_ENABLED = True)")
+        sampler = self.sdn_app.sampler
+        try:
+            seconds = min(float(req.GET.get('seconds', 5)), PROFILE_MAX_SECONDS)
+            interval = float(req.GET.get('interval_ms', 5)) / 1000
+            top = int(req.GET.get('top', 100))
+            if not (seconds > 0 and 0 < interval <= PROFILE_MAX_SECONDS and top > 0):
+                raise ValueError("seconds, interval_ms and top must be positive")
+        except ValueError:
+            return Response(status=400, text="Invalid seconds, interval_ms or top")
+        if sampler.running:
+            return Response(status=409, text="Profiler already running")
+        try:
+            sampler.start(interval)
+        except (ValueError, OSError) as e:
+            return Response(status=400, text=f"Cannot start profiler: {e}")
+        try:
+            hub.sleep(seconds)
+        finally:
+            sampler.stop()
+        header = ''.join(f"# {count:6d} {name}\n" for name, count in sampler.hot_functions())
+        return Response(content_type='text/plain', charset='utf-8',
+                        text=f"# {sampler.total} samples in {seconds:.1f}s\n{header}{sampler.folded(top)}")
+
+
+# REST API cung cấp trạng thái hệ thống
+class SDNLBRestAPI(ControllerAPI):
+    def _view(self, name):
+        return self.sdn_app.snapshots.current.views[name]
+
+    # Trả lời từ snapshot hiện tại: 304 nếu If-None-Match khớp ETag, phần thay đổi
+    # nếu có ?since=<phiên bản>, ngược lại toàn bộ view (hoặc các phần tử `indexes`)
+    def _snapshot_response(self, req, view, indexes=None, headers=None):
+        if view.etag in req.if_none_match:
+            response = Response(status=304)
+        elif 'since' in req.GET:
+            try:
+                since = int(req.GET['since'])
+            except ValueError:
+                return Response(status=400, text="Invalid since")
+            response = Response(content_type='application/json', text=view_delta(view, since))
+        else:
+            body = view.body if indexes is None else view_body(view, indexes)
+            response = Response(content_type='application/json', text=body)
+        response.etag = view.etag
+        response.cache_control = 'no-cache'
+        response.headers['X-Snapshot-Version'] = str(view.version)
+        response.headers.update(headers or {})
+        return response
+
     # Trả về thông tin tải từng AP
     @route('load_status', '/load_status', methods=['GET'])
+    @timed(REST_SECONDS.labels('load_status'))
     def get_ap_load(self, req, **kwargs):
-        status = {
+        return self._snapshot_response(req, self._view('load_status'))
+
+    # Trả về danh sách client (host) đang kết nối, sắp theo MAC.
+    # Tham số: ap (lọc theo AP), mac (lọc theo tiền tố MAC), offset/limit (phân trang,
+    # tổng số client sau khi lọc ở header X-Total-Count), since (chỉ phần thay đổi)
+    @route('host_status', '/host_status', methods=['GET'])
+    @timed(REST_SECONDS.labels('host_status'))
+    def get_host_status(self, req, **kwargs):
+        params = req.GET
+        view = self._view('host_status')
+        if not any(key in params for key in ('ap', 'mac', 'offset', 'limit')):
+            return self._snapshot_response(req, view)
+        if 'since' in params:
+            return Response(status=400, text="since cannot be combined with filters or pagination")
+        try:
+            ap = int(params['ap']) if 'ap' in params else None
+            offset = max(int(params.get('offset', 0)), 0)
+            limit = min(max(int(params.get('limit', HOST_PAGE_MAX)), 0), HOST_PAGE_MAX)
+        except ValueError:
+            return Response(status=400, text="Invalid ap, offset or limit")
+        prefix = params.get('mac', '').lower()
+        indexes = view_select(view, lambda mac, dpid: (ap is None or dpid == ap) and mac.startswith(prefix))
+        return self._snapshot_response(req, view, indexes[offset:offset + limit],
+                                       {'X-Total-Count': str(len(indexes))})
+
+    # Trả về tốc độ rx/tx (bit/giây), EWMA và phân vị của từng cổng.
+    # Tham số: dpid (lọc theo AP), window (giây, mặc định 300), series=1 (kèm chuỗi tốc độ)
+    @route('port_rates', '/port_rates', methods=['GET'])
+    @timed(REST_SECONDS.labels('port_rates'))
+    def get_port_rates(self, req, **kwargs):
+        history = self.sdn_app.port_history
+        try:
+            window = float(req.GET.get('window', 300))
+            dpids = [int(req.GET['dpid'])] if 'dpid' in req.GET else history.dpids()
+        except ValueError:
+            return Response(status=400, text="Invalid dpid or window")
+        series = req.GET.get('series') == '1'
+        rates = {
             str(dpid): {
-                "ip": self.sdn_app.dpid_to_ip.get(dpid, "N/A"),
-                "clients": self.sdn_app.client_count.get(dpid, 0),
-                "last_seen": self.sdn_app.switch_connect_time.get(dpid, "unknown"),
-                "mac_table": list(self.sdn_app.mac_to_port[dpid].keys()),
-                "port_stats": self.sdn_app.port_stats.get(dpid, {}),
-                "is_faulty": dpid in self.sdn_app.faulty_aps
+                str(port): history.port_summary(dpid, port, window, series)
+                for port in history.ports(dpid)
             }
-            for dpid in self.sdn_app.active_switches
+            for dpid in dpids
         }
-        return Response(content_type='application/json', text=json.dumps(status))
+        return Response(content_type='application/json', text=json.dumps(rates))
 
-    # Trả về danh sách client (host) đang kết nối
-    @route('host_status', '/host_status', methods=['GET'])
-    def get_host_status(self, req, **kwargs):
-        host_info = []
-        for dpid in self.sdn_app.active_switches:
-            for mac, port in self.sdn_app.mac_to_port.get(dpid, {}).items():
-                stats = self.sdn_app.port_stats[dpid].get(port, {})
-                host_info.append({
-                    "mac": mac,
-                    "ip": self.sdn_app.mac_to_ip.get(mac, "N/A"),
-                    "ap": dpid,
-                    "port": port,
-                    "rx_bytes": stats.get('rx_bytes', 0),
-                    "tx_bytes": stats.get('tx_bytes', 0),
-                    "rssi": self.sdn_app.mac_rssi.get(mac, -100)
-                })
-        return Response(content_type='application/json', text=json.dumps(host_info))
+    # Xem hoặc đổi chính sách chấm điểm tải.
+    # PUT/POST {"name": "weighted", "params": {"rate_weight": 0.8}}
+    @route('load_policy', '/load_policy', methods=['GET', 'PUT', 'POST'])
+    @timed(REST_SECONDS.labels('load_policy'))
+    def load_policy(self, req, **kwargs):
+        if req.method != 'GET':
+            try:
+                body = json.loads(req.body)
+                self.sdn_app.set_load_policy(body['name'], body.get('params', {}))
+            except (ValueError, KeyError, TypeError) as e:
+                return Response(status=400, text=f"Invalid load policy: {e}")
+        policy = dict(self.sdn_app.load_policy.describe(), available=sorted(POLICIES))
+        return Response(content_type='application/json', text=json.dumps(policy))
 
     # API nhận dữ liệu RSSI từ station gửi về
     @route('update_rssi', '/update_rssi', methods=['POST'])
+    @timed(REST_SECONDS.labels('update_rssi'))
     def update_rssi(self, req, **kwargs):
-        data = json.loads(req.body)
-        mac = data.get('mac')
-        rssi = data.get('rssi')
-        self.sdn_app.mac_rssi[mac] = rssi
+        try:
+            data = json.loads(req.body)
+            if not isinstance(data, dict):
+                raise ValueError("Expected a JSON object with mac and rssi")
+            sample = parse_rssi_sample(data.get('mac'), None, data.get('rssi'), None)
+        except ValueError as e:
+            return Response(status=400, text=str(e))
+        self.sdn_app.ingest_rssi([sample], time.time())
         return Response(text="OK", status=200)
 
+    # API nhận lô RSSI: JSON {"samples": [[mac, ap, rssi, thời điểm], ...]} hoặc lô nhị phân
+    # (Content-Type: application/octet-stream, định dạng trong rssi_batch.py)
+    @route('update_rssi_batch', '/update_rssi_batch', methods=['POST'])
+    @timed(REST_SECONDS.labels('update_rssi_batch'))
+    def update_rssi_batch(self, req, **kwargs):
+        try:
+            if req.content_type == RSSI_BATCH_CONTENT_TYPE:
+                samples = unpack_rssi_batch(req.body)
+            else:
+                samples = parse_rssi_json(json.loads(req.body))
+        except ValueError as e:
+            return Response(status=400, text=str(e))
+        applied = self.sdn_app.ingest_rssi(samples, time.time())
+        return Response(content_type='application/json',
+                        text=json.dumps({"received": len(samples), "applied": applied}))
+
+    # Truy vấn lịch sử roaming. Tham số: mac, ap (AP đi hoặc đến), start/end (epoch giây,
+    # số âm = tính lùi từ hiện tại, ví dụ start=-3600), limit (lấy các sự kiện mới nhất),
+    # ping_pong=<giây> (kèm các lần client quay lại AP cũ trong khoảng này)
+    @route('roaming_events', '/roaming_events', methods=['GET'])
+    @timed(REST_SECONDS.labels('roaming_events'))
+    def get_roaming_events(self, req, **kwargs):
+        params = req.GET
+        now = time.time()
+        try:
+            ap = int(params['ap']) if 'ap' in params else None
+            start, end = (float(params[key]) if key in params else None for key in ('start', 'end'))
+            limit = int(params.get('limit', ROAMING_QUERY_MAX))
+            if limit < 1:
+                raise ValueError(f"limit must be at least 1, got {limit}")
+            limit = min(limit, ROAMING_QUERY_MAX)
+            window = float(params['ping_pong'] or PING_PONG_WINDOW) if 'ping_pong' in params else None
+            mac = int_to_mac(mac_to_int(params['mac'])) if 'mac' in params else None
+        except (ValueError, OverflowError):
+            return Response(status=400, text="Invalid mac, ap, start, end, limit or ping_pong")
+        start = now + start if start is not None and start < 0 else start
+        end = now + end if end is not None and end < 0 else end
+        log = self.sdn_app.roaming_log or self.sdn_app.roaming_events
+        events = log.query(mac, ap, start, end, limit)
+        result = {"count": len(events), "events": events}
+        if window is not None:
+            result["ping_pongs"] = ping_pongs(events, window)
+        return Response(content_type='application/json', text=json.dumps(result))
+
     # Trả về các số liệu hiệu năng của toàn hệ thống
     @route('performance_metrics', '/performance_metrics', methods=['GET'])
+    @timed(REST_SECONDS.labels('performance_metrics'))
     def get_metrics(self, req, **kwargs):
-        metrics = {
-            "total_clients": sum(self.sdn_app.client_count.values()),
-            "ap_load": dict(self.sdn_app.client_count),
-            "faulty_aps": list(self.sdn_app.faulty_aps),
-            "roaming_events": self.sdn_app.roaming_events[-10:]
-        }
-        return Response(content_type='application/json', text=json.dumps(metrics))
+        return self._snapshot_response(req, self._view('performance_metrics'))
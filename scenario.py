@@ -0,0 +1,294 @@
+import csv
+import json
+from collections import namedtuple
+
+import numpy as np
+
+CHANNELS = (1, 6, 11)  # Các kênh 2.4 GHz không chồng lấn
+CHUNK = 4096  # Số station xử lý mỗi lần khi tính ma trận khoảng cách station × AP
+ASSOC_HYSTERESIS_DB = 5  # Station chỉ tự đổi AP khi AP mới mạnh hơn ít nhất số dB này
+
+# Một AP của sơ đồ: vị trí (m), kênh và bán kính phủ sóng (m)
+APSpec = namedtuple('APSpec', 'dpid name x y channel range')
+
+# Sơ đồ resort gốc: 3 AP trên một hàng và 8 station cố định
+RESORT_LAYOUT = (
+    APSpec(1, 'ap_lobby', 20.0, 50.0, 1, 35.0),
+    APSpec(2, 'ap_pool', 50.0, 50.0, 6, 35.0),
+    APSpec(3, 'ap_conf', 80.0, 50.0, 11, 35.0),
+)
+RESORT_BOUNDS = (100.0, 100.0)
+RESORT_STATIONS = ((5, 50), (50, 15), (95, 50), (35, 50), (65, 50), (35, 65), (50, 50), (50, 53))
+
+
+# Lưới rows × cols AP cách nhau `spacing` m; kênh xen kẽ để AP kề nhau khác kênh.
+# Trả về (danh sách APSpec, kích thước vùng (rộng, cao))
+def grid_layout(rows, cols, spacing=30.0, ap_range=35.0, channels=CHANNELS):
+    margin = spacing / 2
+    aps = []
+    for r in range(rows):
+        for c in range(cols):
+            dpid = r * cols + c + 1
+            aps.append(APSpec(dpid, f'ap{dpid}', margin + c * spacing, margin + r * spacing,
+                              channels[(c + 2 * r) % len(channels)], ap_range))
+    return aps, (2 * margin + (cols - 1) * spacing, 2 * margin + (rows - 1) * spacing)
+
+
+# Sơ đồ tầng từ file JSON: {"bounds": [rộng, cao], "aps": [{"name", "x", "y", "channel",
+# "range", "dpid" (tùy chọn)}, ...]}
+def load_floor_plan(path):
+    with open(path) as f:
+        plan = json.load(f)
+    aps = []
+    for i, ap in enumerate(plan['aps']):
+        dpid = int(ap.get('dpid', i + 1))
+        aps.append(APSpec(dpid, ap.get('name', f'ap{dpid}'), float(ap['x']), float(ap['y']),
+                          int(ap.get('channel', CHANNELS[i % len(CHANNELS)])), float(ap.get('range', 35.0))))
+    if 'bounds' in plan:
+        bounds = tuple(float(v) for v in plan['bounds'])
+    else:
+        bounds = (max(ap.x + ap.range for ap in aps), max(ap.y + ap.range for ap in aps))
+    return aps, bounds
+
+
+# Mô hình suy hao log-khoảng cách: RSSI = P_tx - PL(1 m) - 10·n·log10(d), cộng
+# nhiễu shadowing Gauss `shadowing_db` (dB) nếu có bộ sinh số ngẫu nhiên
+class PathLoss(object):
+    def __init__(self, tx_power=20.0, ref_loss=40.0, exponent=3.0, shadowing_db=0.0):
+        self.tx_power = tx_power
+        self.ref_loss = ref_loss
+        self.exponent = exponent
+        self.shadowing_db = shadowing_db
+
+    def rssi(self, distance, rng=None):
+        rssi = self.tx_power - self.ref_loss - 10 * self.exponent * np.log10(np.maximum(distance, 1.0))
+        if rng is not None and self.shadowing_db:
+            rssi = rssi + rng.normal(0.0, self.shadowing_db, np.shape(rssi))
+        return rssi
+
+
+# Station đứng yên tại các vị trí cho trước
+class StaticPositions(object):
+    def __init__(self, positions):
+        self.positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def step(self, dt):
+        return self.positions
+
+
+# Random waypoint: mỗi station đi thẳng tới một điểm ngẫu nhiên với tốc độ ngẫu nhiên,
+# dừng một lúc rồi chọn điểm mới. Cập nhật vector hóa cho mọi station mỗi bước
+class RandomWaypoint(object):
+    def __init__(self, num_stations, bounds, speed=(0.5, 1.5), pause=(0.0, 10.0), rng=None, positions=None):
+        self.bounds = np.asarray(bounds, dtype=float)
+        self.speed_range = speed
+        self.pause_range = pause
+        self.rng = rng if rng is not None else np.random.default_rng()
+        if positions is None:
+            positions = self._random_points(num_stations)
+        self.positions = np.asarray(positions, dtype=float).reshape(-1, 2).copy()
+        self._target = self._random_points(num_stations)
+        self._speed = self.rng.uniform(*speed, num_stations)
+        self._pause = np.zeros(num_stations)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def _random_points(self, count):
+        return self.rng.uniform(0.0, 1.0, (count, 2)) * self.bounds
+
+    def step(self, dt):
+        moving = np.maximum(dt - self._pause, 0.0)
+        self._pause = np.maximum(self._pause - dt, 0.0)
+        delta = self._target - self.positions
+        dist = np.hypot(delta[:, 0], delta[:, 1])
+        travel = self._speed * moving
+        arrived = (travel >= dist) & (moving > 0)
+        frac = np.where(arrived, 1.0, travel / np.maximum(dist, 1e-9))
+        self.positions += delta * frac[:, None]
+        done = np.flatnonzero(arrived)
+        if len(done):
+            self._target[done] = self._random_points(len(done))
+            self._speed[done] = self.rng.uniform(*self.speed_range, len(done))
+            self._pause[done] = self.rng.uniform(*self.pause_range, len(done))
+        return self.positions
+
+
+# Di chuyển theo trace CSV (time,station,x,y; station đánh số từ 0): vị trí nội suy
+# tuyến tính giữa các mốc, giữ nguyên trước mốc đầu và sau mốc cuối
+class TraceMobility(object):
+    def __init__(self, path):
+        rows = {}
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                rows.setdefault(int(row['station']), []).append(
+                    (float(row['time']), float(row['x']), float(row['y'])))
+        self._tracks = []
+        for station in range(max(rows) + 1 if rows else 0):
+            track = np.array(sorted(rows.get(station, [(0.0, 0.0, 0.0)])))
+            self._tracks.append((track[:, 0], track[:, 1], track[:, 2]))
+        self.time = 0.0
+        self.positions = self._at(0.0)
+
+    def __len__(self):
+        return len(self._tracks)
+
+    def _at(self, t):
+        return np.array([(np.interp(t, times, xs), np.interp(t, times, ys))
+                         for times, xs, ys in self._tracks]).reshape(-1, 2)
+
+    def step(self, dt):
+        self.time += dt
+        self.positions = self._at(self.time)
+        return self.positions
+
+
+# Ghi lại quỹ đạo của một mô hình di chuyển thành trace CSV để phát lại đúng như cũ
+def record_trace(path, mobility, duration, dt):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(('time', 'station', 'x', 'y'))
+        t = 0.0
+        positions = mobility.step(0.0)
+        while True:
+            for station, (x, y) in enumerate(positions):
+                writer.writerow((f'{t:.3f}', station, f'{x:.2f}', f'{y:.2f}'))
+            if t >= duration:
+                break
+            t += dt
+            positions = mobility.step(dt)
+
+
+# Ma trận lưu lượng lấy mẫu: mỗi station có mức hoạt động riêng (log-normal, vài
+# station rất bận); mỗi khoảng dt sinh Poisson(rate·dt) luồng, tối đa `max_flows`,
+# nguồn và đích chọn theo mức hoạt động. Chi phí tỉ lệ với số luồng, không phải n²
+class TrafficMatrix(object):
+    def __init__(self, num_stations, rate, max_flows=None, skew=1.0, rng=None):
+        self.rate = rate
+        self.max_flows = max_flows
+        self.rng = rng if rng is not None else np.random.default_rng()
+        weights = self.rng.lognormal(0.0, skew, num_stations) if skew else np.ones(num_stations)
+        self._cumulative = np.cumsum(weights / weights.sum())
+
+    # Mảng (k, 2) các cặp (nguồn, đích) của khoảng dt, nguồn khác đích
+    def sample(self, dt):
+        count = self.rng.poisson(self.rate * dt)
+        if self.max_flows is not None:
+            count = min(count, self.max_flows)
+        if count == 0 or len(self._cumulative) < 2:
+            return np.zeros((0, 2), dtype=np.int64)
+        pairs = np.searchsorted(self._cumulative, self.rng.random((count, 2)), side='right')
+        pairs = np.minimum(pairs, len(self._cumulative) - 1)
+        return pairs[pairs[:, 0] != pairs[:, 1]]
+
+
+# Kịch bản: sơ đồ AP, di chuyển của station, mô hình suy hao và ma trận lưu lượng.
+# step() cập nhật vị trí và AP mà mỗi station kết nối (AP mạnh nhất trong tầm, chỉ
+# đổi khi AP cũ ra khỏi tầm hoặc AP mới mạnh hơn ASSOC_HYSTERESIS_DB)
+class Scenario(object):
+    def __init__(self, aps, mobility, path_loss=None, traffic=None, rng=None):
+        self.aps = list(aps)
+        self.mobility = mobility
+        self.path_loss = path_loss or PathLoss()
+        self.traffic = traffic
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.dpids = np.array([ap.dpid for ap in self.aps], dtype=np.int64)
+        self._ap_xy = np.array([(ap.x, ap.y) for ap in self.aps], dtype=float).reshape(-1, 2)
+        self._ap_range = np.array([ap.range for ap in self.aps], dtype=float)
+        self.time = 0.0
+        self.positions = mobility.step(0.0)
+        self.associated = np.full(len(mobility), -1, dtype=np.int64)  # Chỉ số AP, -1 = ngoài tầm
+        self._associate()
+
+    def __len__(self):
+        return len(self.mobility)
+
+    # RSSI trung bình (không nhiễu) của các station [start, stop) tới mọi AP, NaN nếu ngoài tầm
+    def _rssi_block(self, start, stop, rng=None):
+        delta = self.positions[start:stop, None, :] - self._ap_xy[None, :, :]
+        dist = np.hypot(delta[..., 0], delta[..., 1])
+        rssi = self.path_loss.rssi(dist, rng)
+        rssi[dist > self._ap_range] = np.nan
+        return rssi
+
+    def _associate(self):
+        for start in range(0, len(self.positions), CHUNK):
+            stop = min(start + CHUNK, len(self.positions))
+            rssi = self._rssi_block(start, stop)
+            visible = ~np.isnan(rssi)
+            best = np.where(visible.any(axis=1), np.argmax(np.where(visible, rssi, -np.inf), axis=1), -1)
+            current = self.associated[start:stop]
+            rows = np.arange(stop - start)
+            current_rssi = np.where(current >= 0, rssi[rows, np.maximum(current, 0)], np.nan)
+            best_rssi = np.where(best >= 0, rssi[rows, np.maximum(best, 0)], np.nan)
+            switch = np.isnan(current_rssi) | (best_rssi >= current_rssi + ASSOC_HYSTERESIS_DB)
+            self.associated[start:stop] = np.where(switch, best, current)
+
+    def step(self, dt):
+        self.time += dt
+        self.positions = self.mobility.step(dt)
+        self._associate()
+        return self.positions
+
+    # dpid mà mỗi station đang kết nối (-1 = ngoài tầm mọi AP)
+    def associated_dpids(self):
+        return np.where(self.associated >= 0, self.dpids[np.maximum(self.associated, 0)], -1)
+
+    # Mẫu (mac, dpid, rssi, thời điểm) cho mọi cặp station–AP trong tầm phủ sóng,
+    # có nhiễu shadowing; macs[i] là MAC của station i
+    def rssi_samples(self, macs, now):
+        samples = []
+        for start in range(0, len(self.positions), CHUNK):
+            stop = min(start + CHUNK, len(self.positions))
+            rssi = self._rssi_block(start, stop, self.rng)
+            rows, cols = np.nonzero(~np.isnan(rssi))
+            values = np.rint(rssi[rows, cols]).astype(np.int64)
+            samples.extend((macs[start + i], dpid, value, now)
+                           for i, dpid, value in zip(rows.tolist(), self.dpids[cols].tolist(), values.tolist()))
+        return samples
+
+    # Các cặp (nguồn, đích) lưu lượng của khoảng dt, chỉ giữa các station đang kết nối
+    def flows(self, dt):
+        if self.traffic is None:
+            return np.zeros((0, 2), dtype=np.int64)
+        pairs = self.traffic.sample(dt)
+        connected = self.associated >= 0
+        return pairs[connected[pairs[:, 0]] & connected[pairs[:, 1]]]
+
+
+# Dựng kịch bản từ mô tả dạng chuỗi (dùng chung cho topo Mininet-WiFi và replay):
+#   layout: 'resort', 'grid:RxC' hoặc 'plan:<file.json>'
+#   mobility: 'static', 'waypoint' hoặc 'trace:<file.csv>'
+def build_scenario(layout='resort', stations=8, mobility='static', spacing=30.0, ap_range=35.0,
+                   speed=(0.5, 1.5), pause=(0.0, 10.0), traffic_rate=0.0, max_flows=None,
+                   shadowing_db=0.0, seed=None):
+    rng = np.random.default_rng(seed)
+    if layout == 'resort':
+        aps, bounds = list(RESORT_LAYOUT), RESORT_BOUNDS
+    elif layout.startswith('grid:'):
+        rows, cols = (int(v) for v in layout[5:].lower().split('x'))
+        aps, bounds = grid_layout(rows, cols, spacing, ap_range)
+    elif layout.startswith('plan:'):
+        aps, bounds = load_floor_plan(layout[5:])
+    else:
+        raise ValueError(f"Unknown layout {layout!r}")
+
+    initial = None
+    if layout == 'resort' and stations == len(RESORT_STATIONS):
+        initial = RESORT_STATIONS
+    if mobility == 'static':
+        if initial is None:
+            initial = rng.uniform(0.0, 1.0, (stations, 2)) * np.asarray(bounds)
+        model = StaticPositions(initial)
+    elif mobility == 'waypoint':
+        model = RandomWaypoint(stations, bounds, speed, pause, rng, initial)
+    elif mobility.startswith('trace:'):
+        model = TraceMobility(mobility[6:])
+    else:
+        raise ValueError(f"Unknown mobility model {mobility!r}")
+
+    traffic = TrafficMatrix(len(model), traffic_rate, max_flows, rng=rng) if traffic_rate > 0 else None
+    return Scenario(aps, model, PathLoss(shadowing_db=shadowing_db), traffic, rng)
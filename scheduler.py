@@ -0,0 +1,183 @@
+import heapq
+import time
+from collections import defaultdict
+
+
+# Thống kê thời gian chạy (giây) của một công việc hoặc một vòng lặp
+class RunStats(object):
+    __slots__ = ('runs', 'total', 'last', 'max', 'max_lag')
+
+    def __init__(self):
+        self.runs = 0
+        self.total = 0.0
+        self.last = 0.0
+        self.max = 0.0
+        self.max_lag = 0.0  # Độ trễ lớn nhất so với thời điểm dự kiến
+
+    def record(self, duration, lag=0.0):
+        self.runs += 1
+        self.total += duration
+        self.last = duration
+        self.max = max(self.max, duration)
+        self.max_lag = max(self.max_lag, lag)
+
+    def summary(self):
+        return {
+            "runs": self.runs,
+            "last_ms": round(self.last * 1000, 3),
+            "avg_ms": round(self.total / self.runs * 1000, 3) if self.runs else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+            "max_lag_ms": round(self.max_lag * 1000, 3),
+        }
+
+
+class PeriodicJob(object):
+    __slots__ = ('name', 'interval', 'func', 'next_run', 'stats')
+
+    def __init__(self, name, interval, func, next_run):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.next_run = next_run
+        self.stats = RunStats()
+
+
+# Bộ lập lịch cho các công việc định kỳ của luồng giám sát; mỗi công việc
+# có chu kỳ riêng và được đo thời gian chạy, độ trễ so với lịch.
+class JobScheduler(object):
+    def __init__(self, logger, observer=None):
+        self.logger = logger
+        self.observer = observer  # observer(tên, thời gian chạy) sau mỗi lần chạy, ví dụ để ghi metric
+        self._jobs = []
+        self.loop = RunStats()  # Thời gian của mỗi vòng lặp giám sát
+
+    def add(self, name, interval, func, now, offset=0.0):
+        self._jobs.append(PeriodicJob(name, interval, func, now + offset))
+
+    # Chạy các công việc đã đến hạn; công việc lỗi không làm dừng vòng lặp
+    def run_pending(self, now, clock=time.perf_counter):
+        for job in self._jobs:
+            if now < job.next_run:
+                continue
+            lag = now - job.next_run
+            start = clock()
+            try:
+                job.func()
+            except Exception:
+                self.logger.exception(f"Monitor job {job.name} failed")
+            duration = clock() - start
+            job.stats.record(duration, lag)
+            if self.observer is not None:
+                self.observer(job.name, duration)
+            job.next_run += job.interval
+            if job.next_run <= now:
+                job.next_run = now + job.interval  # Bỏ qua các lần đã lỡ
+
+    def next_due(self):
+        return min((job.next_run for job in self._jobs), default=float('inf'))
+
+    def summary(self):
+        jobs = {job.name: dict(job.stats.summary(), interval=job.interval) for job in self._jobs}
+        return {"loop": self.loop.summary(), "jobs": jobs}
+
+
+# Lịch gửi OFPPortStatsRequest: các AP được rải đều trong chu kỳ thay vì gửi
+# cùng lúc, mỗi AP có chu kỳ riêng (AP bận/nghi lỗi được hỏi nhanh hơn) và
+# request không có reply sau `timeout` giây được tính là mất.
+class StatsPoller(object):
+    def __init__(self, interval, timeout):
+        self.interval = interval  # Chu kỳ mặc định
+        self.timeout = timeout
+        self._heap = []  # (thời điểm hỏi, dpid), có thể chứa phần tử cũ
+        self._next = {}  # dpid → thời điểm hỏi tiếp theo
+        self._interval = {}  # dpid → chu kỳ hiện tại
+        self._outstanding = {}  # dpid → thời điểm gửi request chưa có reply
+        self.missed = defaultdict(int)  # dpid → số reply bị mất liên tiếp
+        self.rtt = {}  # dpid → thời gian chờ reply gần nhất (giây)
+        self.sent_count = 0
+        self.reply_count = 0
+        self.timeout_count = 0
+
+    def __contains__(self, dpid):
+        return dpid in self._next
+
+    # Thêm AP; độ lệch ban đầu rải các AP đều trong một chu kỳ theo dpid
+    def add(self, dpid, now):
+        offset = (dpid * 0.6180339887) % 1.0 * self.interval
+        self._interval[dpid] = self.interval
+        self._schedule(dpid, now + offset)
+
+    def remove(self, dpid):
+        self._next.pop(dpid, None)
+        self._interval.pop(dpid, None)
+        self._outstanding.pop(dpid, None)
+        self.missed.pop(dpid, None)
+        self.rtt.pop(dpid, None)
+
+    def interval_of(self, dpid):
+        return self._interval.get(dpid, self.interval)
+
+    # Đổi chu kỳ hỏi của AP; nếu chu kỳ mới ngắn hơn thì kéo lần hỏi kế tiếp về sớm
+    def set_interval(self, dpid, interval, now):
+        if dpid not in self._next or self._interval.get(dpid) == interval:
+            return
+        self._interval[dpid] = interval
+        if self._next[dpid] > now + interval:
+            self._schedule(dpid, now + interval)
+
+    def _schedule(self, dpid, when):
+        self._next[dpid] = when
+        heapq.heappush(self._heap, (when, dpid))
+
+    # Lấy các AP đến hạn hỏi; AP còn request chưa có reply sẽ chờ tới khi timeout
+    def due(self, now):
+        due = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            when, dpid = heapq.heappop(heap)
+            if self._next.get(dpid) != when:
+                continue  # Phần tử cũ
+            if dpid in self._outstanding:
+                self._schedule(dpid, max(self._outstanding[dpid] + self.timeout, now) + 0.01)
+                continue
+            due.append(dpid)
+            self._schedule(dpid, now + self._interval[dpid])
+        return due
+
+    # Các AP có request quá timeout mà chưa có reply
+    def timed_out(self, now):
+        expired = [dpid for dpid, sent in self._outstanding.items() if now - sent > self.timeout]
+        for dpid in expired:
+            del self._outstanding[dpid]
+            self.missed[dpid] += 1
+            self.timeout_count += 1
+        return expired
+
+    def sent(self, dpid, now):
+        self._outstanding[dpid] = now
+        self.sent_count += 1
+
+    # Nhận reply; trả về thời gian chờ reply (None nếu không có request tương ứng)
+    def reply(self, dpid, now):
+        sent = self._outstanding.pop(dpid, None)
+        self.missed.pop(dpid, None)
+        if sent is None:
+            return None
+        self.reply_count += 1
+        self.rtt[dpid] = now - sent
+        return self.rtt[dpid]
+
+    def next_due(self):
+        return self._heap[0][0] if self._heap else float('inf')
+
+    def summary(self):
+        rtts = list(self.rtt.values())
+        return {
+            "requests": self.sent_count,
+            "replies": self.reply_count,
+            "timeouts": self.timeout_count,
+            "outstanding": len(self._outstanding),
+            "fast_polled": sum(1 for interval in self._interval.values() if interval < self.interval),
+            "avg_reply_ms": round(sum(rtts) / len(rtts) * 1000, 3) if rtts else None,
+            "max_reply_ms": round(max(rtts) * 1000, 3) if rtts else None,
+        }
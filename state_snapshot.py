@@ -0,0 +1,145 @@
+import os
+import struct
+
+import numpy as np
+
+# Một client trong snapshot trạng thái (AP/cổng/IP = -1 nếu chưa biết, RSSI = -32768)
+CLIENT_DTYPE = np.dtype([('mac', '>u8'), ('dpid', '>i8'), ('port', '>i4'), ('ip', '>i8'), ('rssi', '>i2')])
+
+# Khung dữ liệu: magic, loại (đầy đủ/thay đổi), thời điểm, số client, số MAC bị xóa;
+# sau đó là các bản ghi CLIENT_DTYPE và các MAC bị xóa (uint64)
+_FRAME = struct.Struct('!4sBdII')
+_MAGIC = b'SDS1'
+_FULL = 0
+_DELTA = 1
+_EMPTY = np.zeros(0, CLIENT_DTYPE)
+
+
+# Chụp các cột của ClientTable thành mảng bản ghi sắp theo MAC
+def client_records(table):
+    slots, columns = table.export_columns()
+    slots = np.frombuffer(slots, dtype=slots.typecode) if len(slots) else np.zeros(0, np.int64)
+    records = np.empty(len(slots), CLIENT_DTYPE)
+    for name, column in zip(CLIENT_DTYPE.names, columns):
+        records[name] = np.frombuffer(column, dtype=column.typecode)[slots] if len(slots) else 0
+    return records[np.argsort(records['mac'], kind='stable')]
+
+
+def _frame(kind, now, records, removed):
+    header = _FRAME.pack(_MAGIC, kind, now, len(records), len(removed))
+    return header + records.astype(CLIENT_DTYPE).tobytes() + removed.astype('>u8').tobytes()
+
+
+# Đọc các khung liên tiếp; khung cuối bị ghi dở (controller dừng giữa chừng) bị bỏ qua
+def _read_frames(data):
+    offset = 0
+    while offset + _FRAME.size <= len(data):
+        magic, kind, saved, count, removed = _FRAME.unpack_from(data, offset)
+        end = offset + _FRAME.size + count * CLIENT_DTYPE.itemsize + removed * 8
+        if magic != _MAGIC or end > len(data):
+            return
+        start = offset + _FRAME.size
+        records = np.frombuffer(data, CLIENT_DTYPE, count, start)
+        macs = np.frombuffer(data, '>u8', removed, start + count * CLIENT_DTYPE.itemsize)
+        yield kind, saved, records, macs
+        offset = end
+
+
+# Áp các bản ghi thay đổi và MAC bị xóa lên mảng bản ghi (đều sắp theo MAC)
+def _merge(base, changed, removed):
+    keep = ~np.isin(base['mac'], removed) & ~np.isin(base['mac'], changed['mac'])
+    merged = np.concatenate([base[keep], changed])
+    return merged[np.argsort(merged['mac'], kind='stable')]
+
+
+# Snapshot trạng thái client của controller ra file nhị phân để khởi động lại nhanh.
+# Mỗi lần lưu chỉ ghi thêm các client đã đổi (AP, cổng, IP, RSSI) và các MAC bị
+# xóa vào file journal; sau `compact_every` lần (hoặc khi journal lớn hơn bản đầy
+# đủ) thì ghi lại bản đầy đủ (ghi file tạm rồi đổi tên) và xóa journal.
+class StateStore(object):
+    def __init__(self, path, compact_every=60):
+        self.path = path
+        self.journal_path = path + '.journal'
+        self.compact_every = compact_every
+        self._persisted = _EMPTY
+        self._deltas = 0
+        self._base_size = 0
+        self._journal_size = 0
+        self.saves = 0
+        self.records_written = 0
+        self.bytes_written = 0
+
+    # Đọc bản đầy đủ và journal; trả về (bản ghi, thời điểm lưu cuối) hoặc None
+    def load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                base = f.read()
+        except FileNotFoundError:
+            return None
+        frames = list(_read_frames(base))
+        if not frames or frames[0][0] != _FULL:
+            return None
+        _, saved, records, _ = frames[0]
+        records = records.copy()
+        try:
+            with open(self.journal_path, 'rb') as f:
+                journal = f.read()
+        except FileNotFoundError:
+            journal = b''
+        for kind, at, changed, removed in _read_frames(journal):
+            if kind == _DELTA and at >= saved:
+                records = _merge(records, changed, removed)
+                saved = at
+        self._persisted = records
+        self._base_size = len(base)
+        self._journal_size = len(journal)
+        return records, saved
+
+    # Lưu trạng thái hiện tại; trả về số client đã ghi (0 nếu không có gì đổi)
+    def save(self, records, now):
+        old = self._persisted
+        index = np.searchsorted(old['mac'], records['mac'])
+        index_clipped = np.minimum(index, max(len(old) - 1, 0))
+        same = np.zeros(len(records), bool)
+        if len(old):
+            same = old[index_clipped] == records
+        changed = records[~same]
+        removed = old['mac'][~np.isin(old['mac'], records['mac'])]
+        if not len(changed) and not len(removed) and self._base_size:
+            return 0
+        if (not self._base_size or self._deltas >= self.compact_every
+                or self._journal_size >= self._base_size):
+            self._write_base(records, now)
+            written = len(records)
+        else:
+            frame = _frame(_DELTA, now, changed, removed)
+            with open(self.journal_path, 'ab') as f:
+                f.write(frame)
+            self._deltas += 1
+            self._journal_size += len(frame)
+            self.bytes_written += len(frame)
+            written = len(changed) + len(removed)
+        self._persisted = records
+        self.saves += 1
+        self.records_written += written
+        return written
+
+    def _write_base(self, records, now):
+        frame = _frame(_FULL, now, records, np.zeros(0, '>u8'))
+        tmp = self.path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(frame)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        with open(self.journal_path, 'wb'):
+            pass
+        self._deltas = 0
+        self._base_size = len(frame)
+        self._journal_size = 0
+        self.bytes_written += len(frame)
+
+    def summary(self):
+        return {"path": self.path, "clients": len(self._persisted), "saves": self.saves,
+                "records_written": self.records_written, "bytes_written": self.bytes_written,
+                "journal_bytes": self._journal_size, "base_bytes": self._base_size}
@@ -0,0 +1,82 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# Datapath giả: ghi lại các message controller gửi thay vì gửi qua OpenFlow
+class FakeDatapath(object):
+    def __init__(self, dpid):
+        from ryu.ofproto import ofproto_v1_3, ofproto_v1_3_parser
+        self.id = dpid
+        self.ofproto = ofproto_v1_3
+        self.ofproto_parser = ofproto_v1_3_parser
+        self.sent = []
+        self.xid = 0
+
+    def send_msg(self, msg):
+        self.sent.append(msg)
+        return True
+
+    def set_xid(self, msg):
+        self.xid += 1
+        msg.set_xid(self.xid)
+        return self.xid
+
+    def sent_of(self, name):
+        return [msg for msg in self.sent if type(msg).__name__ == name]
+
+
+class FakeWSGI(object):
+    def register(self, *args, **kwargs):
+        pass
+
+
+# Controller không ghi file (nhật ký roaming, snapshot trạng thái) và không chạy worker
+@pytest.fixture
+def controller(monkeypatch):
+    import ryu_controler
+    monkeypatch.setattr(ryu_controler, 'ROAMING_LOG_PATH', None)
+    monkeypatch.setattr(ryu_controler, 'STATE_PATH', None)
+    monkeypatch.setattr(ryu_controler, 'ANALYTICS_WORKER', False)
+    app = ryu_controler.SDNWiFiLoadBalancer(wsgi=FakeWSGI())
+    yield app
+    app.close()
+
+
+# Kết nối một AP giả vào controller; trả về datapath
+@pytest.fixture
+def connect(controller):
+    from ryu.controller import ofp_event
+    from ryu.ofproto import ofproto_v1_3_parser
+
+    def connect(dpid):
+        datapath = FakeDatapath(dpid)
+        msg = ofproto_v1_3_parser.OFPSwitchFeatures(datapath)
+        msg.datapath = datapath
+        controller.switch_features_handler(ofp_event.EventOFPSwitchFeatures(msg))
+        return datapath
+    return connect
+
+
+# Gọi một handler REST của SDNLBRestAPI như WSGI của ryu: call(tên hàm, method, path, body)
+@pytest.fixture
+def rest(controller):
+    import json
+    from webob import Request
+    import ryu_controler
+
+    def call(handler, method='GET', path='/', body=None, **kwargs):
+        if body is not None and not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        req = Request.blank(path, method=method, body=body or b'', **kwargs)
+        api = ryu_controler.SDNLBRestAPI(req, None, {ryu_controler.SDN_LB_INSTANCE_NAME: controller})
+        return getattr(api, handler)(req)
+    return call
+
+
+@pytest.fixture
+def datapath():
+    return FakeDatapath(1)
@@ -0,0 +1,110 @@
+import json
+import logging
+import multiprocessing
+import random
+import time
+
+import pytest
+
+import ryu_controler
+from analytics_worker import AnalyticsService, host_records
+from client_table import int_to_mac
+
+MACS = [0x020000000000 + i for i in range(40)]
+
+
+# Thay cho AnalyticsWorker/PipeChannel: giữ lại thông điệp gửi gần nhất theo loại
+class Capture(object):
+    def __init__(self):
+        self.last = {}
+
+    def send(self, kind, data=None):
+        self.last[kind] = data
+
+    def summary(self):
+        return {}
+
+    def close(self, timeout=None):
+        pass
+
+
+@pytest.fixture
+def service(controller, monkeypatch):
+    monkeypatch.setattr(ryu_controler, 'STATE_RESYNC_EVERY', 5)
+    controller.worker = Capture()
+    conn, _ = multiprocessing.Pipe()
+    service = AnalyticsService(conn, controller._worker_config(), logging.getLogger('test'))
+    service.channel = Capture()
+    return service
+
+
+def publish(controller, service):
+    controller._publish_state()
+    state = controller.worker.last['state']
+    service._on_state(state)
+    return state
+
+
+# /host_status và mac_table của /load_status dựng lại từ toàn bộ bảng client
+def rebuilt(controller, service, state):
+    records = host_records(controller.clients)
+    records = records[records['dpid'] >= 0].tolist()
+    hosts = [service._host_entry(record, state['time'])[2] for record in records]
+    tables = {}
+    for record in records:
+        tables.setdefault(record[1], []).append(int_to_mac(record[0]))
+    return json.loads(json.dumps(hosts)), {str(dpid): tables.get(dpid, []) for dpid, _ in state['aps']}
+
+
+def test_delta_states_match_full_rebuild(controller, connect, service):
+    for dpid in (1, 2, 3):
+        connect(dpid)
+    rng = random.Random(5)
+    kinds = set()
+    for step in range(30):
+        now = time.time()
+        for _ in range(rng.randint(0, 12)):
+            op, mac = rng.random(), rng.choice(MACS)
+            if op < 0.35:
+                controller._move_client(mac, rng.choice([1, 2, 3]), rng.randint(1, 3))
+                controller.get_client(mac, now)
+            elif op < 0.45:
+                controller.clients.remove(mac)
+            elif op < 0.6:
+                service.ingest_rssi([(mac, rng.choice([1, 2, 3, None]), rng.randint(-90, -40), now)], now)
+            elif op < 0.75:
+                controller.clients.update_rate(mac, rng.random() * 1e6, 0.0, 0.3)
+            elif op < 0.9:
+                controller.get_client(mac, now).ip = rng.randint(1, 50)
+            else:
+                controller.clients.detach(mac)
+        state = publish(controller, service)
+        kinds.add(state['full'])
+        hosts, tables = rebuilt(controller, service, state)
+        assert json.loads(service.snapshots.current.views['host_status'].body) == hosts
+        load = json.loads(service.snapshots.current.views['load_status'].body)
+        assert {dpid: ap['mac_table'] for dpid, ap in load.items()} == tables
+    assert kinds == {True, False}
+
+
+def test_rssi_row_of_unknown_mac_kept_until_controller_applies_it(controller, connect, service):
+    connect(1)
+    mac = MACS[0]
+    now = time.time()
+    service.ingest_rssi([(mac, 1, -60, now)], now)
+    row = service.rows[mac]
+    publish(controller, service)
+    seq, updates, _ = service.channel.last['rssi']
+    assert updates == [(mac, -60)] and mac in service.rows
+    # Trạng thái gửi trước khi controller áp dụng lô RSSI → vẫn giữ hàng
+    publish(controller, service)
+    assert service.rows.get(mac) == row
+    # Controller đã áp dụng lô (tạo client) → hàng được giữ vì client đã có trong trạng thái
+    controller._on_worker_message('rssi', service.channel.last['rssi'])
+    assert controller.rssi_seq == seq and controller.clients.get(mac).rssi == -60
+    publish(controller, service)
+    assert service.rows.get(mac) == row
+    # Client bị xóa sau khi lô đã được áp dụng → trả hàng
+    controller.clients.remove(mac)
+    publish(controller, service)
+    assert mac not in service.rows
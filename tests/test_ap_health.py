@@ -0,0 +1,39 @@
+from ap_health import HealthMonitor, echo_payload, echo_sent_time
+
+
+def test_echo_payload_round_trip():
+    assert echo_sent_time(echo_payload(12.5)) == 12.5
+    assert echo_sent_time(b'other') is None and echo_sent_time(None) is None
+
+
+def test_port_down_marks_ap_faulty_until_up():
+    monitor = HealthMonitor()
+    monitor.add(1)
+    assert monitor.port_status(1, 2, down=True)
+    assert not monitor.port_status(1, 2, down=True)
+    assert monitor.is_faulty(1)
+    assert monitor.port_status(1, 2, down=False)
+    assert monitor.score(1) == 1.0
+
+
+def test_missed_echoes_degrade_score_and_reply_recovers():
+    monitor = HealthMonitor(echo_timeout=1.0, threshold=0.5)
+    monitor.add(1)
+    for start in (0.0, 2.0):
+        assert monitor.echo_due(1)
+        monitor.echo_sent(1, start)
+        assert not monitor.echo_due(1)
+        assert monitor.echo_timeouts(start + 1.5) == [1]
+    assert monitor.get(1).echo_missed == 2 and monitor.is_faulty(1)
+    monitor.echo_sent(1, 4.0)
+    assert monitor.echo_reply(1, 3.0, 4.1) is None  # Reply cũ không khớp
+    assert abs(monitor.echo_reply(1, 4.0, 4.05) - 0.05) < 1e-9
+    assert not monitor.is_faulty(1)
+
+
+def test_stalled_counters_alone_are_not_faulty():
+    monitor = HealthMonitor()
+    monitor.add(1)
+    monitor.counter_stall(1, True)
+    assert not monitor.is_faulty(1) and monitor.score(1) < 1.0
+    assert monitor.is_faulty(2)  # AP không được theo dõi
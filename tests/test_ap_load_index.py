@@ -0,0 +1,42 @@
+from ap_load_index import APLoadIndex
+
+
+def test_least_loaded_skips_stale_heap_entries():
+    index = APLoadIndex(capacity=1.0)
+    index.update(1, 0.2)
+    index.update(2, 0.5)
+    index.update(1, 0.9)  # Phần tử (0.2, 1) còn trong heap nhưng đã cũ
+    assert index.least_loaded() == 2
+    index.update(2, 0.95)
+    assert index.least_loaded() == 1
+    assert index.load_of(1) == 0.9
+
+
+def test_full_and_removed_aps_are_not_returned():
+    index = APLoadIndex(capacity=3)
+    index.update(1, 1)
+    index.update(2, 3)  # Đầy
+    assert 2 not in index and index.least_loaded() == 1
+    index.remove(1)
+    assert index.least_loaded() is None and len(index) == 0
+    index.update(1, 2)  # Trở lại với tải cũ hơn phần tử đã bị xóa
+    assert index.least_loaded() == 1
+
+
+def test_exclude_keeps_excluded_ap_in_index():
+    index = APLoadIndex(capacity=1.0)
+    index.update(1, 0.1)
+    index.update(2, 0.4)
+    assert index.least_loaded(exclude_dpid=1) == 2
+    assert index.least_loaded() == 1
+    index.remove(2)
+    assert index.least_loaded(exclude_dpid=1) is None
+    assert index.least_loaded() == 1
+
+
+def test_heap_is_compacted_under_churn():
+    index = APLoadIndex(capacity=10 ** 6)
+    for step in range(10000):
+        index.update(step % 8, step)
+    assert len(index._heap) <= 2 * len(index) + 64
+    assert index.least_loaded() == min(index._load, key=index._load.get)
@@ -0,0 +1,57 @@
+import json
+
+from api_snapshot import SnapshotStore, view_body, view_delta, view_select
+
+
+def entries(**values):
+    return [(key, value % 2, {'v': value}) for key, value in sorted(values.items())]
+
+
+def test_etag_changes_only_when_view_changes():
+    store = SnapshotStore(epoch='e1')
+    first = store.publish({'a': ('dict', entries(x=1)), 'b': ('list', entries(y=1))}, 0.0)
+    assert first.views['a'].etag == 'e1-a-1' and json.loads(first.views['b'].body) == [{'v': 1}]
+    second = store.publish({'a': ('dict', entries(x=2)), 'b': ('list', entries(y=1))}, 1.0)
+    assert second.views['a'].etag == 'e1-a-2' and second.views['b'].etag == 'e1-b-1'
+    same = store.publish({'a': ('dict', entries(x=2)), 'b': ('list', entries(y=1))}, 2.0)
+    assert same.version == 2 and same.published == 2.0
+
+
+def test_since_returns_changed_and_removed_keys():
+    store = SnapshotStore(epoch='e')
+    store.publish({'h': ('dict', entries(a=1, b=1, c=1))}, 0.0)
+    store.publish({'h': ('dict', entries(a=1, b=2))}, 1.0)  # c bị xóa
+    view = store.publish({'h': ('dict', entries(a=1, b=2, d=1))}, 2.0).views['h']
+    delta = json.loads(view_delta(view, 1))
+    assert delta == {'version': 3, 'since': 1, 'full': False, 'changed': {'b': {'v': 2}, 'd': {'v': 1}},
+                     'removed': ['c']}
+    assert json.loads(view_delta(view, 3))['changed'] == {}
+    assert json.loads(view_delta(view, 9))['full'] is True  # Controller khởi động lại
+
+
+def test_partial_publish_matches_full_publish():
+    full, partial = SnapshotStore(epoch='e'), SnapshotStore(epoch='e')
+    for store in (full, partial):
+        store.publish({'h': ('dict', entries(a=1, b=1, c=1))}, 0.0)
+    full_view = full.publish({'h': ('dict', entries(a=1, c=3, d=4))}, 1.0).views['h']
+    part_view = partial.publish({'h': ('dict', entries(c=3, d=4), ['b'])}, 1.0).views['h']
+    assert part_view.body == full_view.body
+    assert view_delta(part_view, 1) == view_delta(full_view, 1)
+    assert json.loads(view_delta(part_view, 1))['removed'] == ['b']
+
+
+def test_old_since_outside_history_gets_full_view():
+    store = SnapshotStore(epoch='e', history=2)
+    for value in range(1, 6):
+        view = store.publish({'h': ('dict', entries(a=value))}, float(value)).views['h']
+    assert view.horizon == 3
+    assert json.loads(view_delta(view, 2))['full'] is True
+    assert json.loads(view_delta(view, 4)) == {'version': 5, 'since': 4, 'full': False,
+                                               'changed': {'a': {'v': 5}}, 'removed': []}
+
+
+def test_select_by_tag():
+    store = SnapshotStore(epoch='e')
+    view = store.publish({'h': ('list', entries(a=1, b=2, c=3))}, 0.0).views['h']
+    indexes = view_select(view, lambda key, tag: tag == 1)
+    assert json.loads(view_body(view, indexes)) == [{'v': 1}, {'v': 3}]
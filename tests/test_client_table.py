@@ -0,0 +1,93 @@
+from client_table import ClientTable, int_to_ip, int_to_mac, ip_to_int, mac_to_int
+
+
+def macs_on(table, dpid):
+    return sorted(client.mac for client in table.on_ap(dpid))
+
+
+def test_mac_and_ip_round_trip():
+    assert int_to_mac(mac_to_int('02:00:00:0a:bc:ff')) == '02:00:00:0a:bc:ff'
+    assert int_to_ip(ip_to_int('10.0.0.42')) == '10.0.0.42'
+
+
+def test_attach_moves_client_between_ap_lists():
+    table = ClientTable()
+    assert table.attach(1, 10, 3) is None
+    table.attach(2, 10, 4)
+    assert table.attach(1, 20, 1) == 10
+    assert macs_on(table, 10) == [2]
+    assert macs_on(table, 20) == [1]
+    assert (table.count(10), table.count(20)) == (1, 1)
+    assert table.ap_of(1) == 20 and table.get(1).port == 1
+
+
+def test_unlink_head_middle_and_tail():
+    table = ClientTable()
+    for mac in range(1, 6):
+        table.attach(mac, 7, mac)
+    # Danh sách theo thứ tự chèn ngược: 5, 4, 3, 2, 1
+    table.detach(5)  # Đầu danh sách
+    table.detach(3)  # Giữa
+    table.detach(1)  # Cuối
+    assert macs_on(table, 7) == [2, 4]
+    assert table.count(7) == 2
+    table.detach(2)
+    table.detach(4)
+    assert table.on_ap(7) == [] and table.count(7) == 0
+    assert 7 not in table._head and 7 not in table._count
+    # Client tách khỏi AP vẫn còn trong bảng, chỉ mất AP và cổng
+    assert len(table) == 5 and table.get(4).dpid is None and table.get(4).port is None
+
+
+def test_removed_slot_is_reused_with_clean_columns():
+    table = ClientTable()
+    client = table.get_or_create(1, now=5.0)
+    table.attach(1, 3, 2)
+    client.ip = 0x0a000001
+    client.rssi = -60
+    table.add_traffic(1, tx_bytes=100, tx_packets=1)
+    table.update_rate(1, 1e6, 2e6, 1.0)
+    slot = client.slot
+    assert table.remove(1) == 3
+
+    reused = table.get_or_create(2, now=9.0)
+    assert reused.slot == slot
+    assert (reused.dpid, reused.port, reused.ip, reused.rssi) == (None, None, None, None)
+    assert (reused.tx_bytes, reused.tx_packets, reused.tx_bps, reused.rx_bps) == (0, 0, 0.0, 0.0)
+    assert reused.last_seen == 9.0
+    assert table.on_ap(3) == [] and table.mac_of_ip(0x0a000001) is None
+    assert 1 not in table and table.get(1) is None
+
+
+def test_ip_is_owned_by_last_writer():
+    table = ClientTable()
+    first, second = table.get_or_create(1), table.get_or_create(2)
+    first.ip = 100
+    second.ip = 100
+    assert table.mac_of_ip(100) == 2
+    # Client cũ đổi IP không được xóa chỉ mục của client đang giữ IP
+    first.ip = 200
+    assert table.mac_of_ip(100) == 2 and table.mac_of_ip(200) == 1
+    second.ip = None
+    assert table.mac_of_ip(100) is None
+    table.remove(1)
+    assert table.mac_of_ip(200) is None
+
+
+def test_change_tracking_reports_changed_clients_and_aps():
+    table = ClientTable(track_changes=True)
+    table.attach(1, 10, 1)
+    table.attach(2, 10, 2)
+    assert table.take_changes() == ({1, 2}, {10})
+    assert table.take_changes() == (set(), set())
+
+    table.get(1).ip = 5
+    table.get(1).ip = 5  # Không đổi → không ghi nhận thêm
+    table.attach(2, 20, 2)
+    table.remove(1)
+    changed, aps = table.take_changes()
+    assert changed == {1, 2} and aps == {10, 20}
+
+    table.update_rate(2, 0.0, 0.0, 0.5)  # Tốc độ không đổi
+    assert table.take_changes() == (set(), set())
+
@@ -0,0 +1,49 @@
+from ryu.lib.packet import arp, ethernet, ipv4, packet, vlan
+
+from client_table import ip_to_int, mac_to_int
+from fast_parse import (ARP_REPLY, ARP_REQUEST, ETH_TYPE_ARP, ETH_TYPE_IP, arp_reply_frame, arp_sender,
+                        arp_target, ipv4_src, parse_eth_header)
+
+SRC, DST = '02:00:00:00:00:01', '02:00:00:00:00:02'
+
+
+def build(*protocols):
+    pkt = packet.Packet()
+    for protocol in protocols:
+        pkt.add_protocol(protocol)
+    pkt.serialize()
+    return bytes(pkt.data)
+
+
+def test_arp_request_fields_match_ryu():
+    data = build(ethernet.ethernet(dst='ff:ff:ff:ff:ff:ff', src=SRC, ethertype=ETH_TYPE_ARP),
+                 arp.arp_ip(ARP_REQUEST, SRC, '10.0.0.1', '00:00:00:00:00:00', '10.0.0.2'))
+    dst, src, ethertype, offset = parse_eth_header(data)
+    assert (dst, src, ethertype, offset) == (0xffffffffffff, mac_to_int(SRC), ETH_TYPE_ARP, 14)
+    assert arp_sender(data, offset) == (mac_to_int(SRC), ip_to_int('10.0.0.1'))
+    assert arp_target(data, offset) == (ARP_REQUEST, ip_to_int('10.0.0.2'))
+
+
+def test_vlan_tag_is_skipped():
+    data = build(ethernet.ethernet(dst=DST, src=SRC, ethertype=0x8100),
+                 vlan.vlan(vid=5, ethertype=ETH_TYPE_IP),
+                 ipv4.ipv4(src='10.0.0.7', dst='10.0.0.8'))
+    _, _, ethertype, offset = parse_eth_header(data)
+    assert (ethertype, offset) == (ETH_TYPE_IP, 18)
+    assert ipv4_src(data, offset) == ip_to_int('10.0.0.7')
+
+
+def test_short_frames_are_rejected():
+    assert parse_eth_header(b'\x00' * 13) is None
+    assert arp_sender(b'\x00' * 30, 14) is None
+    assert arp_target(b'\x00' * 30, 14) is None
+    assert ipv4_src(b'\x00' * 20, 14) is None
+
+
+def test_arp_reply_frame_parses_with_ryu():
+    frame = arp_reply_frame(mac_to_int(DST), ip_to_int('10.0.0.2'), mac_to_int(SRC), ip_to_int('10.0.0.1'))
+    pkt = packet.Packet(frame)
+    eth, reply = pkt.get_protocol(ethernet.ethernet), pkt.get_protocol(arp.arp)
+    assert (eth.src, eth.dst) == (DST, SRC)
+    assert (reply.opcode, reply.src_mac, reply.src_ip, reply.dst_mac, reply.dst_ip) == (
+        ARP_REPLY, DST, '10.0.0.2', SRC, '10.0.0.1')
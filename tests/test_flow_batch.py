@@ -0,0 +1,73 @@
+import logging
+
+from flow_batch import FlowBatcher
+
+LOG = logging.getLogger('test')
+
+
+def flow_mod(datapath):
+    return datapath.ofproto_parser.OFPFlowMod(datapath=datapath, priority=1)
+
+
+def test_barrier_batch_commits_on_reply(datapath):
+    batcher = FlowBatcher(LOG, use_bundles=False)
+    batcher.probe(datapath)
+    results = []
+    batcher.queue(datapath, flow_mod(datapath))
+    batcher.queue(datapath, flow_mod(datapath))
+    batcher.on_commit(1, results.append)
+    assert batcher.pending() == 2
+    batcher.flush(10.0)
+    assert [type(msg).__name__ for msg in datapath.sent] == ['OFPFlowMod', 'OFPFlowMod', 'OFPBarrierRequest']
+    assert results == []
+    batcher.confirm(1, datapath.sent[-1].xid, 10.25)
+    assert results == [True]
+    assert batcher.latencies[-1] == (1, 2, 0.25, True)
+    assert batcher.summary()['in_flight'] == 0
+
+
+def test_error_fails_batch_even_if_barrier_arrives(datapath):
+    batcher = FlowBatcher(LOG, use_bundles=False)
+    results = []
+    batcher.queue(datapath, flow_mod(datapath))
+    batcher.on_commit(1, results.append)
+    batcher.flush(0.0)
+    batcher.error(1, datapath.sent[0].xid, 0.1)
+    batcher.confirm(1, datapath.sent[-1].xid, 0.2)
+    assert results == [False] and batcher.failed == 1
+
+
+def test_bundle_batch_after_successful_probe(datapath):
+    batcher = FlowBatcher(LOG)
+    batcher.probe(datapath)
+    probe = datapath.sent[-1]
+    assert batcher.bundle_reply(datapath, probe, 0.0)
+    assert batcher.bundle_support[1] is True
+    del datapath.sent[:]
+    batcher.queue(datapath, flow_mod(datapath))
+    batcher.flush(1.0)
+    names = [type(msg).__name__ for msg in datapath.sent]
+    assert names == ['ONFBundleCtrlMsg', 'ONFBundleAddMsg', 'ONFBundleCtrlMsg']
+    assert batcher.confirm(1, datapath.sent[-1].xid, 1.5) is not None
+    assert batcher.committed == 1
+
+
+def test_probe_error_falls_back_to_barrier(datapath):
+    batcher = FlowBatcher(LOG)
+    batcher.probe(datapath)
+    batcher.error(1, datapath.sent[-1].xid, 0.0)
+    assert batcher.bundle_support[1] is False
+
+
+def test_unconfirmed_batch_expires_and_empty_batch_commits(datapath):
+    batcher = FlowBatcher(LOG, use_bundles=False)
+    results = []
+    batcher.on_commit(1, results.append)
+    batcher.flush(0.0)
+    assert results == [True] and datapath.sent == []
+    batcher.queue(datapath, flow_mod(datapath))
+    batcher.on_commit(1, results.append)
+    batcher.flush(0.0)
+    assert batcher.expire(1.0, timeout=5.0) == 0
+    assert batcher.expire(6.0, timeout=5.0) == 1
+    assert results == [True, False]
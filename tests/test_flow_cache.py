@@ -0,0 +1,54 @@
+from flow_cache import FlowCache, actions_key, output_key
+
+
+class Output(object):
+    type = 0
+
+    def __init__(self, port):
+        self.port = port
+
+
+def test_identical_flow_is_suppressed():
+    cache = FlowCache()
+    match = {'eth_src': 'aa', 'eth_dst': 'bb'}
+    assert cache.add(1, 10, match, output_key(2))
+    assert not cache.add(1, 10, dict(reversed(list(match.items()))), output_key(2))
+    assert cache.add(1, 10, match, output_key(3))  # Đổi cổng ra → cài lại
+    assert (cache.installed, cache.suppressed, len(cache)) == (2, 1, 1)
+    assert actions_key([Output(3)]) == output_key(3)
+
+
+def test_pop_mac_forgets_flows_in_both_directions():
+    cache = FlowCache()
+    cache.add(1, 10, {'eth_src': 'aa', 'eth_dst': 'bb'}, output_key(1))
+    cache.add(1, 10, {'eth_src': 'bb', 'eth_dst': 'aa'}, output_key(2))
+    cache.add(1, 10, {'eth_src': 'bb', 'eth_dst': 'cc'}, output_key(3))
+    assert cache.pop_mac(1, 'aa') == 2
+    assert cache.count(1) == 1
+    # Chỉ mục của bb không còn trỏ tới flow đã xóa
+    assert cache._by_mac[1]['bb'] == {(10, (('eth_dst', 'cc'), ('eth_src', 'bb')))}
+    assert cache.pop_mac(1, 'aa') == 0 and cache.pop_mac(2, 'aa') == 0
+
+
+def test_remove_and_adopt():
+    cache = FlowCache()
+    match = {'eth_dst': 'aa'}
+    cache.adopt(1, 5, match, output_key(1))
+    assert cache.installed == 0 and cache.count(1) == 1
+    assert cache.remove(1, 5, match)
+    assert not cache.remove(1, 5, match)
+    assert 'aa' not in cache._by_mac[1]
+    assert cache.add(1, 5, match, output_key(1))  # Hết hạn trên switch → cài lại được
+    cache.clear(1)
+    assert len(cache) == 0 and cache.pop_mac(1, 'aa') == 0
+
+
+def test_controller_sends_each_flow_mod_once(controller, connect):
+    datapath = connect(1)
+    before = len(datapath.sent_of('OFPFlowMod'))
+    fields = {'eth_dst': '02:00:00:00:00:01'}
+    controller.add_flow(datapath, 10, fields, 3)
+    controller.add_flow(datapath, 10, dict(fields), 3)
+    assert len(datapath.sent_of('OFPFlowMod')) == before + 1
+    controller.add_flow(datapath, 10, fields, 4)
+    assert len(datapath.sent_of('OFPFlowMod')) == before + 2
@@ -0,0 +1,56 @@
+from collections import namedtuple
+
+import pytest
+
+from client_table import mac_to_int
+from flow_stats import CLIENT_COOKIE_TAG_MASK, FlowAccounting, client_cookie, cookie_mac
+
+Stat = namedtuple('Stat', 'cookie priority match byte_count packet_count')
+
+SRC, DST = '02:00:00:00:00:01', '02:00:00:00:00:02'
+MATCH = {'eth_src': SRC, 'eth_dst': DST}
+
+
+def stat(byte_count, packet_count, cookie=None):
+    return Stat(client_cookie(mac_to_int(SRC)) if cookie is None else cookie, 10, MATCH, byte_count, packet_count)
+
+
+def test_cookie_round_trip():
+    assert cookie_mac(client_cookie(0x123456)) == 0x123456
+    assert cookie_mac(0x123456) is None
+
+
+def test_shards_must_be_power_of_two():
+    with pytest.raises(ValueError):
+        FlowAccounting(shards=3)
+    with pytest.raises(ValueError):
+        FlowAccounting(shards=0)
+
+
+def test_deltas_counter_reset_and_foreign_flows():
+    accounting = FlowAccounting()
+    src, dst = mac_to_int(SRC), mac_to_int(DST)
+    assert accounting.flow_stats(1, [stat(100, 1), stat(999, 9, cookie=0)]) == [(src, dst, 100, 1)]
+    assert accounting.flow_stats(1, [stat(250, 3)]) == [(src, dst, 150, 2)]
+    assert accounting.flow_stats(1, [stat(40, 1)]) == [(src, dst, 40, 1)]  # Flow được cài lại
+    assert accounting.flow_removed(1, stat(90, 2)) == (src, dst, 50, 1)
+    assert len(accounting) == 0
+
+
+def test_sweep_completes_after_last_shard():
+    accounting = FlowAccounting(shards=2)
+    cookie, mask = accounting.next_filter(1)
+    assert mask == CLIENT_COOKIE_TAG_MASK | 1 and cookie & 1 == 0
+    accounting.sent(1, 100, now=0.0)
+    assert accounting.next_filter(1)[0] & 1 == 1
+    accounting.flow_stats(1, [stat(100, 1)])
+    assert accounting.reply_done(1, 100, 0.5) is None
+    accounting.sent(1, 101, now=1.0)
+    elapsed, totals = accounting.reply_done(1, 101, 1.5)
+    assert elapsed == 1.5 and totals == {mac_to_int(SRC): [100, 0], mac_to_int(DST): [0, 100]}
+
+
+def test_baseline_is_not_counted():
+    accounting = FlowAccounting()
+    accounting.baseline(1, [stat(5000, 50)])
+    assert accounting.flow_stats(1, [stat(5100, 51)])[0][2:] == (100, 1)
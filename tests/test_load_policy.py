@@ -0,0 +1,46 @@
+import pytest
+
+from load_policy import APState, channels_overlap, check_ap_profile, co_channel_counts, make_policy
+
+AP = APState(dpid=1, clients=5, max_clients=10, rate_bps=20e6, capacity_bps=100e6, channel=1, co_channel=1)
+
+
+def test_channel_overlap():
+    assert channels_overlap(1, 4) and not channels_overlap(1, 6)
+    assert channels_overlap(36, 36) and not channels_overlap(36, 40)
+    assert co_channel_counts({1: 1, 2: 3, 3: 11, 4: None}) == {1: 1, 2: 1, 3: 0, 4: 0}
+
+
+def test_policy_scores():
+    assert make_policy('client_count').score(AP) == 0.5
+    assert make_policy('throughput').score(AP) == pytest.approx(0.2)
+    weighted = make_policy('weighted', client_weight=1, rate_weight=1, co_channel_share=1)
+    assert weighted.utilization(AP) == pytest.approx(0.4)
+    assert weighted.score(AP) == pytest.approx(0.9)
+    assert not weighted.admits(AP._replace(rate_bps=50e6))
+
+
+@pytest.mark.parametrize('name, params', [
+    ('nope', {}), ('weighted', {'typo': 1}), ('weighted', {'co_channel_share': -1}),
+    ('weighted', {'co_channel_share': 1.5}), ('weighted', {'client_weight': float('nan')}),
+    ('weighted', {'rate_weight': float('inf')}), ('weighted', {'rate_weight': 'x'}),
+])
+def test_invalid_policy_raises_value_error(name, params):
+    with pytest.raises(ValueError):
+        make_policy(name, **params)
+
+
+@pytest.mark.parametrize('max_clients, capacity', [(0, 1e6), (5, 0), (5, float('inf')), (5, float('nan'))])
+def test_invalid_ap_profile(max_clients, capacity):
+    with pytest.raises(ValueError):
+        check_ap_profile(1, max_clients, capacity)
+
+
+def test_controller_keeps_old_policy_on_invalid_params(controller, connect):
+    connect(1)
+    before = controller.load_policy
+    with pytest.raises(ValueError):
+        controller.set_load_policy('weighted', {'co_channel_share': -0.5})
+    assert controller.load_policy is before
+    controller.set_load_policy('client_count', {})
+    assert controller.load_policy.name == 'client_count'
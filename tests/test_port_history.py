@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from port_history import PortStatsHistory, PortStatsRing
+
+
+def test_rates_and_counter_reset():
+    ring = PortStatsRing(capacity=8, alpha=0.5)
+    for t, rx, tx in ((0, 0, 0), (1, 1000, 500), (2, 3000, 500), (3, 100, 600)):
+        ring.append(t, rx, tx)
+    t, rx, tx = ring.rates()
+    assert t.tolist() == [1, 2, 3]
+    assert rx.tolist() == [8000, 16000, 0]  # Bộ đếm giảm (reset) → 0
+    assert tx.tolist() == [4000, 0, 800]
+    assert ring.latest_rate() == (0.0, 800.0)
+
+
+def test_ring_keeps_last_samples_in_order():
+    ring = PortStatsRing(capacity=4)
+    for t in range(10):
+        ring.append(t, t * 100, 0)
+    assert len(ring) == 4
+    assert ring.samples()[:, 0].tolist() == [6, 7, 8, 9]
+    assert ring.rates(window=1)[0].tolist() == [9]
+    ring.append(9, 5000, 0)  # Thời gian không tăng → bỏ qua
+    assert ring.samples()[-1, 1] == 900
+
+
+def test_vectorized_ewma_matches_incremental():
+    ring = PortStatsRing(capacity=32, alpha=0.3)
+    rng = np.random.default_rng(3)
+    rx = np.cumsum(rng.integers(0, 10000, 20))
+    for t, value in enumerate(rx):
+        ring.append(float(t), int(value), int(value) // 2)
+    _, ewma_rx, ewma_tx = ring.ewma_series()
+    assert ewma_rx[-1] == pytest.approx(ring.ewma_rx_bps)
+    assert ewma_tx[-1] == pytest.approx(ring.ewma_tx_bps)
+
+
+def test_history_aggregates_ports_of_an_ap():
+    history = PortStatsHistory(capacity=8)
+    for port in (1, 2):
+        history.record(7, port, 0.0, 0, 0)
+        history.record(7, port, 1.0, 125, 250)
+    assert history.ap_rate(7) == (2000.0, 4000.0)
+    assert history.port_summary(7, 1)["percentiles"]["rx_bps"][50] == 1000.0
+    assert history.ap_rate(8) is None and history.port_summary(8, 1) is None
+    history.drop(7)
+    assert history.dpids() == []
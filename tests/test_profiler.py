@@ -0,0 +1,44 @@
+import signal
+import time
+
+import pytest
+
+from profiler import StackSampler
+
+
+def busy(seconds):
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        pass
+
+
+@pytest.mark.parametrize('interval', [0, -1, float('inf'), float('nan')])
+def test_invalid_interval_is_rejected(interval):
+    before = signal.getsignal(signal.SIGPROF)
+    with pytest.raises(ValueError):
+        StackSampler().start(interval)
+    assert signal.getsignal(signal.SIGPROF) is before
+
+
+def test_old_handler_restored_when_timer_fails(monkeypatch):
+    def fail(*args):
+        raise signal.ItimerError("no timer")
+
+    before = signal.getsignal(signal.SIGPROF)
+    monkeypatch.setattr(signal, 'setitimer', fail)
+    sampler = StackSampler()
+    with pytest.raises(signal.ItimerError):
+        sampler.start(0.01)
+    assert signal.getsignal(signal.SIGPROF) is before and not sampler.running
+
+
+def test_samples_are_folded_by_stack():
+    sampler = StackSampler()
+    sampler.start(0.001)
+    try:
+        busy(0.2)
+    finally:
+        sampler.stop()
+    assert sampler.total > 0 and not sampler.running
+    assert any(name.endswith(':busy') for name, _ in sampler.hot_functions())
+    assert sampler.folded(top=1).endswith(f" {sampler.samples.most_common(1)[0][1]}\n")
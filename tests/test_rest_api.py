@@ -0,0 +1,83 @@
+import json
+import time
+
+import pytest
+
+import ryu_controler
+
+MAC = '02:00:00:00:00:01'
+
+
+def text(response):
+    return response.body.decode()
+
+
+def test_update_rssi_applies_valid_sample(controller, rest):
+    response = rest('update_rssi', 'POST', '/update_rssi', body={'mac': MAC, 'rssi': -61})
+    assert response.status_int == 200
+    assert controller.get_client(ryu_controler.mac_to_int(MAC), time.time()).rssi == -61
+
+
+@pytest.mark.parametrize('body', [
+    b'not json', [MAC, -50], 'text', {'rssi': -50}, {'mac': 5, 'rssi': -50}, {'mac': 'zz', 'rssi': -50},
+    {'mac': MAC}, {'mac': MAC, 'rssi': 'weak'}, {'mac': MAC, 'rssi': -300},
+])
+def test_update_rssi_rejects_invalid_body(controller, rest, body):
+    response = rest('update_rssi', 'POST', '/update_rssi', body=body)
+    assert response.status_int == 400
+    assert len(controller.clients) == 0
+
+
+@pytest.mark.parametrize('body, content_type', [
+    (b'{"samples": 5}', 'application/json'), (b'\x00\x01', 'application/octet-stream'), (b'[', 'application/json'),
+])
+def test_update_rssi_batch_rejects_invalid_body(rest, body, content_type):
+    response = rest('update_rssi_batch', 'POST', '/update_rssi_batch', body=body, content_type=content_type)
+    assert response.status_int == 400
+
+
+@pytest.mark.parametrize('query', ['limit=0', 'limit=-5', 'limit=x', 'ap=x', 'mac=zz', 'start=abc'])
+def test_roaming_events_rejects_invalid_params(rest, query):
+    assert rest('get_roaming_events', path='/roaming_events?' + query).status_int == 400
+
+
+def test_roaming_events_limit_returns_latest(controller, rest):
+    for t in range(5):
+        controller.roaming_events.append({"time": float(t), "mac": MAC, "from_ap": 1, "to_ap": 2})
+    result = json.loads(text(rest('get_roaming_events', path='/roaming_events?limit=2')))
+    assert result["count"] == 2 and [e["time"] for e in result["events"]] == [3.0, 4.0]
+
+
+def test_load_policy_rejects_out_of_range_params(controller, rest):
+    before = controller.load_policy
+    body = {'name': 'weighted', 'params': {'co_channel_share': -1}}
+    assert rest('load_policy', 'PUT', '/load_policy', body=body).status_int == 400
+    assert rest('load_policy', 'PUT', '/load_policy', body={'params': {}}).status_int == 400
+    assert controller.load_policy is before
+    response = rest('load_policy', 'PUT', '/load_policy', body={'name': 'throughput'})
+    assert json.loads(text(response))['name'] == 'throughput'
+
+
+def test_host_status_etag_and_since(controller, connect, rest):
+    connect(1)
+    controller._move_client(1, 1, 2)
+    controller._publish_snapshot()
+    first = rest('get_host_status', path='/host_status')
+    assert first.status_int == 200 and [h['mac'] for h in json.loads(text(first))] == [
+        ryu_controler.int_to_mac(1)]
+    version = int(first.headers['X-Snapshot-Version'])
+    assert rest('get_host_status', path='/host_status', if_none_match=first.etag).status_int == 304
+
+    controller._move_client(2, 1, 3)
+    controller._publish_snapshot()
+    delta = json.loads(text(rest('get_host_status', path=f'/host_status?since={version}')))
+    assert not delta['full'] and [h['mac'] for h in delta['changed']] == [ryu_controler.int_to_mac(2)]
+    assert rest('get_host_status', path='/host_status?since=x').status_int == 400
+    assert rest('get_host_status', path=f'/host_status?since={version}&ap=1').status_int == 400
+
+
+def test_profile_disabled_and_invalid_params(rest, monkeypatch):
+    assert rest('get_profile', path='/profile').status_int == 403
+    monkeypatch.setattr(ryu_controler, 'PROFILER_ENABLED', True)
+    for query in ('seconds=0', 'interval_ms=-1', 'interval_ms=inf', 'top=0', 'seconds=x'):
+        assert rest('get_profile', path='/profile?' + query).status_int == 400
@@ -0,0 +1,74 @@
+import threading
+import time
+
+from roaming_log import RoamingLog, RoamingRing, ping_pongs
+
+A, B = '02:00:00:00:00:0a', '02:00:00:00:00:0b'
+
+
+def event(t, mac, from_ap, to_ap):
+    return {"time": t, "mac": mac, "from_ap": from_ap, "to_ap": to_ap, "reason": "rssi",
+            "rssi": -70.0, "target_rssi": -50.0}
+
+
+def test_ring_keeps_latest_events():
+    ring = RoamingRing(capacity=3)
+    for t in range(5):
+        ring.append(event(float(t), A if t % 2 else B, 1, 2))
+    assert len(ring) == 3 and ring.total == 5
+    assert [e["time"] for e in ring.recent(2)] == [3.0, 4.0]
+    assert [e["time"] for e in ring.query(mac=A)] == [3.0]
+    assert [e["time"] for e in ring.query(ap=2, start=2.5, limit=1)] == [4.0]
+
+
+def test_ping_pongs_within_window():
+    events = [event(0.0, A, 1, 2), event(5.0, A, 2, 1), event(10.0, B, 1, 2), event(100.0, B, 2, 1)]
+    found = ping_pongs(events, window=30)
+    assert found == [{"mac": A, "ap": 1, "via_ap": 2, "left": 0.0, "returned": 5.0, "dwell": 5.0}]
+
+
+def wait_written(log, count):
+    deadline = time.time() + 5
+    while log.written < count and time.time() < deadline:
+        time.sleep(0.01)
+    assert log.written == count
+
+
+def test_sqlite_log_query_filters(tmp_path):
+    log = RoamingLog(str(tmp_path / 'roaming.sqlite3'))
+    try:
+        for t in range(10):
+            log.append(event(float(t), A if t < 5 else B, t % 3, 9))
+        wait_written(log, 10)
+        assert [e["time"] for e in log.query(mac=B, limit=2)] == [8.0, 9.0]
+        assert [e["time"] for e in log.query(ap=0, start=1, end=9)] == [3.0, 6.0]
+        assert log.recent(1)[0]["mac"] == B and log.pending() == 0
+    finally:
+        log.close()
+
+
+def test_each_reader_thread_gets_its_own_connection(tmp_path):
+    log = RoamingLog(str(tmp_path / 'roaming.sqlite3'))
+    try:
+        for t in range(200):
+            log.append(event(float(t), A, 1, 2))
+        wait_written(log, 200)
+        results, errors = [], []
+
+        def reader():
+            try:
+                for _ in range(20):
+                    results.append(len(log.query(ap=1)))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=reader) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == [] and set(results) == {200}
+        assert len(log._readers) == 4
+    finally:
+        log.close()
+    assert log._readers == []
@@ -0,0 +1,39 @@
+import pytest
+
+from client_table import mac_to_int
+from rssi_batch import pack_rssi_batch, parse_rssi_json, parse_rssi_sample, unpack_rssi_batch
+
+MAC = '02:00:00:00:00:0a'
+
+
+def test_binary_batch_round_trip():
+    data = pack_rssi_batch([(MAC, 3, -61, 10.5), (mac_to_int(MAC), None, -128, 11.0)])
+    assert unpack_rssi_batch(data) == [(mac_to_int(MAC), 3, -61, 10.5), (mac_to_int(MAC), None, -128, 11.0)]
+
+
+@pytest.mark.parametrize('data', [b'RSB', b'XXXX\x00\x00\x00\x00', pack_rssi_batch([(MAC, 1, -50, 0.0)])[:-1]])
+def test_malformed_binary_batch_is_rejected(data):
+    with pytest.raises(ValueError):
+        unpack_rssi_batch(data)
+
+
+def test_json_batch_accepts_object_or_list():
+    samples = [[MAC, 2, -70, None], [MAC, None, -40, 5]]
+    expected = [(mac_to_int(MAC), 2, -70, None), (mac_to_int(MAC), None, -40, 5.0)]
+    assert parse_rssi_json({'samples': samples}) == expected
+    assert parse_rssi_json(samples) == expected
+
+
+@pytest.mark.parametrize('sample', [
+    (None, 1, -50, 0), ('zz:zz', 1, -50, 0), (MAC, 'x', -50, 0), (MAC, 1, 'weak', 0),
+    (MAC, 1, -129, 0), (MAC, 1, 128, 0), (MAC, 1, float('inf'), 0), ('1:00:00:00:00:00:00', 1, -50, 0),
+])
+def test_invalid_sample_raises_value_error(sample):
+    with pytest.raises(ValueError):
+        parse_rssi_sample(*sample)
+
+
+@pytest.mark.parametrize('obj', [{'samples': 5}, 'text', [[MAC, 1, -50]], [5]])
+def test_invalid_json_batch_raises_value_error(obj):
+    with pytest.raises(ValueError):
+        parse_rssi_json(obj)
@@ -0,0 +1,95 @@
+import itertools
+import time
+
+import numpy as np
+import pytest
+
+from rssi_matrix import RSSIMatrix, min_cost_assignment
+
+THRESHOLD, HYSTERESIS, MIN_DWELL = -57, 5, 10
+
+
+@pytest.mark.parametrize('shape', [(1, 1), (3, 3), (3, 5), (4, 6)])
+def test_min_cost_assignment_matches_brute_force(shape):
+    rng = np.random.default_rng(sum(shape))
+    cost = rng.uniform(0, 100, shape)
+    result = min_cost_assignment(cost)
+    assert len(set(result.tolist())) == shape[0]
+    best = min(sum(cost[i, j] for i, j in enumerate(cols))
+               for cols in itertools.permutations(range(shape[1]), shape[0]))
+    assert cost[np.arange(shape[0]), result].sum() == pytest.approx(best)
+
+
+def test_min_cost_assignment_rejects_more_rows_than_columns():
+    with pytest.raises(ValueError):
+        min_cost_assignment(np.zeros((3, 2)))
+
+
+def test_smoothing_and_age():
+    matrix = RSSIMatrix(alpha=0.5, max_age=10)
+    matrix.update(0, 1, -60, 0.0)
+    matrix.update(0, 1, -40, 1.0)
+    assert matrix.value(0, 1, 1.0) == -50.0
+    assert matrix.value(0, 1, 20.0) is None
+    matrix.update(0, 1, -70, 30.0)  # Mẫu cũ quá max_age → bắt đầu lại
+    assert matrix.row(0, 30.0) == {1: -70.0}
+
+
+def matrix_with(samples, since=0.0):
+    matrix = RSSIMatrix()
+    for slot, row in enumerate(samples):
+        for dpid, rssi in row.items():
+            matrix.update(slot, dpid, rssi, 100.0)
+        matrix.mark_attached(slot, since)
+    return matrix
+
+
+def plan(matrix, slot_dpid, free, faulty=(), **kwargs):
+    return matrix.plan_roams(slot_dpid, free, set(faulty), 100.0, THRESHOLD, HYSTERESIS, MIN_DWELL, **kwargs)
+
+
+def test_weak_client_moves_to_stronger_ap_with_hysteresis_and_dwell():
+    matrix = matrix_with([{1: -70, 2: -50}, {1: -70, 2: -67}, {1: -40, 2: -30}])
+    moves = plan(matrix, [1, 1, 1], {2: (5, 0.0)})
+    assert moves == [(0, 1, 2, -70.0, -50.0)]
+    matrix.mark_attached(0, 95.0)  # Chưa đủ min_dwell
+    assert plan(matrix, [1, 1, 1], {2: (5, 0.0)}) == []
+
+
+def test_seats_limit_moves_and_faulty_ap_is_evacuated():
+    matrix = matrix_with([{1: -80, 2: -50}, {1: -80, 2: -45}, {1: -50}])
+    moves = plan(matrix, [1, 1, 1], {2: (1, 0.0)})
+    assert [(slot, to) for slot, _, to, _, _ in moves] == [(1, 2)]
+    # AP 1 lỗi: client không có mẫu tại AP 3 vẫn được chuyển (RSSI sàn)
+    moves = plan(matrix, [1, 1, 1], {2: (2, 0.0), 3: (1, 0.0)}, faulty={1})
+    assert sorted((slot, to) for slot, _, to, _, _ in moves) == [(0, 2), (1, 2), (2, 3)]
+
+
+def test_greedy_fallback_agrees_with_exact_when_uncontended():
+    rng = np.random.default_rng(7)
+    samples = [{dpid: float(rng.uniform(-90, -40)) for dpid in range(1, 6)} for _ in range(30)]
+    matrix = matrix_with(samples)
+    slot_dpid = rng.integers(1, 6, 30)
+    free = {dpid: (30, 0.0) for dpid in range(1, 6)}
+    exact = plan(matrix, slot_dpid, free, load_cost=0.0)
+    greedy = plan(matrix, slot_dpid, free, load_cost=0.0, max_cells=0)
+    assert exact and sorted(exact) == sorted(greedy)
+
+
+def test_large_plan_is_bounded():
+    clients, aps = 2000, 50
+    rng = np.random.default_rng(1)
+    matrix = RSSIMatrix(rows=clients, cols=aps)
+    for dpid in range(1, aps + 1):
+        matrix._column(dpid)
+    matrix._rssi[:clients, :aps] = rng.uniform(-90, -40, (clients, aps))
+    matrix._seen[:clients, :aps] = 100.0
+    slot_dpid = rng.integers(1, aps + 1, clients)
+    free = {dpid: (10, 0.0) for dpid in range(1, aps + 1)}
+    start = time.perf_counter()
+    moves = plan(matrix, slot_dpid, free)
+    assert time.perf_counter() - start < 5.0
+    taken = {}
+    for _, _, to, _, _ in moves:
+        taken[to] = taken.get(to, 0) + 1
+    assert moves and max(taken.values()) <= 10
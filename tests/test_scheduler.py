@@ -0,0 +1,58 @@
+import logging
+
+from scheduler import JobScheduler, StatsPoller
+
+LOG = logging.getLogger('test')
+
+
+def test_jobs_run_on_their_own_interval_and_skip_missed_runs():
+    runs = []
+    scheduler = JobScheduler(LOG)
+    scheduler.add('fast', 1.0, lambda: runs.append('fast'), now=0.0)
+    scheduler.add('slow', 5.0, lambda: runs.append('slow'), now=0.0, offset=2.0)
+    for now in (0.0, 1.0, 2.0):
+        scheduler.run_pending(now)
+    assert runs == ['fast', 'fast', 'fast', 'slow']
+    del runs[:]
+    scheduler.run_pending(20.0)  # Lỡ nhiều chu kỳ → chỉ chạy một lần
+    assert runs == ['fast', 'slow']
+    assert scheduler.next_due() == 21.0
+    assert scheduler.summary()['jobs']['fast']['max_lag_ms'] == 17000.0
+
+
+def test_failing_job_does_not_stop_others():
+    runs = []
+    scheduler = JobScheduler(LOG)
+    scheduler.add('bad', 1.0, lambda: 1 / 0, now=0.0)
+    scheduler.add('good', 1.0, lambda: runs.append(1), now=0.0)
+    scheduler.run_pending(0.0)
+    assert runs == [1] and scheduler.summary()['jobs']['bad']['runs'] == 1
+
+
+def test_poller_spreads_aps_and_waits_for_outstanding_reply():
+    poller = StatsPoller(interval=10.0, timeout=2.0)
+    for dpid in range(1, 6):
+        poller.add(dpid, 0.0)
+    first = {dpid: poller._next[dpid] for dpid in range(1, 6)}
+    assert len(set(first.values())) == 5 and all(0 <= t < 10 for t in first.values())
+
+    assert sorted(poller.due(10.0)) == [1, 2, 3, 4, 5]
+    poller.sent(1, 10.0)
+    assert poller.timed_out(11.0) == []
+    # Còn request chưa có reply → AP 1 bị hoãn tới khi hết timeout
+    assert sorted(poller.due(20.0)) == [2, 3, 4, 5]
+    assert poller.timed_out(20.0) == [1] and poller.missed[1] == 1
+    assert poller.due(20.01) == [1]
+    assert poller.reply(1, 20.5) is None and 1 not in poller.missed
+
+
+def test_poller_reply_rtt_and_faster_interval():
+    poller = StatsPoller(interval=10.0, timeout=2.0)
+    poller.add(1, 0.0)
+    when = poller._next[1]
+    assert poller.due(when) == [1]
+    poller.sent(1, when)
+    assert abs(poller.reply(1, when + 0.05) - 0.05) < 1e-9
+    poller.set_interval(1, 1.0, when + 0.1)
+    assert poller.next_due() <= when + 1.1
+    assert poller.due(when + 1.1) == [1]
@@ -0,0 +1,67 @@
+import numpy as np
+
+from client_table import ClientTable
+from state_snapshot import CLIENT_DTYPE, StateStore, client_records
+
+
+def records(*rows):
+    array = np.array(list(rows), CLIENT_DTYPE)
+    return array[np.argsort(array['mac'])]
+
+
+def test_client_records_from_table():
+    table = ClientTable()
+    client = table.get_or_create(5)
+    table.attach(5, 2, 3)
+    client.ip = 7
+    table.get_or_create(1)
+    assert client_records(table).tolist() == [(1, -1, -1, -1, -32768), (5, 2, 3, 7, -32768)]
+
+
+def test_journal_replay_restores_latest_state(tmp_path):
+    path = str(tmp_path / 'state.bin')
+    store = StateStore(path, compact_every=10)
+    store.save(records((1, 1, 1, 1, -50), (2, 1, 2, 2, -60)), 1.0)
+    assert store.save(records((1, 1, 1, 1, -50), (2, 1, 2, 2, -60)), 2.0) == 0
+    assert store.save(records((1, 2, 1, 1, -55), (3, 2, 4, 3, -70)), 3.0) == 3  # 1 đổi, 3 mới, 2 bị xóa
+    latest = records((1, 2, 1, 1, -55), (3, 2, 4, 3, -70))
+
+    loaded, saved = StateStore(path).load()
+    assert saved == 3.0 and loaded.tolist() == latest.tolist()
+
+
+# 20 client, chỉ client 0 đổi AP: khung thay đổi nhỏ hơn nhiều so với bản đầy đủ
+def clients(dpid):
+    return records(*[(mac, dpid if mac == 0 else 1, 1, mac, -50) for mac in range(20)])
+
+
+def test_compaction_rewrites_base_and_empties_journal(tmp_path):
+    path = str(tmp_path / 'state.bin')
+    journal = tmp_path / 'state.bin.journal'
+    store = StateStore(path, compact_every=2)
+    sizes = []
+    for step in range(4):
+        store.save(clients(step), float(step))
+        sizes.append(journal.stat().st_size)
+    # Lần 0: bản đầy đủ; 1, 2: journal; 3: đủ compact_every → ghi lại bản đầy đủ
+    assert sizes[0] == 0 and 0 < sizes[1] < sizes[2] and sizes[3] == 0
+    loaded, saved = StateStore(path).load()
+    assert saved == 3.0 and loaded.tolist() == clients(3).tolist()
+
+
+def test_truncated_last_journal_frame_is_ignored(tmp_path):
+    path = str(tmp_path / 'state.bin')
+    store = StateStore(path, compact_every=10)
+    for step in range(1, 4):
+        store.save(clients(step), float(step))
+    journal = tmp_path / 'state.bin.journal'
+    journal.write_bytes(journal.read_bytes()[:-5])
+    loaded, saved = StateStore(path).load()
+    assert saved == 2.0 and loaded.tolist() == clients(2).tolist()
+
+
+def test_missing_or_corrupt_base_loads_nothing(tmp_path):
+    path = tmp_path / 'state.bin'
+    assert StateStore(str(path)).load() is None
+    path.write_bytes(b'garbage')
+    assert StateStore(str(path)).load() is None
@@ -0,0 +1,35 @@
+from timer_wheel import TimerWheel
+
+
+def test_keys_expire_in_their_bucket():
+    wheel = TimerWheel(resolution=1.0, size=8, now=100.0)
+    wheel.schedule('a', 101.5)
+    wheel.schedule('b', 103.2)
+    assert len(wheel) == 2
+    assert wheel.expire(100.9) == []
+    assert wheel.expire(101.0) == ['a']
+    assert wheel.expire(102.0) == []
+    assert wheel.expire(103.9) == ['b']
+    assert len(wheel) == 0
+
+
+def test_past_deadline_expires_on_next_tick():
+    wheel = TimerWheel(resolution=1.0, size=8, now=100.0)
+    wheel.schedule('late', 50.0)
+    assert wheel.expire(100.5) == []
+    assert wheel.expire(101.0) == ['late']
+
+
+def test_long_gap_drains_every_bucket_once():
+    wheel = TimerWheel(resolution=1.0, size=4, now=0.0)
+    for t in range(1, 4):
+        wheel.schedule(t, t)
+    assert sorted(wheel.expire(1000.0)) == [1, 2, 3]
+    assert wheel.expire(1001.0) == []
+
+
+def test_deadline_beyond_wheel_returns_early():
+    # Khóa có hạn xa hơn resolution * size được trả về sớm; người gọi tự đặt lịch lại
+    wheel = TimerWheel(resolution=1.0, size=4, now=0.0)
+    wheel.schedule('far', 6.0)
+    assert wheel.expire(2.0) == ['far']
@@ -0,0 +1,42 @@
+import time
+
+
+# Bánh xe hẹn giờ dạng băm (hashed timer wheel) để hết hạn client theo từng đợt.
+# Mỗi ô chứa các khóa có hạn rơi vào một khoảng `resolution` giây; expire()
+# chỉ duyệt các ô đã qua kể từ lần gọi trước. Khóa được lưu không kèm hạn,
+# nên người gọi phải kiểm tra lại hạn thực tế và đặt lịch lại nếu cần
+# (hạn xa hơn `resolution * size` giây cũng sẽ được trả về sớm theo cách này).
+class TimerWheel(object):
+    def __init__(self, resolution=1.0, size=64, now=None):
+        self.resolution = resolution
+        self._buckets = [[] for _ in range(size)]
+        self._cursor = self._tick(time.time() if now is None else now)  # Ô cuối cùng đã xử lý
+        self._pending = 0
+
+    def __len__(self):
+        return self._pending
+
+    def _tick(self, t):
+        return int(t // self.resolution)
+
+    # Đặt lịch cho khóa tại thời điểm deadline
+    def schedule(self, key, deadline):
+        tick = max(self._tick(deadline), self._cursor + 1)
+        self._buckets[tick % len(self._buckets)].append(key)
+        self._pending += 1
+
+    # Lấy ra mọi khóa thuộc các ô đã qua tính đến thời điểm now
+    def expire(self, now):
+        current = self._tick(now)
+        steps = min(current - self._cursor, len(self._buckets))
+        expired = []
+        for tick in range(current - steps + 1, current + 1):
+            index = tick % len(self._buckets)
+            bucket = self._buckets[index]
+            if bucket:
+                expired.extend(bucket)
+                self._buckets[index] = []
+        if current > self._cursor:
+            self._cursor = current
+        self._pending -= len(expired)
+        return expired
@@ -6,40 +6,56 @@ from mn_wifi.link import wmediumd
 from mn_wifi.wmediumdConnector import interference
 from mininet.node import RemoteController
 from threading import Thread, Event
+import argparse
 import requests
 import time
 
+from rssi_batch import RSSI_BATCH_CONTENT_TYPE, pack_rssi_batch
+from scenario import build_scenario
+
 # Cờ dừng toàn cục
 stop_event = Event()
 
-def send_rssi_updates(stations, controller_ip='127.0.0.1:8080'):
-    while not stop_event.is_set():
-        for sta in stations:
-            try:
-                sta_index = int(sta.name[3:])
-                mac = sta.MAC()
-                rssi = -60 + (sta_index % 3) * 5
-                res = requests.post(f"http://{controller_ip}/update_rssi",
-                                    json={"mac": mac, "rssi": rssi}, timeout=2)
-                if res.status_code != 200:
-                    print(f"[WARN] RSSI update failed for {mac}: {res.status_code}")
-            except Exception as e:
-                print(f"[ERROR] Failed to send RSSI for {sta.name}: {e}")
-        stop_event.wait(5)
-
-def generate_continuous_traffic(stations, interval=5):
-    """
-    Gửi ping liên tục giữa các station bằng cách dùng cmdBackground để tránh poll() conflict
-    """
-    def run():
+# Gửi một lô RSSI; binary=True dùng định dạng nhị phân gọn, ngược lại gửi JSON
+def post_rssi_batch(session, url, samples, binary=True):
+    if binary:
+        return session.post(url, data=pack_rssi_batch(samples), timeout=2,
+                            headers={'Content-Type': RSSI_BATCH_CONTENT_TYPE})
+    return session.post(url, json={"samples": samples}, timeout=2)
+
+# Gửi RSSI theo lô (tối đa batch_size mẫu mỗi request) qua session HTTP dùng chung
+def send_rssi_samples(session, url, samples, batch_size=500, binary=True):
+    for i in range(0, len(samples), batch_size):
+        try:
+            res = post_rssi_batch(session, url, samples[i:i + batch_size], binary)
+            if res.status_code != 200:
+                print(f"[WARN] RSSI batch update failed: {res.status_code} {res.text}")
+        except Exception as e:
+            print(f"[ERROR] Failed to send RSSI batch: {e}")
+
+# Chạy kịch bản trên mạng Mininet-WiFi: mỗi `interval` giây cập nhật vị trí station
+# theo mô hình di chuyển, kết nối lại station đã đổi AP, gửi RSSI tính từ khoảng cách
+# thật (mô hình suy hao) và ping theo các luồng lấy mẫu từ ma trận lưu lượng
+def drive_scenario(net, stations, scenario, controller_ip='127.0.0.1:8080', interval=5, batch_size=500,
+                   binary=True):
+    url = f"http://{controller_ip}/update_rssi_batch"
+    aps = {int(ap.dpid, 16): ap for ap in net.aps}
+    macs = [sta.MAC() for sta in stations]
+    associated = scenario.associated_dpids()
+    with requests.Session() as session:
         while not stop_event.is_set():
-            for i in range(len(stations)):
-                for j in range(i + 1, len(stations)):
-                    sta_src = stations[i]
-                    sta_dst = stations[j]
-                    sta_src.cmdBackground(f'ping -c1 -W1 {sta_dst.IP()}')
-            time.sleep(interval)
-    Thread(target=run, daemon=True).start()
+            positions = scenario.step(interval)
+            current = scenario.associated_dpids()
+            for i, sta in enumerate(stations):
+                x, y = positions[i]
+                sta.setPosition(f'{x:.2f},{y:.2f},0')
+                if current[i] != associated[i] and current[i] in aps:
+                    sta.setAssociation(aps[current[i]], intf=sta.wintfs[0].name)
+            associated = current
+            send_rssi_samples(session, url, scenario.rssi_samples(macs, time.time()), batch_size, binary)
+            for src, dst in scenario.flows(interval).tolist():
+                stations[src].cmdBackground(f'ping -c1 -W1 {stations[dst].IP()}')
+            stop_event.wait(interval)
 
 def pause_ap_cli(net, ap_name='ap_pool', down_time=15):
     ap = net.get(ap_name)
@@ -51,43 +67,39 @@ def pause_ap_cli(net, ap_name='ap_pool', down_time=15):
         ap.cmd(f'ifconfig {ap.name}-wlan1 up')
     Thread(target=run, daemon=True).start()
 
-def resort_topology():
+# Tên SSID và nhãn hiển thị của các AP trong sơ đồ resort gốc
+RESORT_NAMES = {
+    'ap_lobby': ('LobbyAP', 'AP 1 - Lobby'),
+    'ap_pool': ('PoolAP', 'AP 2 - Pool'),
+    'ap_conf': ('ConfAP', 'AP 3 - Conference'),
+}
+
+# Dựng mạng theo kịch bản (AP theo sơ đồ, station tại vị trí ban đầu) và khởi động
+# các AP; trả về (net, stations)
+def build_network(scenario, controller_ip='127.0.0.1', controller_port=6653):
     net = Mininet_wifi(controller=RemoteController, accessPoint=OVSKernelAP,
                        link=wmediumd, wmediumd_mode=interference)
 
     info("*** Thêm controller\n")
     c0 = net.addController('c0', controller=RemoteController,
-                           ip='127.0.0.1', port=6653)
-
-    info("*** Thêm Access Point\n")
-    ap1 = net.addAccessPoint('ap_lobby', dpid='0000000000000001',
-                             ssid='LobbyAP', mode='g', channel='1',
-                             position='20,50,0', range=35)
-    ap2 = net.addAccessPoint('ap_pool', dpid='0000000000000002',
-                             ssid='PoolAP', mode='g', channel='6',
-                             position='50,50,0', range=35)
-    ap3 = net.addAccessPoint('ap_conf', dpid='0000000000000003',
-                             ssid='ConfAP', mode='g', channel='11',
-                             position='80,50,0', range=35)
-
-    ap1.name_display = 'AP 1 - Lobby'
-    ap2.name_display = 'AP 2 - Pool'
-    ap3.name_display = 'AP 3 - Conference'
-
-    info("*** Thêm Stations\n")
+                           ip=controller_ip, port=controller_port)
+
+    info(f"*** Thêm {len(scenario.aps)} Access Point\n")
+    aps = []
+    for spec in scenario.aps:
+        ssid, display = RESORT_NAMES.get(spec.name, (f'AP{spec.dpid}', f'AP {spec.dpid}'))
+        ap = net.addAccessPoint(spec.name, dpid=f'{spec.dpid:016x}', ssid=ssid, mode='g',
+                                channel=str(spec.channel), position=f'{spec.x},{spec.y},0',
+                                range=spec.range)
+        ap.name_display = display
+        aps.append(ap)
+
+    info(f"*** Thêm {len(scenario)} Stations\n")
     stations = []
-    positions = [
-        '5,50,0',     # sta1 – chỉ AP1
-        '50,15,0',    # sta2 – chỉ AP2
-        '95,50,0',    # sta3 – chỉ AP3
-        '35,50,0',    # sta4 – AP1 & AP2
-        '65,50,0',    # sta5 – AP2 & AP3
-        '35,65,0',    # sta6 – AP1 & AP3
-        '50,50,0',    # sta7 – cả 3 AP
-        '50,53,0'     # sta8 – cả 3 AP
-    ]
-    for i in range(8):
-        sta = net.addStation(f'sta{i+1}', ip=f'10.0.0.{i+1}/8', position=positions[i])
+    for i, (x, y) in enumerate(scenario.positions):
+        ip = 0x0a000000 + i + 1
+        sta = net.addStation(f'sta{i+1}', ip=f'{ip >> 24}.{ip >> 16 & 255}.{ip >> 8 & 255}.{ip & 255}/8',
+                             position=f'{x:.2f},{y:.2f},0')
         stations.append(sta)
 
     info("*** Cấu hình WiFi\n")
@@ -96,12 +108,16 @@ def resort_topology():
     info("*** Khởi động mạng\n")
     net.build()
     c0.start()
-    for ap in [ap1, ap2, ap3]:
+    for ap in aps:
         ap.start([c0])
+    return net, stations
+
+def run_topology(scenario, interval=5, rest='127.0.0.1:8080'):
+    net, stations = build_network(scenario)
 
-    info("*** Bắt đầu cập nhật RSSI và gửi ping liên tục\n")
-    Thread(target=send_rssi_updates, args=(stations,), daemon=True).start()
-    generate_continuous_traffic(stations)
+    info("*** Bắt đầu di chuyển station, cập nhật RSSI và sinh lưu lượng\n")
+    Thread(target=drive_scenario, args=(net, stations, scenario, rest),
+           kwargs={'interval': interval}, daemon=True).start()
     net.pause_ap_cli = pause_ap_cli
     info("*** CLI tương tác\n")
     try:
@@ -111,5 +127,20 @@ def resort_topology():
         net.stop()
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--layout', default='resort', help="resort, grid:RxC hoặc plan:<file.json>")
+    parser.add_argument('--stations', type=int, default=8)
+    parser.add_argument('--mobility', default='static', help="static, waypoint hoặc trace:<file.csv>")
+    parser.add_argument('--spacing', type=float, default=30.0, help='khoảng cách giữa các AP của lưới (m)')
+    parser.add_argument('--traffic-rate', type=float, default=2.0, help='số luồng ping mỗi giây')
+    parser.add_argument('--max-flows', type=int, default=50, help='số luồng tối đa mỗi chu kỳ')
+    parser.add_argument('--shadowing', type=float, default=0.0, help='nhiễu shadowing của RSSI (dB)')
+    parser.add_argument('--interval', type=float, default=5.0)
+    parser.add_argument('--rest', default='127.0.0.1:8080',
+                        help='địa chỉ REST API nhận RSSI (127.0.0.1:8081 khi controller chạy ANALYTICS_WORKER)')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
     setLogLevel('info')
-    resort_topology()
+    run_topology(build_scenario(args.layout, args.stations, args.mobility, spacing=args.spacing,
+                                traffic_rate=args.traffic_rate, max_flows=args.max_flows,
+                                shadowing_db=args.shadowing, seed=args.seed), args.interval, args.rest)